@@ -0,0 +1,1231 @@
+import asyncio
+import contextlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    TypeVar,
+)
+
+import httpx
+
+from api.client import (
+    Asset,
+    AttachNoteRequest,
+    AttachTagHierarchyRequest,
+    AttachTagRequest,
+    AttachTaskRequest,
+    BatchUpdateNotesRequest,
+    BatchUpdateNotesResponse,
+    CreateNoteRequest,
+    CreateTagRequest,
+    CreateTaskRequest,
+    DeleteNoteResponse,
+    LinkEdge,
+    Note,
+    NoteHierarchyRelation,
+    NoteTagRelation,
+    NoteWithoutContent,
+    RenderedNote,
+    RenderMarkdownRequest,
+    Tag,
+    TagHierarchyRelation,
+    Task,
+    TaskHierarchyRelation,
+    TreeNote,
+    TreeTagWithNotes,
+    TreeTask,
+    UpdateAssetRequest,
+    UpdateNoteRequest,
+    UpdateTaskRequest,
+)
+from api.session import SessionConfig
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+T = TypeVar("T")
+
+
+def create_async_client(config: Optional[SessionConfig] = None) -> httpx.AsyncClient:
+    """Create an httpx client with the same pool and timeouts as the sync API"""
+    config = config or SessionConfig()
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=config.pool_maxsize,
+            max_keepalive_connections=config.pool_maxsize if config.keep_alive else 0,
+        ),
+    )
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_clients: Dict[str, httpx.AsyncClient] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """The event loop shared clients live on, running on a daemon thread"""
+    global _loop
+    with _shared_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="async-api", daemon=True
+            ).start()
+        return _loop
+
+
+def get_async_client(
+    base_url: str, config: Optional[SessionConfig] = None
+) -> httpx.AsyncClient:
+    """Get the shared async client for a server, creating it on first use
+
+    The client is bound to the shared event loop, so it may only be used by
+    coroutines passed to run_shared. A config is only applied when the
+    client is first created.
+    """
+    with _shared_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = create_async_client(config)
+            _clients[base_url] = client
+        return client
+
+
+def run_shared(
+    make_coro: Callable[[httpx.AsyncClient], Awaitable[T]],
+    base_url: str,
+    session_config: Optional[SessionConfig] = None,
+) -> T:
+    """Run make_coro(client) on the shared event loop and wait for the result
+
+    Blocking, for worker threads. Every call for a server goes through its
+    one shared client, so connections are kept alive between calls.
+    """
+    client = get_async_client(base_url, session_config)
+    return asyncio.run_coroutine_threadsafe(make_coro(client), _shared_loop()).result()
+
+
+def close_async_clients(timeout: float = 3.0) -> None:
+    """Close every shared async client and its pooled connections"""
+    with _shared_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        loop = _loop
+    if loop is None or not clients:
+        return
+
+    async def close() -> None:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    try:
+        asyncio.run_coroutine_threadsafe(close(), loop).result(timeout)
+    except Exception as e:
+        print(f"Error closing async clients: {e}")
+
+
+class AsyncAPI:
+    """Async counterpart of api.client.API
+
+    Clients can share an httpx.AsyncClient so that concurrent calls reuse one
+    connection pool. If no client is passed, one is created on first use and
+    closed by aclose() / the async context manager.
+
+    An httpx.AsyncClient is bound to the event loop it is first used on, so a
+    shared client must not outlive the loop that created it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        session_config: Optional[SessionConfig] = None,
+    ):
+        self.base_url = base_url
+        self._client = client
+        self._owns_client = client is None
+        self._session_config = session_config
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_async_client(self._session_config)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying client if this instance created it"""
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class AsyncNoteAPI(AsyncAPI):
+    async def update_notes_tree(self, notes: list[TreeNote]) -> None:
+        """
+        Update the entire notes tree structure
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.put(
+            f"{self.base_url}/notes/tree",
+            headers=JSON_HEADERS,
+            json=[note.model_dump(exclude_unset=True) for note in notes],
+        )
+
+        response.raise_for_status()
+
+    async def note_create(self, title: str, content: str) -> dict:
+        """
+        Create a new note using the API
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = CreateNoteRequest(title=title, content=content)
+
+        response = await self.client.post(
+            f"{self.base_url}/notes/flat",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+        return response.json()
+
+    async def get_note(self, note_id: int) -> Note:
+        """
+        Retrieve a note by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails or the note is not found (404)
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/{note_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return Note.model_validate(response.json())
+
+    async def get_note_without_content(self, note_id: int) -> NoteWithoutContent:
+        """
+        Retrieve a note by its ID, excluding the content field
+
+        Raises:
+            httpx.HTTPError: If the request fails or the note is not found (404)
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/{note_id}",
+            params={"exclude_content": "true"},
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return NoteWithoutContent.model_validate(response.json())
+
+    async def get_all_notes(self) -> list[Note]:
+        """
+        Retrieve all notes
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Note.model_validate(note) for note in response.json()]
+
+    async def get_all_notes_without_content(self) -> list[NoteWithoutContent]:
+        """
+        Retrieve all notes without their content
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat",
+            params={"exclude_content": "true"},
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [NoteWithoutContent.model_validate(note) for note in response.json()]
+
+    async def attach_note_to_parent(
+        self,
+        child_note_id: int,
+        parent_note_id: int,
+        hierarchy_type: str = "block",
+    ) -> None:
+        """
+        Attach a note as a child of another note
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = AttachNoteRequest(
+            child_note_id=child_note_id,
+            parent_note_id=parent_note_id,
+            hierarchy_type=hierarchy_type,
+        )
+
+        response = await self.client.post(
+            f"{self.base_url}/notes/hierarchy/attach",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+
+    async def get_note_hierarchy_relations(self) -> list[NoteHierarchyRelation]:
+        """
+        Get all parent-child relationships between notes
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/hierarchy",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [NoteHierarchyRelation.model_validate(rel) for rel in response.json()]
+
+    async def detach_note_from_parent(self, note_id: int) -> None:
+        """
+        Detach a note from its parent
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/notes/hierarchy/detach/{note_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def search_notes(self, query: str) -> list[Note]:
+        """
+        Search notes using full-text search
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/search/fts",
+            params={"q": query},
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Note.model_validate(note) for note in response.json()]
+
+    async def update_note(self, note_id: int, request: UpdateNoteRequest) -> Note:
+        """
+        Update an existing note
+
+        Raises:
+            httpx.HTTPError: If the request fails or the note is not found (404)
+        """
+        response = await self.client.put(
+            f"{self.base_url}/notes/flat/{note_id}",
+            headers=JSON_HEADERS,
+            content=request.model_dump_json(),
+        )
+
+        response.raise_for_status()
+        return Note.model_validate(response.json())
+
+    async def delete_note(self, note_id: int) -> DeleteNoteResponse:
+        """
+        Delete a note by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails or the note is not found (404)
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/notes/flat/{note_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return DeleteNoteResponse.model_validate(response.json())
+
+    async def batch_update_notes(
+        self, request: BatchUpdateNotesRequest
+    ) -> BatchUpdateNotesResponse:
+        """
+        Update multiple notes in a single request
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        payload = {
+            "updates": [
+                [id, update.model_dump(exclude_none=True)]
+                for id, update in request.updates
+            ]
+        }
+
+        response = await self.client.put(
+            f"{self.base_url}/notes/flat/batch",
+            headers=JSON_HEADERS,
+            json=payload,
+        )
+
+        response.raise_for_status()
+        return BatchUpdateNotesResponse.model_validate(response.json())
+
+    async def get_note_backlinks(self, note_id: int) -> list[Note]:
+        """Get all notes that link to the specified note
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/{note_id}/backlinks",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Note.model_validate(note) for note in response.json()]
+
+    async def get_note_forward_links(self, note_id: int) -> list[Note]:
+        """Get all notes that the specified note links to
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/{note_id}/forward-links",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Note.model_validate(note) for note in response.json()]
+
+    async def get_note_breadcrumbs(self, note_id: int) -> list[NoteWithoutContent]:
+        """
+        Get the breadcrumb trail for a note, from root to the current note.
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/{note_id}/breadcrumbs",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+        # Clean up any trailing whitespace characters in titles
+        notes = response.json()
+        for note in notes:
+            note["title"] = note["title"].rstrip("\r\n")
+
+        return [NoteWithoutContent.model_validate(note) for note in notes]
+
+    async def get_all_note_breadcrumbs(self) -> dict[int, list[NoteWithoutContent]]:
+        """
+        Get breadcrumb trails for all notes in a single request.
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/breadcrumbs",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+        # Clean up trailing whitespace in all titles
+        breadcrumbs = response.json()
+        for note_id, trail in breadcrumbs.items():
+            for note in trail:
+                note["title"] = note["title"].rstrip("\r\n")
+
+        return {
+            int(note_id): [NoteWithoutContent.model_validate(note) for note in trail]
+            for note_id, trail in breadcrumbs.items()
+        }
+
+    async def get_note_path(self, note_id: int, separator: str = "/") -> str:
+        """
+        Get the full path of a note by joining the titles of its breadcrumb trail.
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        breadcrumbs = await self.get_note_breadcrumbs(note_id)
+        return separator.join(note.title for note in breadcrumbs)
+
+    async def get_link_edge_list(self) -> List[LinkEdge]:
+        """Get all link edges between notes
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/link-edge-list",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [LinkEdge.model_validate(edge) for edge in response.json()]
+
+    async def get_rendered_notes(
+        self, format: Literal["md", "html"] = "md"
+    ) -> list[RenderedNote]:
+        """Get all notes with their content rendered as markdown or HTML
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/render/{format}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [RenderedNote.model_validate(note) for note in response.json()]
+
+    async def get_rendered_note(
+        self,
+        note_id: int,
+        format: Literal["md", "html"] = "md",
+    ) -> str:
+        """Get a single note with its content rendered as markdown
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/flat/{note_id}/render/{format}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return response.text
+
+    async def render_markdown(
+        self,
+        content: str,
+        format: Optional[Literal["text", "html", "pdf"]] = None,
+    ) -> str:
+        """Render markdown content to the specified format
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request = RenderMarkdownRequest(content=content, format=format)
+
+        response = await self.client.post(
+            f"{self.base_url}/render/markdown",
+            headers=JSON_HEADERS,
+            content=request.model_dump_json(exclude_none=True),
+        )
+
+        response.raise_for_status()
+        return response.text
+
+    async def get_notes_tree(self, exclude_content: bool = False) -> list[TreeNote]:
+        """
+        Retrieve all notes in a tree structure
+
+        Args:
+            exclude_content: Only return titles, metadata and hierarchy
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/notes/tree",
+            params={"exclude_content": "true"} if exclude_content else None,
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [TreeNote.model_validate(note) for note in response.json()]
+
+
+class AsyncTagAPI(AsyncAPI):
+    async def get_tag(self, tag_id: int) -> Tag:
+        """
+        Get a tag by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tags/{tag_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return Tag.model_validate(response.json())
+
+    async def get_all_tags(self) -> list[Tag]:
+        """
+        Get all tags
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tags",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Tag.model_validate(tag) for tag in response.json()]
+
+    async def update_tag(self, tag_id: int, name: str) -> Tag:
+        """
+        Update an existing tag
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = CreateTagRequest(name=name)
+
+        response = await self.client.put(
+            f"{self.base_url}/tags/{tag_id}",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+        return Tag.model_validate(response.json())
+
+    async def delete_tag(self, tag_id: int) -> None:
+        """
+        Delete a tag by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/tags/{tag_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def attach_tag_to_note(self, note_id: int, tag_id: int) -> None:
+        """
+        Attach a tag to a note
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = AttachTagRequest(note_id=note_id, tag_id=tag_id)
+
+        response = await self.client.post(
+            f"{self.base_url}/tags/notes",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+
+    async def detach_tag_from_note(self, note_id: int, tag_id: int) -> None:
+        """
+        Detach a tag from a note
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/tags/notes/{note_id}/{tag_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def get_note_tag_relations(self) -> list[NoteTagRelation]:
+        """
+        Get all relationships between notes and tags
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tags/notes",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [NoteTagRelation.model_validate(rel) for rel in response.json()]
+
+    async def get_tag_hierarchy_relations(self) -> list[TagHierarchyRelation]:
+        """
+        Get all parent-child relationships between tags
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tags/hierarchy",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [TagHierarchyRelation.model_validate(rel) for rel in response.json()]
+
+    async def attach_tag_to_parent(self, child_id: int, parent_id: int) -> None:
+        """
+        Attach a tag as a child of another tag
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = AttachTagHierarchyRequest(child_id=child_id, parent_id=parent_id)
+
+        response = await self.client.post(
+            f"{self.base_url}/tags/hierarchy/attach",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+
+    async def detach_tag_from_parent(self, tag_id: int) -> None:
+        """
+        Detach a tag from its parent
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/tags/hierarchy/detach/{tag_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def create_tag(self, name: str) -> Tag:
+        """
+        Create a new tag
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = CreateTagRequest(name=name)
+
+        response = await self.client.post(
+            f"{self.base_url}/tags",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+        return Tag.model_validate(response.json())
+
+    async def get_tags_tree(self) -> list[TreeTagWithNotes]:
+        """
+        Get all tags in a tree structure
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tags/tree",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [TreeTagWithNotes.model_validate(tag) for tag in response.json()]
+
+
+class AsyncTaskAPI(AsyncAPI):
+    async def get_task(self, task_id: int) -> Task:
+        """
+        Get a task by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tasks/{task_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return Task.model_validate(response.json())
+
+    async def get_all_tasks(self) -> list[Task]:
+        """
+        Get all tasks
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tasks",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Task.model_validate(task) for task in response.json()]
+
+    async def get_task_hierarchy_relations(self) -> list[TaskHierarchyRelation]:
+        """
+        Get all parent-child relationships between tasks
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tasks/hierarchy",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [TaskHierarchyRelation.model_validate(rel) for rel in response.json()]
+
+    async def update_task(self, task_id: int, task: UpdateTaskRequest) -> Task:
+        """
+        Update an existing task
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.put(
+            f"{self.base_url}/tasks/{task_id}",
+            headers=JSON_HEADERS,
+            content=task.model_dump_json(exclude_none=True),
+        )
+
+        response.raise_for_status()
+        return Task.model_validate(response.json())
+
+    async def delete_task(self, task_id: int) -> None:
+        """
+        Delete a task by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails or the task is not found (404)
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/tasks/{task_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def create_task(self, task: CreateTaskRequest) -> Task:
+        """
+        Create a new task
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.post(
+            f"{self.base_url}/tasks",
+            headers=JSON_HEADERS,
+            content=task.model_dump_json(exclude_none=True),
+        )
+
+        response.raise_for_status()
+        return Task.model_validate(response.json())
+
+    async def attach_task_to_parent(self, child_id: int, parent_id: int) -> None:
+        """
+        Attach a task as a child of another task
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        request_data = AttachTaskRequest(
+            child_task_id=child_id, parent_task_id=parent_id
+        )
+
+        response = await self.client.post(
+            f"{self.base_url}/tasks/hierarchy/attach",
+            headers=JSON_HEADERS,
+            content=request_data.model_dump_json(),
+        )
+
+        response.raise_for_status()
+
+    async def detach_task_from_parent(self, task_id: int) -> None:
+        """
+        Detach a task from its parent
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/tasks/hierarchy/detach/{task_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def get_tasks_tree(self) -> list[TreeTask]:
+        """
+        Get all tasks in a tree structure
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/tasks/tree",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [TreeTask.model_validate(task) for task in response.json()]
+
+
+class AsyncAssetAPI(AsyncAPI):
+    async def upload_asset(self, file_path: str | Path | BinaryIO) -> Asset:
+        """
+        Upload a file as an asset
+
+        Raises:
+            httpx.HTTPError: If the request fails
+            FileNotFoundError: If the file path does not exist
+        """
+        if isinstance(file_path, (str, Path)):
+            with open(file_path, "rb") as f:
+                files = {"file": f}
+                response = await self.client.post(
+                    f"{self.base_url}/assets", files=files
+                )
+        else:
+            # Handle file-like object
+            files = {"file": file_path}
+            response = await self.client.post(f"{self.base_url}/assets", files=files)
+
+        response.raise_for_status()
+        return Asset.model_validate(response.json())
+
+    async def get_all_assets(self) -> list[Asset]:
+        """
+        Get all assets
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        response = await self.client.get(
+            f"{self.base_url}/assets",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+        return [Asset.model_validate(asset) for asset in response.json()]
+
+    async def update_asset(self, asset_id: int, request: UpdateAssetRequest) -> Asset:
+        """
+        Update an asset's metadata
+
+        Raises:
+            httpx.HTTPError: If the request fails or the asset is not found (404)
+        """
+        response = await self.client.put(
+            f"{self.base_url}/assets/{asset_id}",
+            headers=JSON_HEADERS,
+            content=request.model_dump_json(exclude_none=True),
+        )
+
+        response.raise_for_status()
+        return Asset.model_validate(response.json())
+
+    async def delete_asset(self, asset_id: int) -> None:
+        """
+        Delete an asset by its ID
+
+        Raises:
+            httpx.HTTPError: If the request fails or the asset is not found (404)
+        """
+        response = await self.client.delete(
+            f"{self.base_url}/assets/{asset_id}",
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def download_asset(
+        self, asset_id: int | str, output_path: str | Path
+    ) -> None:
+        """
+        Download an asset by its ID or filename to a specified path
+
+        Raises:
+            httpx.HTTPError: If the request fails or the asset is not found (404)
+        """
+        endpoint = (
+            f"{self.base_url}/assets/download/{asset_id}"
+            if isinstance(asset_id, str)
+            else f"{self.base_url}/assets/{asset_id}"
+        )
+        async with self.client.stream("GET", endpoint) as response:
+            response.raise_for_status()
+            with open(output_path, "wb") as f:
+                async for chunk in response.aiter_bytes(chunk_size=8192):
+                    f.write(chunk)
+
+    async def download_asset_data(self, asset_id: int | str) -> httpx.Response:
+        """
+        Download an asset by its ID or filename and return the response object
+
+        Raises:
+            httpx.HTTPError: If the request fails or the asset is not found (404)
+        """
+        endpoint = (
+            f"{self.base_url}/assets/download/{asset_id}"
+            if isinstance(asset_id, str)
+            else f"{self.base_url}/assets/{asset_id}"
+        )
+        response = await self.client.get(endpoint)
+        response.raise_for_status()
+        return response
+
+
+@dataclass
+class NoteSelectionBundle:
+    """Everything the UI needs from the server when a note is selected"""
+
+    forward_links: list[Note]
+    backlinks: list[Note]
+    note_tag_relations: list[NoteTagRelation]
+    tags: list[Tag]
+    note: Optional[Note] = None  # Only fetched when requested
+
+    def tags_for_note(self, note_id: int) -> list[Tag]:
+        """Filter the fetched tags down to those attached to a note"""
+        tag_ids = {
+            rel.tag_id for rel in self.note_tag_relations if rel.note_id == note_id
+        }
+        return [tag for tag in self.tags if tag.id in tag_ids]
+
+
+async def _no_note() -> None:
+    return None
+
+
+async def _no_items() -> list:
+    return []
+
+
+async def gather_note_selection(
+    note_api: AsyncNoteAPI,
+    tag_api: AsyncTagAPI,
+    note_id: int,
+    include_note: bool = False,
+    include_tags: bool = True,
+    include_links: bool = True,
+) -> NoteSelectionBundle:
+    """Fetch forward links, backlinks, note-tag relations and tags concurrently
+
+    With include_note the note itself (including its content) is fetched
+    alongside, for models that load the tree without content. Models that
+    already hold the tags or links in memory can skip them with
+    include_tags=False or include_links=False.
+    """
+    forward_links, backlinks, relations, tags, note = await asyncio.gather(
+        note_api.get_note_forward_links(note_id) if include_links else _no_items(),
+        note_api.get_note_backlinks(note_id) if include_links else _no_items(),
+        tag_api.get_note_tag_relations() if include_tags else _no_items(),
+        tag_api.get_all_tags() if include_tags else _no_items(),
+        note_api.get_note(note_id) if include_note else _no_note(),
+    )
+    return NoteSelectionBundle(
+        forward_links=forward_links,
+        backlinks=backlinks,
+        note_tag_relations=relations,
+        tags=tags,
+        note=note,
+    )
+
+
+def fetch_note_selection(
+    base_url: str,
+    note_id: int,
+    session_config: Optional[SessionConfig] = None,
+    include_note: bool = False,
+    include_tags: bool = True,
+    include_links: bool = True,
+) -> NoteSelectionBundle:
+    """Blocking wrapper around gather_note_selection for synchronous callers
+
+    Runs on the shared event loop and client, so all requests go out
+    together over kept-alive connections and the call takes roughly one
+    round trip. Must not be called from the shared loop's thread.
+    """
+    return run_shared(
+        lambda client: gather_note_selection(
+            AsyncNoteAPI(base_url, client),
+            AsyncTagAPI(base_url, client),
+            note_id,
+            include_note=include_note,
+            include_tags=include_tags,
+            include_links=include_links,
+        ),
+        base_url,
+        session_config,
+    )
+
+
+# Above this many changed notes, one full listing is cheaper than fetching
+# each note on its own
+SYNC_FULL_FETCH_THRESHOLD = 200
+
+# Changed notes downloaded at once
+SYNC_MAX_CONCURRENT_FETCHES = 8
+
+
+@dataclass
+class NoteSyncDelta:
+    """What changed on the server relative to a client's notes"""
+
+    metadata: list[NoteWithoutContent]
+    hierarchy: list[NoteHierarchyRelation]
+    changed_ids: set[int]  # New notes and notes with a different modified_at
+    changed_notes: dict[int, Note]  # Their content, when it was requested
+
+
+async def gather_note_sync_delta(
+    note_api: AsyncNoteAPI,
+    local_modified: dict[int, datetime],
+    include_content: bool = True,
+) -> NoteSyncDelta:
+    """Fetch note metadata and hierarchy, then only the notes that changed
+
+    local_modified maps each note the client holds to its modified_at.
+    With include_content the new and changed notes are downloaded, one by
+    one (a few at a time) or through a single full listing when many
+    changed. Notes deleted before their download are left out.
+    """
+    metadata, hierarchy = await asyncio.gather(
+        note_api.get_all_notes_without_content(),
+        note_api.get_note_hierarchy_relations(),
+    )
+    changed_ids = {
+        note.id for note in metadata if local_modified.get(note.id) != note.modified_at
+    }
+
+    changed_notes: dict[int, Note] = {}
+    if include_content and changed_ids:
+        if len(changed_ids) > SYNC_FULL_FETCH_THRESHOLD:
+            notes = await note_api.get_all_notes()
+        else:
+            semaphore = asyncio.Semaphore(SYNC_MAX_CONCURRENT_FETCHES)
+
+            async def fetch(note_id: int) -> Optional[Note]:
+                async with semaphore:
+                    try:
+                        return await note_api.get_note(note_id)
+                    except httpx.HTTPStatusError as e:
+                        if e.response.status_code != 404:
+                            raise
+                        return None
+
+            fetched = await asyncio.gather(*(fetch(i) for i in changed_ids))
+            notes = [note for note in fetched if note is not None]
+        changed_notes = {note.id: note for note in notes if note.id in changed_ids}
+
+        # Deleted between the listing and the fetch, drop them like the
+        # listing had
+        deleted_ids = changed_ids - changed_notes.keys()
+        if deleted_ids:
+            metadata = [note for note in metadata if note.id not in deleted_ids]
+            changed_ids -= deleted_ids
+
+    return NoteSyncDelta(
+        metadata=metadata,
+        hierarchy=hierarchy,
+        changed_ids=changed_ids,
+        changed_notes=changed_notes,
+    )
+
+
+def fetch_note_sync_delta(
+    base_url: str,
+    local_modified: dict[int, datetime],
+    include_content: bool = True,
+    session_config: Optional[SessionConfig] = None,
+) -> NoteSyncDelta:
+    """Blocking wrapper around gather_note_sync_delta for worker threads"""
+    return run_shared(
+        lambda client: gather_note_sync_delta(
+            AsyncNoteAPI(base_url, client),
+            local_modified,
+            include_content=include_content,
+        ),
+        base_url,
+        session_config,
+    )
+
+
+# How often a cancellable call checks whether it should stop
+CANCEL_POLL_INTERVAL = 0.02
+
+
+async def run_cancellable(
+    coro: Awaitable[T], is_cancelled: Callable[[], bool]
+) -> Optional[T]:
+    """Await coro, aborting it as soon as is_cancelled() returns True
+
+    Returns:
+        The coroutine's result, or None if it was cancelled
+    """
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        if is_cancelled():
+            # Closes the request's connection, the server stops sending
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            return None
+        await asyncio.wait({task}, timeout=CANCEL_POLL_INTERVAL)
+    return task.result()
+
+
+def fetch_rendered_html(
+    base_url: str,
+    note_id: int,
+    content: Optional[str],
+    is_cancelled: Callable[[], bool],
+    session_config: Optional[SessionConfig] = None,
+) -> Optional[str]:
+    """Render markdown to HTML on the server, or a stored note if content is None
+
+    Blocking wrapper for worker threads. The request is aborted once
+    is_cancelled() returns True, then None is returned.
+    """
+
+    async def render(api: AsyncNoteAPI) -> str:
+        if content is not None:
+            return await api.render_markdown(content, format="html")
+        return await api.get_rendered_note(note_id, format="html")
+
+    return run_shared(
+        lambda client: run_cancellable(
+            render(AsyncNoteAPI(base_url, client)), is_cancelled
+        ),
+        base_url,
+        session_config,
+    )
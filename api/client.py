@@ -7,6 +7,7 @@ from enum import Enum
 from typing import Optional
 from pydantic import BaseModel
 import requests
+from api.session import EndpointStats, PooledSession, SessionConfig, get_session
 
 
 class Note(BaseModel):
@@ -228,13 +229,24 @@ class Task(BaseModel):
 
 
 class API:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, session_config: Optional[SessionConfig] = None):
         self.base_url = base_url
+        # Shared with every other client for this server so connections are reused
+        self.session: PooledSession = get_session(base_url, session_config)
+
+    def get_connection_stats(self) -> dict[str, EndpointStats]:
+        """
+        Get connection reuse statistics for every endpoint called on this server
+
+        Returns:
+            dict[str, EndpointStats]: Mapping of endpoint (e.g. 'GET /notes/flat/{id}') to stats
+        """
+        return self.session.connection_stats()
 
 
 class NoteAPI(API):
-    def __init__(self, base_url: str):
-        super().__init__(base_url)
+    def __init__(self, base_url: str, session_config: Optional[SessionConfig] = None):
+        super().__init__(base_url, session_config)
 
     def update_notes_tree(self, notes: list[TreeNote]) -> None:
         """
@@ -247,7 +259,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/notes/tree",
             headers={"Content-Type": "application/json"},
             json=[note.model_dump(exclude_unset=True) for note in notes],
@@ -271,7 +283,7 @@ class NoteAPI(API):
         """
         request_data = CreateNoteRequest(title=title, content=content)
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/notes/flat",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -294,7 +306,7 @@ class NoteAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the note is not found (404)
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/{note_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -319,7 +331,7 @@ class NoteAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the note is not found (404)
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/{note_id}",
             params={"exclude_content": "true"},
             headers={"Content-Type": "application/json"},
@@ -340,7 +352,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat",
             headers={"Content-Type": "application/json"},
         )
@@ -362,7 +374,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat",
             params={"exclude_content": "true"},
             headers={"Content-Type": "application/json"},
@@ -394,7 +406,7 @@ class NoteAPI(API):
             hierarchy_type=hierarchy_type,
         )
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/notes/hierarchy/attach",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -416,7 +428,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/hierarchy",
             headers={"Content-Type": "application/json"},
         )
@@ -434,7 +446,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/notes/hierarchy/detach/{note_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -454,7 +466,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/search/fts",
             params={"q": query},
             headers={"Content-Type": "application/json"},
@@ -478,7 +490,7 @@ class NoteAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the note is not found (404)
         """
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/notes/flat/{note_id}",
             headers={"Content-Type": "application/json"},
             data=request.model_dump_json(),
@@ -501,7 +513,7 @@ class NoteAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the note is not found (404)
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/notes/flat/{note_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -532,7 +544,7 @@ class NoteAPI(API):
             ]
         }
 
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/notes/flat/batch",
             headers={"Content-Type": "application/json"},
             json=payload,
@@ -556,7 +568,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/{note_id}/backlinks",
             headers={"Content-Type": "application/json"},
         )
@@ -576,7 +588,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/{note_id}/forward-links",
             headers={"Content-Type": "application/json"},
         )
@@ -598,7 +610,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/{note_id}/breadcrumbs",
             headers={"Content-Type": "application/json"},
         )
@@ -622,7 +634,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/breadcrumbs",
             headers={"Content-Type": "application/json"},
         )
@@ -666,7 +678,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/link-edge-list",
             headers={"Content-Type": "application/json"},
         )
@@ -688,7 +700,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/render/{format}",
             headers={"Content-Type": "application/json"},
         )
@@ -712,7 +724,7 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/flat/{note_id}/render/{format}",
             headers={"Content-Type": "application/json"},
         )
@@ -739,7 +751,7 @@ class NoteAPI(API):
         """
         request = RenderMarkdownRequest(content=content, format=format)
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/render/markdown",
             headers={"Content-Type": "application/json"},
             data=request.model_dump_json(exclude_none=True),
@@ -748,11 +760,12 @@ class NoteAPI(API):
         response.raise_for_status()
         return response.text
 
-    def get_notes_tree(self) -> list[TreeNote]:
+    def get_notes_tree(self, exclude_content: bool = False) -> list[TreeNote]:
         """
         Retrieve all notes in a tree structure
 
         Args:
+            exclude_content: Only return titles, metadata and hierarchy
 
         Returns:
             list[TreeNote]: List of all notes with their hierarchical structure
@@ -760,8 +773,9 @@ class NoteAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/notes/tree",
+            params={"exclude_content": "true"} if exclude_content else None,
             headers={"Content-Type": "application/json"},
         )
 
@@ -770,8 +784,8 @@ class NoteAPI(API):
 
 
 class TagAPI(API):
-    def __init__(self, base_url: str):
-        super().__init__(base_url)
+    def __init__(self, base_url: str, session_config: Optional[SessionConfig] = None):
+        super().__init__(base_url, session_config)
 
     def get_tag(self, tag_id: int) -> Tag:
         """
@@ -786,7 +800,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tags/{tag_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -806,7 +820,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tags",
             headers={"Content-Type": "application/json"},
         )
@@ -830,7 +844,7 @@ class TagAPI(API):
         """
         request_data = CreateTagRequest(name=name)
 
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/tags/{tag_id}",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -849,7 +863,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/tags/{tag_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -873,7 +887,7 @@ class TagAPI(API):
         """
         request_data = AttachTagRequest(note_id=note_id, tag_id=tag_id)
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tags/notes",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -896,7 +910,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/tags/notes/{note_id}/{tag_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -915,7 +929,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tags/notes",
             headers={"Content-Type": "application/json"},
         )
@@ -933,7 +947,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tags/hierarchy",
             headers={"Content-Type": "application/json"},
         )
@@ -958,7 +972,7 @@ class TagAPI(API):
         """
         request_data = AttachTagHierarchyRequest(child_id=child_id, parent_id=parent_id)
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tags/hierarchy/attach",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -976,7 +990,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/tags/hierarchy/detach/{tag_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -998,7 +1012,7 @@ class TagAPI(API):
         """
         request_data = CreateTagRequest(name=name)
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tags",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -1017,7 +1031,7 @@ class TagAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tags/tree",
             headers={"Content-Type": "application/json"},
         )
@@ -1027,8 +1041,8 @@ class TagAPI(API):
 
 
 class TaskAPI(API):
-    def __init__(self, base_url: str):
-        super().__init__(base_url)
+    def __init__(self, base_url: str, session_config: Optional[SessionConfig] = None):
+        super().__init__(base_url, session_config)
 
     def get_task(self, task_id: int) -> Task:
         """
@@ -1043,7 +1057,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tasks/{task_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -1061,7 +1075,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tasks",
             headers={"Content-Type": "application/json"},
         )
@@ -1079,7 +1093,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tasks/hierarchy",
             headers={"Content-Type": "application/json"},
         )
@@ -1101,7 +1115,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/tasks/{task_id}",
             headers={"Content-Type": "application/json"},
             data=task.model_dump_json(exclude_none=True),
@@ -1121,7 +1135,7 @@ class TaskAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the task is not found (404)
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/tasks/{task_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -1141,7 +1155,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tasks",
             headers={"Content-Type": "application/json"},
             data=task.model_dump_json(exclude_none=True),
@@ -1165,7 +1179,7 @@ class TaskAPI(API):
             child_task_id=child_id, parent_task_id=parent_id
         )
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tasks/hierarchy/attach",
             headers={"Content-Type": "application/json"},
             data=request_data.model_dump_json(),
@@ -1183,7 +1197,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/tasks/hierarchy/detach/{task_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -1200,7 +1214,7 @@ class TaskAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tasks/tree",
             headers={"Content-Type": "application/json"},
         )
@@ -1210,8 +1224,8 @@ class TaskAPI(API):
 
 
 class AssetAPI(API):
-    def __init__(self, base_url: str):
-        super().__init__(base_url)
+    def __init__(self, base_url: str, session_config: Optional[SessionConfig] = None):
+        super().__init__(base_url, session_config)
 
     def upload_asset(self, file_path: str | Path | BinaryIO) -> Asset:
         """
@@ -1230,11 +1244,11 @@ class AssetAPI(API):
         if isinstance(file_path, (str, Path)):
             with open(file_path, "rb") as f:
                 files = {"file": f}
-                response = requests.post(f"{self.base_url}/assets", files=files)
+                response = self.session.post(f"{self.base_url}/assets", files=files)
         else:
             # Handle file-like object
             files = {"file": file_path}
-            response = requests.post(f"{self.base_url}/assets", files=files)
+            response = self.session.post(f"{self.base_url}/assets", files=files)
 
         response.raise_for_status()
         return Asset.model_validate(response.json())
@@ -1249,7 +1263,7 @@ class AssetAPI(API):
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/assets",
             headers={"Content-Type": "application/json"},
         )
@@ -1272,7 +1286,7 @@ class AssetAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the asset is not found (404)
         """
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/assets/{asset_id}",
             headers={"Content-Type": "application/json"},
             data=request.model_dump_json(exclude_none=True),
@@ -1292,7 +1306,7 @@ class AssetAPI(API):
             requests.exceptions.RequestException: If the request fails
             requests.exceptions.HTTPError: If the asset is not found (404)
         """
-        response = requests.delete(
+        response = self.session.delete(
             f"{self.base_url}/assets/{asset_id}",
             headers={"Content-Type": "application/json"},
         )
@@ -1320,7 +1334,7 @@ class AssetAPI(API):
             if isinstance(asset_id, str)
             else f"{self.base_url}/assets/{asset_id}"
         )
-        response = requests.get(endpoint, stream=True)
+        response = self.session.get(endpoint, stream=True)
         response.raise_for_status()
 
         with open(output_path, "wb") as f:
@@ -1346,6 +1360,6 @@ class AssetAPI(API):
             if isinstance(asset_id, str)
             else f"{self.base_url}/assets/{asset_id}"
         )
-        response = requests.get(endpoint)
+        response = self.session.get(endpoint)
         response.raise_for_status()
         return response
@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """Connection settings shared by every API client talking to one server"""
+
+    pool_connections: int = 4  # Number of host pools to cache
+    pool_maxsize: int = 16  # Max keep-alive connections per host
+    keep_alive: bool = True
+    connect_timeout: float = 5.0  # Seconds
+    read_timeout: float = 30.0  # Seconds
+    max_retries: int = 0
+
+
+@dataclass
+class EndpointStats:
+    """Connection reuse statistics for a single endpoint"""
+
+    requests: int = 0
+    new_connections: int = 0
+    total_elapsed: float = 0.0  # Seconds
+
+    @property
+    def reused_connections(self) -> int:
+        return self.requests - self.new_connections
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_elapsed / self.requests if self.requests else 0.0
+
+
+# Numeric path segments are collapsed so /notes/flat/12 and /notes/flat/13
+# are counted against the same endpoint
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """Normalise a request into an endpoint key, e.g. 'GET /notes/flat/{id}'"""
+    path = _ID_SEGMENT.sub("/{id}", urlsplit(url).path) or "/"
+    return f"{method.upper()} {path}"
+
+
+class PooledSession(requests.Session):
+    """A keep-alive requests session with a bounded connection pool
+
+    Applies a default timeout to every request and records, per endpoint,
+    how many requests had to open a new TCP connection.
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None):
+        super().__init__()
+        self.config = config or SessionConfig()
+        self._stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            max_retries=self.config.max_retries,
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+        if not self.config.keep_alive:
+            self.headers["Connection"] = "close"
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault(
+            "timeout", (self.config.connect_timeout, self.config.read_timeout)
+        )
+
+        connections_before = self._open_connection_count(url)
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            opened = self._open_connection_count(url) - connections_before
+            self._record(endpoint_key(method, url), max(opened, 0), elapsed)
+
+    def _open_connection_count(self, url: str) -> int:
+        """Number of connections the pool for this host has opened so far"""
+        try:
+            adapter = self.get_adapter(url)
+            host = urlsplit(url).hostname
+            pools = adapter.poolmanager.pools
+            return sum(
+                pools[key].num_connections
+                for key in pools.keys()
+                if key.key_host == host
+            )
+        except Exception:
+            return 0
+
+    def _record(self, key: str, new_connections: int, elapsed: float) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(key, EndpointStats())
+            stats.requests += 1
+            # Concurrent requests on other threads may open connections too,
+            # so never attribute more than one new connection to a request
+            stats.new_connections += min(new_connections, 1)
+            stats.total_elapsed += elapsed
+
+    def connection_stats(self) -> Dict[str, EndpointStats]:
+        """Snapshot of per-endpoint connection reuse statistics"""
+        with self._stats_lock:
+            return {
+                key: EndpointStats(s.requests, s.new_connections, s.total_elapsed)
+                for key, s in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats.clear()
+
+
+_sessions: Dict[str, PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str, config: Optional[SessionConfig] = None) -> PooledSession:
+    """Get the shared session for a server, creating it on first use
+
+    Every API client constructed with the same base URL shares one session,
+    and therefore one connection pool. A config is only applied when the
+    session is first created.
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = PooledSession(config)
+            _sessions[base_url] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close every shared session and its pooled connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
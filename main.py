@@ -6,6 +6,8 @@ from ui.actions_manager import create_actions
 from ui.toolbar_manager import create_toolbar
 from widgets.main_window import NoteApp
 from app_config import apply_dark_theme, apply_light_theme
+from api.async_client import close_async_clients
+from api.session import close_sessions
 
 app = typer.Typer(pretty_exceptions_enable=False)
 
@@ -21,6 +23,16 @@ def main(
         "-t",
         help="Theme to use (e.g. 'dark_teal.xml', 'light_blue.xml')",
     ),
+    lazy_content: bool = typer.Option(
+        False,
+        "--lazy-content",
+        help="Load the notes tree without content and fetch notes when opened",
+    ),
+    no_snapshot: bool = typer.Option(
+        False,
+        "--no-snapshot",
+        help="Don't show or keep the local snapshot of the notes at startup",
+    ),
 ):
     """
     Launch the Notes application with specified configuration.
@@ -31,7 +43,12 @@ def main(
     actions = create_actions()
 
     # Create window with actions and API URL
-    window = NoteApp(actions, api_url=api_url)
+    window = NoteApp(
+        actions,
+        api_url=api_url,
+        lazy_content=lazy_content,
+        use_snapshot=not no_snapshot,
+    )
 
     # Allow C-c to kill app
     signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -53,7 +70,17 @@ def main(
     window.addToolBar(toolbar)
 
     window.show()
-    sys.exit(qt_app.exec())
+    exit_code = qt_app.exec()
+
+    # Write any pending snapshot, let in-flight background requests finish
+    # and the mutation journal reach the disk, then release pooled
+    # connections
+    window.notes_model.flush_snapshot()
+    window.notes_model.executor.shutdown()
+    window.notes_model.journal.close()
+    close_sessions()
+    close_async_clients()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
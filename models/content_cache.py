@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Optional, Set
+
+
+class ContentCache:
+    """Bounded LRU cache of note content, keyed by note ID
+
+    Evicts the least recently used notes once either the number of entries
+    or the total number of characters held exceeds its limit. Pinned notes,
+    e.g. with edits the server hasn't got yet, are never evicted.
+    """
+
+    def __init__(self, max_entries: int = 256, max_chars: int = 8_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[int, str]" = OrderedDict()
+        self._chars = 0
+        self._pinned: Set[int] = set()
+
+    def get(self, note_id: int) -> Optional[str]:
+        """Get a note's content and mark it as recently used"""
+        content = self._entries.get(note_id)
+        if content is not None:
+            self._entries.move_to_end(note_id)
+        return content
+
+    def put(self, note_id: int, content: str) -> None:
+        self.invalidate(note_id)
+        self._entries[note_id] = content
+        self._chars += len(content)
+        self._evict()
+
+    def invalidate(self, note_id: int) -> None:
+        content = self._entries.pop(note_id, None)
+        if content is not None:
+            self._chars -= len(content)
+
+    def pin(self, note_id: int) -> None:
+        """Keep a note's content until it is unpinned"""
+        self._pinned.add(note_id)
+
+    def unpin(self, note_id: int) -> None:
+        if note_id in self._pinned:
+            self._pinned.discard(note_id)
+            self._evict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._chars = 0
+
+    def __contains__(self, note_id: int) -> bool:
+        return note_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        if not self._over_limit():
+            return
+        # Least recently used first, always keeping the newest entry even if
+        # it alone exceeds max_chars
+        for note_id in list(self._entries)[:-1]:
+            if note_id not in self._pinned:
+                self._chars -= len(self._entries.pop(note_id))
+                if not self._over_limit():
+                    return
+
+    def _over_limit(self) -> bool:
+        return len(self._entries) > self.max_entries or self._chars > self.max_chars
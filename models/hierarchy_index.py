@@ -0,0 +1,125 @@
+from typing import Dict, Iterable, List, Optional
+from models.note import Note
+
+
+class HierarchyIndex:
+    """Parent map, depths and Euler-tour intervals for a note hierarchy
+
+    The parent map is kept up to date on every change, so ancestor and
+    "is X under Y" queries always work by walking parents in O(depth).
+    Depths and Euler-tour intervals are recomputed lazily after structural
+    changes; while they are current, containment checks are O(1) and a
+    note's descendants are a contiguous slice of the tour.
+    """
+
+    def __init__(self):
+        self._parent: Dict[int, Optional[int]] = {}
+        self._depth: Dict[int, int] = {}
+        # Position of each note in the tour and end of its subtree (exclusive)
+        self._enter: Dict[int, int] = {}
+        self._exit: Dict[int, int] = {}
+        self._order: List[int] = []
+        self._roots: List[Note] = []
+        self._dirty = True
+
+    def rebuild(self, root_notes: List[Note]) -> None:
+        """Index a hierarchy from its root notes"""
+        self._roots = root_notes
+        self._parent.clear()
+        stack = [(note, None) for note in reversed(root_notes)]
+        while stack:
+            note, parent_id = stack.pop()
+            self._parent[note.id] = parent_id
+            stack.extend((child, note.id) for child in reversed(note.children))
+        self._dirty = True
+
+    def add(self, note_id: int, parent_id: Optional[int]) -> None:
+        self._parent[note_id] = parent_id
+        self._dirty = True
+
+    def move(self, note_id: int, new_parent_id: Optional[int]) -> None:
+        self._parent[note_id] = new_parent_id
+        self._dirty = True
+
+    def remove(self, note_ids: Iterable[int]) -> None:
+        for note_id in note_ids:
+            self._parent.pop(note_id, None)
+        self._dirty = True
+
+    def __contains__(self, note_id: int) -> bool:
+        return note_id in self._parent
+
+    def parent_of(self, note_id: int) -> Optional[int]:
+        return self._parent.get(note_id)
+
+    def ancestors(self, note_id: int) -> List[int]:
+        """Ancestor IDs, nearest first"""
+        ancestors = []
+        current = self._parent.get(note_id)
+        while current is not None:
+            ancestors.append(current)
+            if len(ancestors) > len(self._parent):
+                raise ValueError(f"Cycle in note hierarchy above note {note_id}")
+            current = self._parent.get(current)
+        return ancestors
+
+    def path(self, note_id: int) -> List[int]:
+        """IDs from the root down to and including the note"""
+        if note_id not in self._parent:
+            return []
+        return list(reversed(self.ancestors(note_id))) + [note_id]
+
+    def depth(self, note_id: int) -> int:
+        """Number of ancestors, 0 for root notes"""
+        self._ensure_tour()
+        depth = self._depth.get(note_id)
+        return depth if depth is not None else len(self.ancestors(note_id))
+
+    def is_descendant(self, note_id: int, ancestor_id: int) -> bool:
+        """Whether note_id sits somewhere below ancestor_id"""
+        if note_id == ancestor_id:
+            return False
+        if not self._dirty and note_id in self._enter and ancestor_id in self._enter:
+            return (
+                self._enter[ancestor_id]
+                < self._enter[note_id]
+                < self._exit[ancestor_id]
+            )
+        return ancestor_id in self.ancestors(note_id)
+
+    def descendants(self, note_id: int) -> List[int]:
+        """Descendant IDs in depth-first order"""
+        self._ensure_tour()
+        if note_id not in self._enter:
+            return []
+        return self._order[self._enter[note_id] + 1 : self._exit[note_id]]
+
+    def _ensure_tour(self) -> None:
+        if not self._dirty:
+            return
+
+        self._depth.clear()
+        self._enter.clear()
+        self._exit.clear()
+        self._order = []
+        # Iterative depth-first walk, a None marker closes a subtree
+        stack: List[Optional[Note]] = []
+        depth_stack: List[int] = []
+        for root in reversed(self._roots):
+            stack.append(root)
+        depth = 0
+        while stack:
+            note = stack.pop()
+            if note is None:
+                closed = depth_stack.pop()
+                self._exit[closed] = len(self._order)
+                depth -= 1
+                continue
+            self._depth[note.id] = depth
+            self._enter[note.id] = len(self._order)
+            self._order.append(note.id)
+            depth_stack.append(note.id)
+            depth += 1
+            stack.append(None)
+            stack.extend(reversed(note.children))
+        self._dirty = False
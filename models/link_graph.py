@@ -0,0 +1,126 @@
+import re
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Links written as [[note_id]] in note content
+WIKILINK_PATTERN = re.compile(r"\[\[(\d+)\]\]")
+
+# Markdown links to a note through the note: scheme, e.g. [text](note:12)
+# or [text](note:/12). Images and plain relative links such as [x](2024)
+# are not links to notes
+MARKDOWN_LINK_PATTERN = re.compile(
+    r"(?<!!)\[[^\]]*\]\(\s*<?note:/*(\d+)/?>?(?:\s+(?:\"[^\"]*\"|'[^']*'))?\s*\)"
+)
+
+# Both in one pass, exactly one group matches
+LINK_PATTERN = re.compile(f"{WIKILINK_PATTERN.pattern}|{MARKDOWN_LINK_PATTERN.pattern}")
+
+
+def extract_link_targets(content: str) -> List[int]:
+    """IDs of the notes a note's content links to, in order of first use"""
+    return list(
+        dict.fromkeys(
+            int(wikilink or markdown_link)
+            for wikilink, markdown_link in LINK_PATTERN.findall(content)
+        )
+    )
+
+
+class LinkGraph:
+    """Forward and reverse links between notes
+
+    Each note's outgoing and incoming links are kept as compact integer
+    arrays, in the order the server listed the edges. The graph is loaded
+    once from the server's edge list and then patched per note when a
+    note's links change.
+    """
+
+    def __init__(self):
+        self._forward: Dict[int, array] = {}
+        self._reverse: Dict[int, array] = {}
+        self.loaded = False
+
+    def rebuild(self, edges: Iterable[Tuple[int, int]]) -> None:
+        """Replace the graph with (source, target) edges"""
+        self._forward = {}
+        self._reverse = {}
+        seen: Set[Tuple[int, int]] = set()
+        for edge in edges:
+            if edge in seen:
+                continue
+            seen.add(edge)
+            source, target = edge
+            self._forward.setdefault(source, array("q")).append(target)
+            self._reverse.setdefault(target, array("q")).append(source)
+        self.loaded = True
+
+    def edges(self) -> List[Tuple[int, int]]:
+        """Every (source, target) edge"""
+        return [
+            (source, target)
+            for source, targets in self._forward.items()
+            for target in targets
+        ]
+
+    def forward_links(self, note_id: int) -> List[int]:
+        """IDs of the notes this note links to"""
+        return self._forward.get(note_id, array("q")).tolist()
+
+    def backlinks(self, note_id: int) -> List[int]:
+        """IDs of the notes linking to this note"""
+        return self._reverse.get(note_id, array("q")).tolist()
+
+    def set_forward_links(
+        self, note_id: int, targets: Iterable[int]
+    ) -> Tuple[Set[int], Set[int]]:
+        """Replace a note's outgoing links
+
+        Returns:
+            The target IDs that were added and removed
+        """
+        new_targets = list(dict.fromkeys(targets))
+        old_targets = self._forward.get(note_id, array("q"))
+        added = set(new_targets).difference(old_targets)
+        removed = set(old_targets).difference(new_targets)
+
+        if new_targets:
+            self._forward[note_id] = array("q", new_targets)
+        else:
+            self._forward.pop(note_id, None)
+        for target in removed:
+            sources = array("q", (s for s in self._reverse[target] if s != note_id))
+            if sources:
+                self._reverse[target] = sources
+            else:
+                del self._reverse[target]
+        for target in added:
+            self._reverse.setdefault(target, array("q")).append(note_id)
+        return added, removed
+
+    def remove_note(self, note_id: int) -> Set[int]:
+        """Drop every link from and to a note
+
+        Returns:
+            The IDs of the other notes it linked to or was linked from
+        """
+        targets = self._forward.pop(note_id, array("q"))
+        sources = self._reverse.pop(note_id, array("q"))
+        for target in targets:
+            if target in self._reverse:
+                remaining = array(
+                    "q", (s for s in self._reverse[target] if s != note_id)
+                )
+                if remaining:
+                    self._reverse[target] = remaining
+                else:
+                    del self._reverse[target]
+        for source in sources:
+            if source in self._forward:
+                remaining = array(
+                    "q", (t for t in self._forward[source] if t != note_id)
+                )
+                if remaining:
+                    self._forward[source] = remaining
+                else:
+                    del self._forward[source]
+        return set(targets).union(sources) - {note_id}
@@ -0,0 +1,358 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from dataclasses import asdict, dataclass, fields
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+from PySide6.QtCore import QObject, QTimer, Signal
+from api.client import (
+    BatchUpdateNotesRequest,
+    BatchUpdateNotesResponse,
+    NoteAPI,
+    UpdateNoteRequest,
+)
+from models.request_executor import Lane, RequestExecutor
+
+JOURNAL_DIR = Path.home() / ".config" / "draftsmith_qt"
+
+# Retry delays grow from the first to the maximum, doubling on each failure
+RETRY_INITIAL_MS = 1000
+RETRY_MAX_MS = 60_000
+
+
+class MutationKind(str, Enum):
+    UPDATE_NOTE = "update_note"
+    ATTACH_NOTE = "attach_note"
+    DETACH_NOTE = "detach_note"
+    DELETE_NOTE = "delete_note"
+
+
+@dataclass
+class Mutation:
+    """One change waiting to be sent to the server"""
+
+    seq: int
+    kind: MutationKind
+    note_id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    parent_id: Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps({**asdict(self), "kind": self.kind.value})
+
+    @classmethod
+    def from_json(cls, line: str) -> "Mutation":
+        data = json.loads(line)
+        known = {f.name for f in fields(cls)}
+        data = {k: v for k, v in data.items() if k in known}
+        data["kind"] = MutationKind(data["kind"])
+        return cls(**data)
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status in (408, 429)
+    # Connection errors and timeouts
+    return isinstance(error, requests.RequestException)
+
+
+class _JournalWriter:
+    """Writes the journal file on its own thread, in the order asked
+
+    Appends and rewrites queue up while a write is under way and are then
+    written together, with a single fsync.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # ("append" | "rewrite", mutations), None to stop
+        self._requests: "queue.Queue[Optional[Tuple[str, List[Mutation]]]]" = (
+            queue.Queue()
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="mutation-journal", daemon=True
+        )
+        self._thread.start()
+
+    def append(self, mutation: Mutation) -> None:
+        self._requests.put(("append", [mutation]))
+
+    def rewrite(self, mutations: List[Mutation]) -> None:
+        """Replace the file with these mutations"""
+        self._requests.put(("rewrite", list(mutations)))
+
+    def close(self, timeout: float) -> None:
+        """Finish the queued writes and stop the thread"""
+        self._requests.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._requests.get()]
+            while True:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = batch[: batch.index(None)] if stop else batch
+
+            # Only the last rewrite and the appends after it still matter
+            rewrite: Optional[List[Mutation]] = None
+            appended: List[Mutation] = []
+            for kind, mutations in batch:
+                if kind == "rewrite":
+                    rewrite, appended = mutations, []
+                else:
+                    appended.extend(mutations)
+            try:
+                if rewrite is not None:
+                    self._rewrite_file(rewrite + appended)
+                elif appended:
+                    self._append_to_file(appended)
+            except OSError as e:
+                print(f"Error writing mutation journal: {e}")
+            if stop:
+                return
+
+    def _append_to_file(self, mutations: List[Mutation]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(m.to_json() + "\n" for m in mutations)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_file(self, mutations: List[Mutation]) -> None:
+        """Atomically replace the file"""
+        if not mutations:
+            self.path.unlink(missing_ok=True)
+            return
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(m.to_json() + "\n" for m in mutations)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+class MutationJournal(QObject):
+    """Ordered, durable queue of note mutations flushed in the background
+
+    Mutations are appended to a JSON lines file before anything is sent, so
+    they survive a crash or a server outage and are resent on the next
+    start. They reach the server in the order they were made, one request
+    at a time on the write lane. Consecutive note updates are coalesced per
+    note into a single batch_update_notes request. Requests that fail
+    because the server is unreachable are retried with exponential
+    backoff; requests the server rejects are dropped and reported.
+
+    The file is written on a dedicated thread, so neither appending nor
+    acknowledging a mutation waits for the disk on the GUI thread.
+    """
+
+    # Mutations and the server's response (an APINote list for updates)
+    applied = Signal(object, object)
+    # Mutations the server refused, and the error
+    rejected = Signal(object, object)
+    # Number of mutations not yet acknowledged by the server
+    pending_changed = Signal(int)
+
+    def __init__(
+        self,
+        note_api: NoteAPI,
+        executor: RequestExecutor,
+        path: Optional[Path] = None,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.note_api = note_api
+        self.executor = executor
+        self.path = path
+        self._queue: List[Mutation] = []
+        self._callbacks: Dict[int, Callable[[bool], None]] = {}
+        self._in_flight: List[Mutation] = []
+        self._retry_delay_ms = RETRY_INITIAL_MS
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.flush)
+        self._load()
+        self._next_seq = max((m.seq for m in self._queue), default=0) + 1
+        self._writer = _JournalWriter(path) if path is not None else None
+
+    @staticmethod
+    def path_for_server(api_url: str) -> Path:
+        """Journal location for a server URL, each server gets its own file"""
+        digest = hashlib.sha1(api_url.encode()).hexdigest()[:12]
+        return JOURNAL_DIR / f"journal-{digest}.jsonl"
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def append(
+        self,
+        kind: MutationKind,
+        note_id: int,
+        on_done: Optional[Callable[[bool], None]] = None,
+        **values: Any,
+    ) -> Mutation:
+        """Record a mutation and schedule it to be sent"""
+        mutation = Mutation(seq=self._next_seq, kind=kind, note_id=note_id, **values)
+        self._next_seq += 1
+        self._queue.append(mutation)
+        if on_done is not None:
+            self._callbacks[mutation.seq] = on_done
+        if self._writer is not None:
+            self._writer.append(mutation)
+        self.pending_changed.emit(len(self._queue))
+        QTimer.singleShot(0, self.flush)
+        return mutation
+
+    def pending_updates(self) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+        """Latest unsent (title, content) per note, None where unchanged"""
+        updates: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        for mutation in self._queue:
+            if mutation.kind == MutationKind.UPDATE_NOTE:
+                title, content = updates.get(mutation.note_id, (None, None))
+                updates[mutation.note_id] = (
+                    mutation.title if mutation.title is not None else title,
+                    mutation.content if mutation.content is not None else content,
+                )
+        return updates
+
+    def has_pending_update(self, note_id: int) -> bool:
+        return any(
+            m.kind == MutationKind.UPDATE_NOTE and m.note_id == note_id
+            for m in self._queue
+        )
+
+    def flush(self) -> None:
+        """Send the next request, unless one is in flight or a retry is due"""
+        if self._in_flight or self._retry_timer.isActive() or not self._queue:
+            return
+
+        head = self._queue[0]
+        if head.kind == MutationKind.UPDATE_NOTE:
+            batch = []
+            for mutation in self._queue:
+                if mutation.kind != MutationKind.UPDATE_NOTE:
+                    break
+                batch.append(mutation)
+            self._in_flight = batch
+            fn, args = self._send_updates, (self._coalesce(batch),)
+        else:
+            self._in_flight = [head]
+            fn, args = self._send, (head,)
+
+        self.executor.submit(
+            fn,
+            *args,
+            lane=Lane.WRITE,
+            on_result=self._on_sent,
+            on_error=self._on_send_failed,
+        )
+
+    @staticmethod
+    def _coalesce(batch: List[Mutation]) -> List[Tuple[int, UpdateNoteRequest]]:
+        """Merge updates per note, later values win"""
+        merged: Dict[int, UpdateNoteRequest] = {}
+        for mutation in batch:
+            request = merged.setdefault(mutation.note_id, UpdateNoteRequest())
+            if mutation.title is not None:
+                request.title = mutation.title
+            if mutation.content is not None:
+                request.content = mutation.content
+        return list(merged.items())
+
+    def _send_updates(
+        self, updates: List[Tuple[int, UpdateNoteRequest]]
+    ) -> BatchUpdateNotesResponse:
+        return self.note_api.batch_update_notes(
+            BatchUpdateNotesRequest(updates=updates)
+        )
+
+    def _send(self, mutation: Mutation) -> Any:
+        note_id = mutation.note_id
+        match mutation.kind:
+            case MutationKind.ATTACH_NOTE:
+                return self.note_api.attach_note_to_parent(note_id, mutation.parent_id)
+            case MutationKind.DETACH_NOTE:
+                return self.note_api.detach_note_from_parent(note_id)
+            case MutationKind.DELETE_NOTE:
+                return self.note_api.delete_note(note_id)
+        raise ValueError(f"Unknown mutation: {mutation.kind}")
+
+    def _on_sent(self, result: Any) -> None:
+        sent, self._in_flight = self._in_flight, []
+        self._retry_delay_ms = RETRY_INITIAL_MS
+
+        failed_ids = set()
+        if isinstance(result, BatchUpdateNotesResponse):
+            failed_ids = set(result.failed)
+            result = result.updated
+        accepted = [m for m in sent if m.note_id not in failed_ids]
+        refused = [m for m in sent if m.note_id in failed_ids]
+
+        self._finish(sent, accepted)
+        if accepted:
+            self.applied.emit(accepted, result)
+        if refused:
+            print(f"Server refused updates to notes {sorted(failed_ids)}")
+            self.rejected.emit(refused, None)
+        self.flush()
+
+    def _on_send_failed(self, error: Exception) -> None:
+        sent, self._in_flight = self._in_flight, []
+        if is_transient(error):
+            # Keep the mutations queued and try again later
+            print(f"Server unreachable, retrying in {self._retry_delay_ms} ms: {error}")
+            self._retry_timer.start(self._retry_delay_ms)
+            self._retry_delay_ms = min(self._retry_delay_ms * 2, RETRY_MAX_MS)
+            return
+
+        print(
+            f"Server rejected {sent[0].kind.value} of note {sent[0].note_id}: {error}"
+        )
+        self._finish(sent, [])
+        self.rejected.emit(sent, error)
+        self.flush()
+
+    def _finish(self, sent: List[Mutation], accepted: List[Mutation]) -> None:
+        """Drop sent mutations from the queue and the file, report outcomes"""
+        sent_seqs = {m.seq for m in sent}
+        self._queue = [m for m in self._queue if m.seq not in sent_seqs]
+        if self._writer is not None:
+            self._writer.rewrite(self._queue)
+        self.pending_changed.emit(len(self._queue))
+
+        accepted_seqs = {m.seq for m in accepted}
+        for mutation in sent:
+            callback = self._callbacks.pop(mutation.seq, None)
+            if callback is not None:
+                callback(mutation.seq in accepted_seqs)
+
+    def close(self, timeout: float = 3.0) -> None:
+        """Wait for queued journal writes to reach the disk"""
+        if self._writer is not None:
+            self._writer.close(timeout)
+            self._writer = None
+
+    # Persistence
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._queue.append(Mutation.from_json(line))
+        except (OSError, ValueError, TypeError) as e:
+            # A torn last line from a crash mid-append, keep what was read
+            print(f"Error reading mutation journal: {e}")
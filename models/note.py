@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Set
+from typing import List, Mapping, Optional, Set
 from api.client import Note as APINote, TreeNote as APITreeNote, Tag as APITag
 
 
@@ -8,7 +8,7 @@ from api.client import Note as APINote, TreeNote as APITreeNote, Tag as APITag
 class Note:
     id: int
     title: str
-    content: str
+    content: Optional[str]  # None when loaded from a content-less tree
     created_at: datetime
     modified_at: datetime
 
@@ -36,8 +36,13 @@ class Note:
         )
 
     @classmethod
-    def from_api_tree_note(cls, api_tree_note: APITreeNote) -> "Note":
-        """Create a Note instance from an API TreeNote response without processing children"""
+    def from_api_tree_note(
+        cls, api_tree_note: APITreeNote, with_content: bool = True
+    ) -> "Note":
+        """Create a Note instance from an API TreeNote response without processing children
+
+        With with_content=False the content is left unloaded (None).
+        """
         # Handle optional datetime fields with a default value
         created_at_val = (
             datetime.now()
@@ -53,7 +58,7 @@ class Note:
         return cls(
             id=api_tree_note.id,
             title=api_tree_note.title,
-            content=api_tree_note.content or "",
+            content=(api_tree_note.content or "") if with_content else None,
             created_at=created_at_val,
             modified_at=modified_at_val,
             hierarchy_type=api_tree_note.hierarchy_type,
@@ -104,21 +109,27 @@ class Note:
         """Remove a forward link from this note"""
         self.forward_links.discard(note_id)
 
-    def get_all_ancestors(self) -> List[int]:
-        """Get all ancestor note IDs in the hierarchy"""
+    def get_all_ancestors(self, notes: Mapping[int, "Note"]) -> List[int]:
+        """Get all ancestor note IDs in the hierarchy, nearest first
+
+        Args:
+            notes: Lookup of every loaded note by ID, e.g. NotesModel.notes
+        """
         ancestors = []
         current = self
-        while current.parent_id is not None:
+        while current.parent_id is not None and current.parent_id not in ancestors:
             ancestors.append(current.parent_id)
-            # Note: This requires the parent note to be accessible
-            # may modify this based on how we maintain the note hierarchy
-            # TODO consider using API breadcrumbs
+            current = notes.get(current.parent_id)
+            if current is None:
+                break
         return ancestors
 
     def get_all_descendants(self) -> List[int]:
-        """Get all descendant note IDs in the hierarchy"""
+        """Get all descendant note IDs in the hierarchy, depth first"""
         descendants = []
-        for child in self.children:
+        stack = list(reversed(self.children))
+        while stack:
+            child = stack.pop()
             descendants.append(child.id)
-            descendants.extend(child.get_all_descendants())
+            stack.extend(reversed(child.children))
         return descendants
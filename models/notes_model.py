@@ -1,15 +1,41 @@
-from typing import Optional, List, Dict, Set
+import threading
+from typing import Any, Callable, Optional, List, Dict, Set, Tuple
+import requests
 from api.client import (
     NoteAPI,
     TagAPI,
     Note as APINote,
     TreeNote as APITreeNote,
-    UpdateNoteRequest,
     Tag,
+    NoteTagRelation,
+    NoteWithoutContent,
+    LinkEdge,
 )
+from api.async_client import NoteSyncDelta, fetch_note_selection, fetch_note_sync_delta
+from models.content_cache import ContentCache
+from models.hierarchy_index import HierarchyIndex
+from models.link_graph import LinkGraph, extract_link_targets
+from models.mutation_journal import Mutation, MutationJournal, MutationKind
+from models.notes_snapshot import NoteRow, NotesSnapshot, SnapshotData, SnapshotRows
 from models.note import Note
+from models.request_executor import Lane, RequestExecutor
+from models.tag_index import TagIndex
 from datetime import datetime
-from PySide6.QtCore import QObject, Signal
+from pathlib import Path
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# Quiet period after the last change before the snapshot is written
+SNAPSHOT_DELAY_MS = 2000
+
+# Seconds to wait for a running snapshot write before quitting
+SNAPSHOT_FLUSH_TIMEOUT = 5.0
+
+
+def _is_newer(a: datetime, b: datetime) -> bool:
+    try:
+        return a > b
+    except TypeError:  # Naive and aware timestamps
+        return False
 
 
 class NotesModel(QObject):
@@ -22,43 +48,497 @@ class NotesModel(QObject):
     )  # Emitted when a note is selected with NoteSelectionData
     note_deleted = Signal(int)  # Add this new signal - emits deleted note's ID
 
-    def __init__(self, api_url: str):
+    # Fine-grained changes, emitted after the local model has been patched
+    note_added = Signal(int)  # note_id
+    note_changed = Signal(int)  # note_id, title/content/metadata changed
+    note_moved = Signal(int, object, object)  # note_id, old parent, new parent
+    note_removed = Signal(int)  # note_id
+
+    tags_updated = Signal()  # Tags and note-tag relations were (re)loaded
+
+    links_updated = Signal()  # The link graph was (re)loaded
+    note_links_changed = Signal(int)  # note_id, its forward links or backlinks changed
+
+    def __init__(
+        self,
+        api_url: str,
+        lazy_content: bool = False,
+        content_cache: Optional[ContentCache] = None,
+        snapshot: Optional[NotesSnapshot] = None,
+        journal_path: Optional[Path] = None,
+    ):
         super().__init__()
+        self.api_url = api_url
         self.note_api: NoteAPI = NoteAPI(api_url)
         self.tag_api: TagAPI = TagAPI(api_url)
         self.notes: Dict[int, Note] = {}  # id -> Note mapping
         self.root_notes: List[Note] = []  # Top-level notes
+        # Parent/ancestor lookups without walking the tree or calling the API
+        self.hierarchy = HierarchyIndex()
+        # Full "/"-separated paths, invalidated when a note or an ancestor
+        # is renamed or moved
+        self._path_cache: Dict[int, str] = {}
+        # With lazy_content the tree holds titles and hierarchy only, content
+        # is fetched when a note is opened and kept in a bounded cache
+        self.lazy_content = lazy_content
+        self.content_cache = content_cache or ContentCache()
+        # Tags and note-tag relations, loaded once and patched locally
+        self.tag_index = TagIndex()
+        # Links between notes, loaded once and patched when content changes
+        self.link_graph = LinkGraph()
+        # Runs API calls off the GUI thread
+        self.executor = RequestExecutor(self)
+        # Writes are applied locally at once and sent from here in order
+        self.journal = MutationJournal(
+            self.note_api, self.executor, path=journal_path, parent=self
+        )
+        self.journal.applied.connect(self._on_mutations_applied)
+        self.journal.rejected.connect(self._on_mutations_rejected)
+
+        # On-disk copy of the notes, shown at startup before the server replies
+        self.snapshot = snapshot
+        self._snapshot_timer = QTimer(self)
+        self._snapshot_timer.setSingleShot(True)
+        self._snapshot_timer.setInterval(SNAPSHOT_DELAY_MS)
+        self._snapshot_timer.timeout.connect(self.save_snapshot)
+        # Notes whose rows changed since the last write, and whether the
+        # hierarchy, tags or link graph changed so everything is rewritten
+        self._snapshot_dirty: Set[int] = set()
+        self._snapshot_full = False
+        # Cleared while a snapshot write is running
+        self._snapshot_idle = threading.Event()
+        self._snapshot_idle.set()
+        if snapshot is not None:
+            for signal in (
+                self.notes_updated,
+                self.note_added,
+                self.note_moved,
+                self.note_removed,
+                self.tags_updated,
+                self.links_updated,
+            ):
+                signal.connect(self._schedule_full_snapshot)
+            self.note_changed.connect(self._schedule_note_snapshot)
 
     def refresh_notes(self) -> None:
-        """Refresh notes from the server"""
-        try:
-            # Get the tree structure of notes
-            tree_notes = self.note_api.get_notes_tree()
+        """Refresh notes from the server in the background
+
+        The first load downloads the whole tree. Later refreshes only
+        compare metadata and download the notes that changed.
+        """
+        if not self.notes:
+            self.executor.submit(
+                self.note_api.get_notes_tree,
+                exclude_content=self.lazy_content,
+                key="refresh_notes",
+                lane=Lane.BACKGROUND,
+                on_result=self._apply_notes_tree,
+                on_error=lambda e: print(f"Error refreshing notes: {e}"),
+            )
+        else:
+            # Notes without content, e.g. from a snapshot taken in lazy mode,
+            # count as changed so their content is downloaded
+            local_modified = {
+                note_id: note.modified_at
+                for note_id, note in self.notes.items()
+                if self.lazy_content or note.content is not None
+            }
+            self.executor.submit(
+                fetch_note_sync_delta,
+                self.api_url,
+                local_modified,
+                include_content=not self.lazy_content,
+                key="refresh_notes",
+                lane=Lane.BACKGROUND,
+                on_result=self._apply_sync_delta,
+                on_error=lambda e: print(f"Error syncing notes: {e}"),
+            )
+        self.refresh_tags()
+        self.refresh_links()
 
-            # Clear existing data
-            self.notes.clear()
-            self.root_notes.clear()
+    def refresh_links(self) -> None:
+        """Reload the link graph in the background"""
+        self.executor.submit(
+            self.note_api.get_link_edge_list,
+            key="refresh_links",
+            lane=Lane.BACKGROUND,
+            on_result=self._apply_link_edges,
+            on_error=lambda e: print(f"Error refreshing links: {e}"),
+        )
 
-            # Process the tree notes
-            for tree_note in tree_notes:
-                self._process_tree_note(tree_note)
+    def _apply_link_edges(self, edges: List[LinkEdge]) -> None:
+        self.link_graph.rebuild((edge.from_, edge.to) for edge in edges)
+        for note in self.notes.values():
+            self._fill_links(note)
+        self.links_updated.emit()
 
-            # Emit single update signal after all processing is complete
-            self.notes_updated.emit()
+    def _fill_links(self, note: Note) -> None:
+        """Copy a note's links from the graph onto the Note"""
+        note.forward_links = set(self.link_graph.forward_links(note.id))
+        note.backlinks = set(self.link_graph.backlinks(note.id))
 
-        except Exception as e:
-            print(f"Error refreshing notes: {e}")
+    def _update_links_from_content(self, note_id: int, content: str) -> None:
+        """Patch the link graph from a note's new content"""
+        self._set_note_links(note_id, extract_link_targets(content))
+
+    def _set_note_links(self, note_id: int, targets: List[int]) -> None:
+        """Replace a note's outgoing links, touching only the edges that changed"""
+        if not self.link_graph.loaded:
+            return
+        added, removed = self.link_graph.set_forward_links(note_id, targets)
+        if not added and not removed:
+            return
+
+        note = self.notes.get(note_id)
+        if note:
+            note.forward_links = set(self.link_graph.forward_links(note_id))
+        for target_id in added:
+            if target_id in self.notes:
+                self.notes[target_id].add_backlink(note_id)
+        for target_id in removed:
+            if target_id in self.notes:
+                self.notes[target_id].remove_backlink(note_id)
+
+        self.note_links_changed.emit(note_id)
+        for target_id in added | removed:
+            self.note_links_changed.emit(target_id)
+
+    def refresh_tags(self) -> None:
+        """Reload tags and note-tag relations in the background"""
+        self.executor.submit(
+            self._fetch_tags,
+            key="refresh_tags",
+            lane=Lane.BACKGROUND,
+            on_result=self._apply_tags,
+            on_error=lambda e: print(f"Error refreshing tags: {e}"),
+        )
+
+    def _fetch_tags(self) -> Tuple[List[Tag], List[NoteTagRelation]]:
+        return self.tag_api.get_all_tags(), self.tag_api.get_note_tag_relations()
+
+    def _apply_tags(self, data: Tuple[List[Tag], List[NoteTagRelation]]) -> None:
+        tags, relations = data
+        self.tag_index.rebuild(tags, relations)
+        for note in self.notes.values():
+            note.tags = self.tag_index.tag_ids_for_note(note.id)
+        self.tags_updated.emit()
+
+    def _apply_notes_tree(self, tree_notes: List[APITreeNote]) -> None:
+        """Rebuild the model from a fetched notes tree"""
+        previous_modified = {
+            note_id: note.modified_at for note_id, note in self.notes.items()
+        }
+
+        # Clear existing data
+        self.notes.clear()
+        self.root_notes.clear()
+
+        # Process the tree notes
+        for tree_note in tree_notes:
+            self._process_tree_note(tree_note)
+        self.hierarchy.rebuild(self.root_notes)
+        self._path_cache.clear()
+        if self.link_graph.loaded:
+            for note in self.notes.values():
+                self._fill_links(note)
+
+        # Drop cached content of notes that changed or disappeared
+        for note_id, modified_at in previous_modified.items():
+            note = self.notes.get(note_id)
+            if note is None or note.modified_at != modified_at:
+                self.content_cache.invalidate(note_id)
+        self._reapply_pending_updates()
+
+        # Emit single update signal after all processing is complete
+        self.notes_updated.emit()
+
+    def _apply_sync_delta(self, delta: NoteSyncDelta) -> None:
+        """Bring the model up to date with what changed on the server
+
+        If the hierarchy is unchanged, changed notes are patched in place
+        and announced with note_changed. Otherwise the hierarchy is rebuilt
+        from the fetched relations, reusing the existing Note objects and
+        keeping the local order of siblings, and notes_updated is emitted.
+        """
+        metadata = {note.id: note for note in delta.metadata}
+        parents = {
+            relation.child_id: relation.parent_id
+            for relation in delta.hierarchy
+            if relation.child_id in metadata and relation.parent_id in metadata
+        }
+
+        changed = []
+        for note_id in delta.changed_ids:
+            note = self.notes.get(note_id)
+            remote = metadata[note_id]
+            if note is None:
+                continue
+            if _is_newer(note.modified_at, remote.modified_at):
+                continue  # A local save landed after the metadata was read
+            if note.title != remote.title:
+                self._invalidate_paths(note)
+            note.title = remote.title
+            note.modified_at = remote.modified_at
+            api_note = delta.changed_notes.get(note_id)
+            note.content = api_note.content if api_note else None
+            self.content_cache.invalidate(note_id)
+            self._unload_content(note)
+            if api_note:
+                self._update_links_from_content(note_id, api_note.content)
+            changed.append(note_id)
+
+        structure_changed = metadata.keys() != self.notes.keys() or any(
+            parents.get(note_id) != note.parent_id
+            for note_id, note in self.notes.items()
+        )
+        if not structure_changed:
+            self._reapply_pending_updates()
+            for note_id in changed:
+                self.note_changed.emit(note_id)
+            return
+
+        self._rebuild_hierarchy(metadata, parents, delta)
+        self._reapply_pending_updates()
+        self.notes_updated.emit()
+
+    def _rebuild_hierarchy(
+        self,
+        metadata: Dict[int, NoteWithoutContent],
+        parents: Dict[int, int],
+        delta: NoteSyncDelta,
+    ) -> None:
+        """Replace notes and hierarchy with the fetched ones"""
+        # Siblings keep their current order, new notes go last
+        old_order = {}
+        for siblings in [self.root_notes] + [n.children for n in self.notes.values()]:
+            for position, note in enumerate(siblings):
+                old_order[note.id] = position
+
+        for note_id in self.notes.keys() - metadata.keys():
+            self.content_cache.invalidate(note_id)
+            self.tag_index.remove_note(note_id)
+
+        notes = {}
+        for note_id, remote in metadata.items():
+            note = self.notes.get(note_id)
+            if note is None:
+                api_note = delta.changed_notes.get(note_id)
+                note = Note(
+                    id=note_id,
+                    title=remote.title,
+                    content=api_note.content if api_note else None,
+                    created_at=remote.created_at,
+                    modified_at=remote.modified_at,
+                    tags=self.tag_index.tag_ids_for_note(note_id),
+                )
+                self._unload_content(note)
+            note.children = []
+            note.parent_id = parents.get(note_id)
+            note.hierarchy_type = "block" if note.parent_id is not None else None
+            notes[note_id] = note
+
+        self.notes = notes
+        self.root_notes = []
+        for note_id in sorted(
+            notes, key=lambda i: (old_order.get(i, len(old_order)), i)
+        ):
+            note = notes[note_id]
+            if note.parent_id is None:
+                self.root_notes.append(note)
+            else:
+                notes[note.parent_id].children.append(note)
+
+        self.hierarchy.rebuild(self.root_notes)
+        self._path_cache.clear()
+        if self.link_graph.loaded:
+            for note in self.notes.values():
+                self._fill_links(note)
 
     def load_notes(self) -> None:
-        """Load all notes from the API"""
+        """Show the last snapshot straight away, then refresh from the API"""
+        if self.snapshot is not None and not self.notes:
+            data = self.snapshot.load()
+            if data is not None:
+                self._apply_snapshot(data)
         self.refresh_notes()
+        # Send anything left unsent by the last session
+        self.journal.flush()
+
+    def _apply_snapshot(self, data: SnapshotData) -> None:
+        """Replace the model with notes read from the snapshot"""
+        self.notes = data.notes
+        self.root_notes = data.root_notes
+        if self.lazy_content:
+            for note in self.notes.values():
+                note.content = None
+        self.hierarchy.rebuild(self.root_notes)
+        self._path_cache.clear()
+        if data.tags_loaded:
+            self.tag_index.rebuild(data.tags, data.note_tag_relations)
+        if data.link_edges is not None:
+            self.link_graph.rebuild(data.link_edges)
+            for note in self.notes.values():
+                self._fill_links(note)
+        self._reapply_pending_updates()
+
+        self.notes_updated.emit()
+        if data.tags_loaded:
+            self.tags_updated.emit()
+        if data.link_edges is not None:
+            self.links_updated.emit()
+        # Nothing new to write back
+        self._snapshot_timer.stop()
+        self._snapshot_full = False
+        self._snapshot_dirty.clear()
+
+    def _schedule_full_snapshot(self, *args) -> None:
+        self._snapshot_full = True
+        self._snapshot_timer.start()
+
+    def _schedule_note_snapshot(self, note_id: int) -> None:
+        self._snapshot_dirty.add(note_id)
+        self._snapshot_timer.start()
+
+    def _note_row(self, note: Note, position: int) -> NoteRow:
+        return (
+            note.id,
+            note.title,
+            note.content,
+            note.created_at.isoformat(),
+            note.modified_at.isoformat(),
+            note.parent_id,
+            position,
+            note.hierarchy_type,
+        )
+
+    def _snapshot_rows(self) -> SnapshotRows:
+        """Capture the model as plain rows that a worker thread can write"""
+        note_rows = []
+        sibling_lists = [self.root_notes] + [
+            note.children for note in self.notes.values() if note.children
+        ]
+        for siblings in sibling_lists:
+            for position, note in enumerate(siblings):
+                note_rows.append(self._note_row(note, position))
+
+        tags = None
+        if self.tag_index.loaded:
+            tags = [
+                (tag.id, tag.name, i)
+                for i, tag in enumerate(self.tag_index.tags.values())
+            ]
+        return SnapshotRows(
+            notes=note_rows,
+            tags=tags,
+            note_tags=[
+                (note.id, tag_id)
+                for note in self.notes.values()
+                for tag_id in note.tags
+            ],
+            links=self.link_graph.edges() if self.link_graph.loaded else None,
+        )
+
+    def _changed_note_rows(
+        self, note_ids: Set[int]
+    ) -> Tuple[List[NoteRow], Optional[List[Tuple[int, int]]]]:
+        """Rows and outgoing links of some notes, for updating the snapshot"""
+        rows = []
+        links: Optional[List[Tuple[int, int]]] = [] if self.link_graph.loaded else None
+        for note_id in note_ids:
+            note = self.notes.get(note_id)
+            if note is None:
+                continue
+            parent = self.notes.get(note.parent_id) if note.parent_id else None
+            siblings = parent.children if parent else self.root_notes
+            position = next(
+                (i for i, sibling in enumerate(siblings) if sibling is note), 0
+            )
+            rows.append(self._note_row(note, position))
+            if links is not None:
+                links.extend(
+                    (note_id, target)
+                    for target in self.link_graph.forward_links(note_id)
+                )
+        return rows, links
+
+    def _take_snapshot_changes(
+        self,
+    ) -> Optional[Tuple[List[NoteRow], Optional[List[Tuple[int, int]]]]]:
+        """What the next write has to cover, None if everything"""
+        full, self._snapshot_full = self._snapshot_full, False
+        dirty, self._snapshot_dirty = self._snapshot_dirty, set()
+        if full:
+            return None
+        return self._changed_note_rows(dirty)
+
+    def _run_snapshot_write(self, write: Callable[..., Any], *args) -> Any:
+        try:
+            return write(*args)
+        finally:
+            self._snapshot_idle.set()
+
+    def save_snapshot(self) -> None:
+        """Write the snapshot in the background
+
+        Only the rows of edited notes are rewritten, unless the hierarchy,
+        tags or links changed or there is no snapshot yet. Writes happen
+        one at a time, so an older write never lands after a newer one.
+        """
+        self._snapshot_timer.stop()
+        if self.snapshot is None or not self.notes:
+            return
+        if not self._snapshot_idle.is_set():
+            self._snapshot_timer.start()
+            return
+
+        changes = self._take_snapshot_changes()
+        if changes is None:
+            write, args = self.snapshot.write, (self._snapshot_rows(),)
+        else:
+            write, args = self.snapshot.update_notes, changes
+
+        def on_result(updated: Optional[bool]) -> None:
+            if updated is False:
+                # Nothing on disk to update yet
+                self._schedule_full_snapshot()
+
+        def on_error(e: Exception) -> None:
+            print(f"Error saving notes snapshot: {e}")
+            if changes is not None:
+                self._schedule_full_snapshot()
+
+        self._snapshot_idle.clear()
+        self.executor.submit(
+            self._run_snapshot_write,
+            write,
+            *args,
+            lane=Lane.BACKGROUND,
+            on_result=on_result,
+            on_error=on_error,
+        )
+
+    def flush_snapshot(self) -> None:
+        """Write a pending snapshot now, blocking, e.g. before quitting"""
+        if self.snapshot is None or not self._snapshot_timer.isActive():
+            return
+        self._snapshot_timer.stop()
+        # Let a write already under way finish first
+        self._snapshot_idle.wait(SNAPSHOT_FLUSH_TIMEOUT)
+        changes = self._take_snapshot_changes()
+        try:
+            if changes is None or not self.snapshot.update_notes(*changes):
+                self.snapshot.write(self._snapshot_rows())
+        except Exception as e:
+            print(f"Error saving notes snapshot: {e}")
 
     def _process_tree_note(
         self, api_tree_note: APITreeNote, parent: Optional[Note] = None
     ) -> Note:
         """Process a tree note and its children, maintaining the single source of truth"""
         # Create note without processing children
-        note = Note.from_api_tree_note(api_tree_note)
+        note = Note.from_api_tree_note(
+            api_tree_note, with_content=not self.lazy_content
+        )
 
         # Store in our lookup dictionary
         self.notes[note.id] = note
@@ -79,110 +559,424 @@ class NotesModel(QObject):
         """Get a note by its ID"""
         return self.notes.get(note_id)
 
+    def get_ancestors(self, note_id: int) -> List[Note]:
+        """Get a note's ancestors, nearest first"""
+        return [self.notes[i] for i in self.hierarchy.ancestors(note_id)]
+
+    def get_descendants(self, note_id: int) -> List[Note]:
+        """Get all notes below a note, depth first"""
+        return [self.notes[i] for i in self.hierarchy.descendants(note_id)]
+
+    def is_descendant(self, note_id: int, ancestor_id: int) -> bool:
+        """Check whether a note sits somewhere below another"""
+        return self.hierarchy.is_descendant(note_id, ancestor_id)
+
+    def get_breadcrumbs(self, note_id: int) -> List[Note]:
+        """Get the notes from the root down to and including this note"""
+        return [self.notes[i] for i in self.hierarchy.path(note_id)]
+
+    def get_note_path(self, note_id: int, separator: str = "/") -> str:
+        """Get a note's full path from its breadcrumb titles, e.g. "Journals/2024" """
+        if separator != "/":
+            return separator.join(note.title for note in self.get_breadcrumbs(note_id))
+
+        path = self._path_cache.get(note_id)
+        if path is not None:
+            return path
+
+        # Walk up to the nearest ancestor with a cached path, then fill in
+        # the cache on the way back down
+        uncached = []
+        current = note_id
+        while current is not None and current not in self._path_cache:
+            if current not in self.notes:
+                return ""
+            uncached.append(current)
+            current = self.hierarchy.parent_of(current)
+            if len(uncached) > len(self.notes):
+                return ""  # Cycle, should never happen
+
+        path = self._path_cache[current] if current is not None else None
+        for ancestor_id in reversed(uncached):
+            title = self.notes[ancestor_id].title
+            path = title if path is None else f"{path}/{title}"
+            self._path_cache[ancestor_id] = path
+        return path
+
+    def get_all_note_paths(self) -> Dict[int, str]:
+        """Get the full path of every note"""
+        return {note_id: self.get_note_path(note_id) for note_id in self.notes}
+
+    def _invalidate_paths(self, note: Note) -> None:
+        """Forget the cached paths of a note and everything below it"""
+        self._path_cache.pop(note.id, None)
+        for descendant_id in note.get_all_descendants():
+            self._path_cache.pop(descendant_id, None)
+
+    def _apply_api_note(self, note: Note, api_note: APINote) -> None:
+        """Update a local note from the server's copy"""
+        old_title = note.title
+        note.update_from_api_note(api_note)
+        self._unload_content(note)
+        if note.title != old_title:
+            self._invalidate_paths(note)
+
+    def get_note_content(self, note_id: int) -> Optional[str]:
+        """Get a note's content if it is loaded, None otherwise"""
+        note = self.notes.get(note_id)
+        if note is not None and note.content is not None:
+            return note.content
+        return self.content_cache.get(note_id)
+
+    def _unload_content(self, note: Note) -> None:
+        """In lazy mode, move a note's content from the tree into the cache"""
+        if self.lazy_content and note.content is not None:
+            self.content_cache.put(note.id, note.content)
+            note.content = None
+
+    def _notes_by_id(self, note_ids: List[int]) -> List[Note]:
+        return [self.notes[i] for i in note_ids if i in self.notes]
+
+    def _links_loaded(self) -> bool:
+        """Whether the link graph is loaded, loading it in the background if not"""
+        if not self.link_graph.loaded and not self.executor.is_pending("refresh_links"):
+            self.refresh_links()
+        return self.link_graph.loaded
+
     def get_forward_links(self, note_id: int) -> List[Note]:
-        """Get all notes that this note links to"""
-        try:
-            api_notes = self.note_api.get_note_forward_links(note_id)
-            return [Note.from_api_note(api_note) for api_note in api_notes]
-        except Exception as e:
-            print(f"Error getting forward links: {e}")
+        """Get all notes that this note links to
+
+        Until the link graph has been loaded this returns an empty list and
+        loads it in the background, links_updated is emitted once it arrives.
+        """
+        if not self._links_loaded():
             return []
+        return self._notes_by_id(self.link_graph.forward_links(note_id))
 
     def get_backlinks(self, note_id: int) -> List[Note]:
-        """Get all notes that link to this note"""
-        try:
-            api_notes = self.note_api.get_note_backlinks(note_id)
-            return [Note.from_api_note(api_note) for api_note in api_notes]
-        except Exception as e:
-            print(f"Error getting backlinks: {e}")
+        """Get all notes that link to this note, see get_forward_links"""
+        if not self._links_loaded():
             return []
+        return self._notes_by_id(self.link_graph.backlinks(note_id))
 
     def get_note_tags(self, note_id: int) -> List[Tag]:
-        """Get all tags for a note"""
-        try:
-            # Get the note-tag relations
-            relations = self.tag_api.get_note_tag_relations()
-            # Filter relations for this note
-            note_tag_ids = [rel.tag_id for rel in relations if rel.note_id == note_id]
-            # Get all tags
-            all_tags = self.tag_api.get_all_tags()
-            # Filter tags for this note
-            return [tag for tag in all_tags if tag.id in note_tag_ids]
-        except Exception as e:
-            print(f"Error getting tags for note {note_id}: {e}")
+        """Get all tags for a note
+
+        Until tags have been loaded this returns an empty list and loads
+        them in the background, tags_updated is emitted once they arrive.
+        """
+        if not self.tag_index.loaded:
+            if not self.executor.is_pending("refresh_tags"):
+                self.refresh_tags()
             return []
+        return self.tag_index.tags_for_note(note_id)
+
+    def get_notes_with_tag(self, tag_id: int) -> List[Note]:
+        """Get all loaded notes a tag is attached to"""
+        return [
+            self.notes[note_id]
+            for note_id in self.tag_index.notes_for_tag(tag_id)
+            if note_id in self.notes
+        ]
 
     def select_note(self, note_id: int) -> None:
-        """Handle note selection and emit signals with all necessary data"""
+        """Handle note selection and emit signals with all necessary data
+
+        Links and tags are fetched on a worker thread. Selecting another note
+        before they arrive cancels this request, so only the latest selection
+        is ever emitted.
+        """
         from models.selection_data import NoteSelectionData
 
         note = self.notes.get(note_id)
-        if note:
-            try:
-                selection_data = NoteSelectionData(
+        if not note:
+            return
+
+        # Tags and links come from memory once they have been loaded
+        include_tags = not self.tag_index.loaded
+        include_links = not self.link_graph.loaded
+
+        def on_result(selection) -> None:
+            if (
+                selection.note is not None
+                and note_id in self.notes
+                and not self.journal.has_pending_update(note_id)
+            ):
+                self._apply_api_note(note, selection.note)
+            if include_tags and not self.tag_index.loaded:
+                self.tag_index.rebuild(selection.tags, selection.note_tag_relations)
+                self.tags_updated.emit()
+            if include_links and not self.link_graph.loaded:
+                forward_links = [Note.from_api_note(n) for n in selection.forward_links]
+                backlinks = [Note.from_api_note(n) for n in selection.backlinks]
+            else:
+                forward_links = self.get_forward_links(note_id)
+                backlinks = self.get_backlinks(note_id)
+            self.note_selected.emit(
+                NoteSelectionData(
                     note=note,
-                    forward_links=self.get_forward_links(note_id),
-                    backlinks=self.get_backlinks(note_id),
-                    tags=self.get_note_tags(note_id),
-                )
-                self.note_selected.emit(selection_data)
-            except Exception as e:
-                print(f"Error getting data for note {note_id}: {e}")
-                self.note_selected.emit(
-                    NoteSelectionData(
-                        note=note, forward_links=[], backlinks=[], tags=[]
-                    )
+                    forward_links=forward_links,
+                    backlinks=backlinks,
+                    tags=self.tag_index.tags_for_note(note_id),
                 )
+            )
+
+        def on_error(e: Exception) -> None:
+            print(f"Error getting data for note {note_id}: {e}")
+            self.note_selected.emit(
+                NoteSelectionData(note=note, forward_links=[], backlinks=[], tags=[])
+            )
+
+        # Links and tags are independent, so fetch them concurrently, along
+        # with the content if it is not loaded yet
+        self.executor.submit(
+            fetch_note_selection,
+            self.api_url,
+            note_id,
+            include_note=self.get_note_content(note_id) is None,
+            include_tags=include_tags,
+            include_links=include_links,
+            key="select_note",
+            lane=Lane.INTERACTIVE,
+            on_result=on_result,
+            on_error=on_error,
+        )
 
     def create_note(
-        self, title: str, content: str, parent_id: Optional[int] = None
-    ) -> Optional[Note]:
-        """Create a new note"""
-        try:
-            api_response = self.note_api.note_create(title, content)
+        self,
+        title: str,
+        content: str,
+        parent_id: Optional[int] = None,
+        on_done: Optional[Callable[[Optional[Note]], None]] = None,
+    ) -> None:
+        """Create a new note in the background
+
+        The server assigns the note's ID, so the note is added to the model
+        once it replies. on_done is called on the GUI thread with the new
+        note, or None if it could not be created.
+        """
+
+        def on_result(api_response) -> None:
             # Convert API response to Note model explicitly
             api_note = APINote.model_validate(api_response)
             note = Note.from_api_note(api_note)
+            self._unload_content(note)
 
             self.notes[note.id] = note
+            self._fill_links(note)
+            self._update_links_from_content(note.id, content)
 
+            parent = self.notes.get(parent_id) if parent_id else None
             if parent_id:
-                parent = self.notes.get(parent_id)
-                if parent:
-                    self.note_api.attach_note_to_parent(note.id, parent_id)
-                    parent.add_child(note)
+                # Placed locally at once, the journal tells the server. Until
+                # then a parent missing here shows the note at the top level,
+                # the refresh after the attach lands puts it in place
+                self.journal.append(
+                    MutationKind.ATTACH_NOTE, note.id, parent_id=parent_id
+                )
+
+            if parent:
+                note.hierarchy_type = "block"
+                parent.add_child(note)
             else:
                 self.root_notes.append(note)
+            self.hierarchy.add(note.id, note.parent_id)
 
-            self.refresh_notes()
-            return note
+            self.note_added.emit(note.id)
+            if on_done:
+                on_done(note)
 
-        except Exception as e:
+        def on_error(e: Exception) -> None:
             print(f"Error creating note: {e}")
-            return None
+            if on_done:
+                on_done(None)
+
+        # Same lane as the journal, so edits queued after this go out after it
+        self.executor.submit(
+            self.note_api.note_create,
+            title,
+            content,
+            lane=Lane.WRITE,
+            on_result=on_result,
+            on_error=on_error,
+        )
 
     def update_note(
-        self, note_id: int, title: Optional[str] = None, content: Optional[str] = None
+        self,
+        note_id: int,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        on_done: Optional[Callable[[bool], None]] = None,
     ) -> bool:
-        """Update an existing note"""
-        try:
-            note = self.notes.get(note_id)
-            if not note:
-                return False
+        """Update an existing note
+
+        The change is applied to the model at once and sent to the server
+        in the background through the mutation journal. Returns True if the
+        update was queued. on_done is called on the GUI thread with whether
+        the server accepted it, or at once with False if the note is gone.
+        """
+        note = self.notes.get(note_id)
+        if not note:
+            if on_done:
+                on_done(False)
+            return False
+
+        # Send only what actually changed
+        if title == note.title:
+            title = None
+        if content is not None and content == self.get_note_content(note_id):
+            content = None
+        if title is None and content is None:
+            if on_done:
+                on_done(True)
+            return True
+
+        self._apply_local_update(note, title, content)
+        self.journal.append(
+            MutationKind.UPDATE_NOTE,
+            note_id,
+            on_done=on_done,
+            title=title,
+            content=content,
+        )
+        self.note_changed.emit(note_id)
+        return True
+
+    def update_notes(
+        self,
+        contents: Dict[int, str],
+        on_done: Optional[Callable[[List[int], List[int]], None]] = None,
+    ) -> None:
+        """Save the content of several notes together
+
+        The updates are queued in one go, so the journal sends them as a
+        single batch request. on_done is called on the GUI thread with the
+        IDs that were saved and the IDs that failed, once every note has
+        its answer.
+        """
+        saved: List[int] = []
+        failed = [note_id for note_id in contents if note_id not in self.notes]
+        waiting = set(contents).difference(failed)
+
+        def note_done(note_id: int, ok: bool) -> None:
+            (saved if ok else failed).append(note_id)
+            waiting.discard(note_id)
+            if not waiting and on_done:
+                on_done(saved, failed)
+
+        if not waiting:
+            if on_done:
+                on_done(saved, failed)
+            return
+        for note_id in list(waiting):
+            self.update_note(
+                note_id,
+                content=contents[note_id],
+                on_done=lambda ok, note_id=note_id: note_done(note_id, ok),
+            )
 
-            # Create update request using the imported type
-            update_data = UpdateNoteRequest(title=title, content=content)
+    def _apply_local_update(
+        self, note: Note, title: Optional[str], content: Optional[str]
+    ) -> None:
+        """Show an update in the model before the server has it"""
+        if title is not None and title != note.title:
+            note.title = title
+            self._invalidate_paths(note)
+        if content is not None:
+            if self.lazy_content:
+                # The only local copy until the server has it
+                self.content_cache.pin(note.id)
+                self.content_cache.put(note.id, content)
+                note.content = None
+            else:
+                note.content = content
+            # Links are extracted from the saved text straight away, so the
+            # sidebars of every affected note update without waiting
+            self._update_links_from_content(note.id, content)
+
+    def _reapply_pending_updates(self) -> None:
+        """Put unsent edits back on top of notes freshly loaded from elsewhere"""
+        for note_id, (title, content) in self.journal.pending_updates().items():
+            note = self.notes.get(note_id)
+            if note:
+                self._apply_local_update(note, title, content)
 
-            api_response = self.note_api.update_note(note_id, update_data)
-            note.update_from_api_note(api_response)
+    def _on_mutations_applied(self, mutations: List[Mutation], result) -> None:
+        """Reconcile the model with the server's answer to sent mutations"""
+        kind = mutations[0].kind
+        if kind == MutationKind.UPDATE_NOTE:
+            self._unpin_sent_content(mutations)
+            unknown = False
+            for api_note in result:
+                note = self.notes.get(api_note.id)
+                if note is None:
+                    unknown = True
+                elif self.journal.has_pending_update(api_note.id):
+                    # Newer edits are queued, keep them
+                    note.modified_at = api_note.modified_at or note.modified_at
+                else:
+                    self._apply_api_note(note, api_note)
+                    self.note_changed.emit(note.id)
+            if unknown:
+                # One sync for the whole batch
+                self.refresh_notes()
+        elif kind == MutationKind.DELETE_NOTE:
+            if mutations[0].note_id in self.notes:
+                # Deleted with children, where those end up is up to the server
+                self.refresh_notes()
+        elif kind == MutationKind.ATTACH_NOTE:
+            note = self.notes.get(mutations[0].note_id)
+            if note is None or note.parent_id != mutations[0].parent_id:
+                self.refresh_notes()
 
-            # Refresh notes but don't trigger a global re-selection
+    def _on_mutations_rejected(self, mutations: List[Mutation], error) -> None:
+        """Undo refused mutations by reloading the server's state"""
+        kind = mutations[0].kind
+        if kind == MutationKind.UPDATE_NOTE:
+            self._unpin_sent_content(mutations)
+            note_ids = list(dict.fromkeys(mutation.note_id for mutation in mutations))
+            self.executor.submit(
+                self._fetch_notes,
+                note_ids,
+                lane=Lane.BACKGROUND,
+                on_result=self._reload_notes,
+                on_error=lambda e: self.refresh_notes(),
+            )
+        else:
             self.refresh_notes()
-            return True
 
-        except Exception as e:
-            print(f"Error updating note: {e}")
-            return False
+    def _unpin_sent_content(self, mutations: List[Mutation]) -> None:
+        """Let the cache evict content the server has had its say on"""
+        for note_id in {mutation.note_id for mutation in mutations}:
+            if not self.journal.has_pending_update(note_id):
+                self.content_cache.unpin(note_id)
+
+    def _fetch_notes(self, note_ids: List[int]) -> List[Optional[APINote]]:
+        """Fetch notes one by one, None for those the server no longer has"""
+        api_notes: List[Optional[APINote]] = []
+        for note_id in note_ids:
+            try:
+                api_notes.append(self.note_api.get_note(note_id))
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                api_notes.append(None)
+        return api_notes
+
+    def _reload_notes(self, api_notes: List[Optional[APINote]]) -> None:
+        """Replace local copies of notes with the server's"""
+        for api_note in api_notes:
+            if api_note is None:
+                continue
+            note = self.notes.get(api_note.id)
+            if note is None or self.journal.has_pending_update(note.id):
+                continue
+            self._apply_api_note(note, api_note)
+            self._update_links_from_content(note.id, api_note.content)
+            self.note_changed.emit(note.id)
+        if None in api_notes:
+            # Some were deleted elsewhere
+            self.refresh_notes()
 
     def handle_forward_link_selected(self, note_id: int) -> None:
         """Handle when a forward link is selected"""
@@ -196,81 +990,120 @@ class NotesModel(QObject):
         return list(self.notes.values())
 
     def delete_note(self, note_id: int) -> bool:
-        """Delete a note"""
-        try:
-            note = self.notes.get(note_id)
-            if not note:
-                return False
+        """Delete a note, the server is updated in the background"""
+        note = self.notes.get(note_id)
+        if not note:
+            return False
 
-            # Delete from API
-            self.note_api.delete_note(note_id)
+        self.journal.append(MutationKind.DELETE_NOTE, note_id)
 
-            # Emit deletion signal
-            self.note_deleted.emit(note_id)
+        # Emit deletion signal
+        self.note_deleted.emit(note_id)
 
-            # Refresh internal state
-            self.refresh_notes()
-
-            return True
-
-        except Exception as e:
-            print(f"Error deleting note: {e}")
-            return False
+        # With children the note stays until the server has decided what
+        # happens to them, see _on_mutations_applied
+        if not note.children:
+            self._remove_note_locally(note)
+        return True
 
     def attach_note_to_parent(self, child_id: int, parent_id: int) -> bool:
         """
         Attach a note as a child of another note
 
+        The move is applied locally at once and sent in the background.
+
         Args:
             child_id: ID of the note to attach as child
             parent_id: ID of the parent note
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if the move was accepted locally, False otherwise
         """
-        try:
-            # Verify both notes exist in our model
-            child = self.notes.get(child_id)
-            parent = self.notes.get(parent_id)
-            if not child or not parent:
-                return False
-
-            # Use the API to attach the note
-            self.note_api.attach_note_to_parent(child_id, parent_id)
-
-            # Refresh internal state and emit signal
-            self.refresh_notes()  # This emits notes_updated
-
-            return True
+        # Verify both notes exist in our model
+        child = self.notes.get(child_id)
+        parent = self.notes.get(parent_id)
+        if not child or not parent:
+            return False
 
-        except Exception as e:
-            print(f"Error attaching note {child_id} to parent {parent_id}: {e}")
+        # Refuse moves that would put a note below itself
+        if child_id == parent_id or self.is_descendant(parent_id, child_id):
+            print(f"Cannot attach note {child_id} below its own descendant")
             return False
 
+        self.journal.append(MutationKind.ATTACH_NOTE, child_id, parent_id=parent_id)
+        self._move_note_locally(child, parent)
+        return True
+
     def detach_note_from_parent(self, note_id: int) -> bool:
         """
         Detach a note from its parent
 
+        The move is applied locally at once and sent in the background.
+
         Args:
             note_id: ID of the note to detach from its parent
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if the move was accepted locally, False otherwise
         """
-        try:
-            # Verify note exists in our model
-            note = self.notes.get(note_id)
-            if not note:
-                return False
+        # Verify note exists in our model
+        note = self.notes.get(note_id)
+        if not note:
+            return False
 
-            # Use the API to detach the note
-            self.note_api.detach_note_from_parent(note_id)
+        self.journal.append(MutationKind.DETACH_NOTE, note_id)
+        self._move_note_locally(note, None)
+        return True
 
-            # Refresh internal state and emit signal
-            self.refresh_notes()  # This emits notes_updated
+    def _detach_locally(self, note: Note) -> None:
+        """Unlink a note from its parent's children (or the root list)"""
+        parent = self.notes.get(note.parent_id) if note.parent_id else None
+        siblings = parent.children if parent else self.root_notes
+        for i, sibling in enumerate(siblings):
+            if sibling is note:
+                del siblings[i]
+                break
+        note.parent_id = None
+        note.hierarchy_type = None
 
-            return True
+    def _move_note_locally(self, note: Note, new_parent: Optional[Note]) -> None:
+        """Re-parent a note in the local model, ahead of the server's answer"""
+        if new_parent is not None and (
+            new_parent is note or self.is_descendant(new_parent.id, note.id)
+        ):
+            # Would create a cycle locally, the server's view is authoritative
+            self.refresh_notes()
+            return
 
-        except Exception as e:
-            print(f"Error detaching note {note_id} from parent: {e}")
-            return False
+        old_parent_id = note.parent_id
+        self._detach_locally(note)
+        if new_parent is not None:
+            note.hierarchy_type = "block"
+            new_parent.add_child(note)
+        else:
+            self.root_notes.append(note)
+        self.hierarchy.move(note.id, note.parent_id)
+        self._invalidate_paths(note)
+
+        self.note_moved.emit(
+            note.id, old_parent_id, new_parent.id if new_parent else None
+        )
+
+    def _remove_note_locally(self, note: Note) -> None:
+        """Drop a childless note from the local model"""
+        self._detach_locally(note)
+        self.notes.pop(note.id, None)
+        self.hierarchy.remove([note.id])
+        self._path_cache.pop(note.id, None)
+        self.content_cache.invalidate(note.id)
+        self.content_cache.unpin(note.id)
+        self.tag_index.remove_note(note.id)
+        linked_ids = (
+            self.link_graph.remove_note(note.id) if self.link_graph.loaded else set()
+        )
+        for linked_id in linked_ids:
+            if linked_id in self.notes:
+                self._fill_links(self.notes[linked_id])
+        self.note_removed.emit(note.id)
+        for linked_id in linked_ids:
+            self.note_links_changed.emit(linked_id)
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from api.client import NoteTagRelation, Tag
+from models.note import Note
+
+SNAPSHOT_DIR = Path.home() / ".config" / "draftsmith_qt"
+
+# Bump whenever the tables change, older snapshots are then ignored
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE notes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT,
+    created_at TEXT NOT NULL,
+    modified_at TEXT NOT NULL,
+    parent_id INTEGER,
+    position INTEGER NOT NULL,
+    hierarchy_type TEXT
+);
+CREATE TABLE tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE note_tags (
+    note_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL
+);
+CREATE TABLE links (
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL
+);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Plain tuples, so rows can be captured on the GUI thread and written on
+# a worker thread
+NoteRow = Tuple[int, str, Optional[str], str, str, Optional[int], int, Optional[str]]
+
+
+@dataclass
+class SnapshotData:
+    """Everything a NotesModel needs to show the notes without the server"""
+
+    root_notes: List[Note] = field(default_factory=list)
+    notes: Dict[int, Note] = field(default_factory=dict)
+    tags: List[Tag] = field(default_factory=list)
+    note_tag_relations: List[NoteTagRelation] = field(default_factory=list)
+    # None when the snapshot was taken before the link graph had loaded
+    link_edges: Optional[List[Tuple[int, int]]] = None
+    tags_loaded: bool = False
+
+
+@dataclass
+class SnapshotRows:
+    notes: List[NoteRow]
+    tags: Optional[List[Tuple[int, str, int]]]
+    note_tags: List[Tuple[int, int]]
+    links: Optional[List[Tuple[int, int]]]
+
+
+class NotesSnapshot:
+    """SQLite snapshot of the notes corpus for one server
+
+    After structural changes the snapshot is replaced as a whole: it is
+    written to a temporary file which is then renamed over the previous
+    one, so a crash mid-write leaves the old snapshot intact. Edits to
+    individual notes only rewrite their rows in place, in a transaction.
+    Snapshots with a different schema version are ignored.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Writes may come from several worker threads, one at a time
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def for_server(cls, api_url: str) -> "NotesSnapshot":
+        """Snapshot location for a server URL, each server gets its own file"""
+        digest = hashlib.sha1(api_url.encode()).hexdigest()[:12]
+        return cls(SNAPSHOT_DIR / f"notes-{digest}.sqlite3")
+
+    def load(self) -> Optional[SnapshotData]:
+        """Read the snapshot, None if it is missing, unreadable or outdated"""
+        if not self.path.exists():
+            return None
+        try:
+            uri = f"{self.path.resolve().as_uri()}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True)
+            try:
+                return self._read(connection)
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Error loading notes snapshot: {e}")
+            return None
+
+    def _read(self, connection: sqlite3.Connection) -> Optional[SnapshotData]:
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            return None
+
+        data = SnapshotData()
+        children: Dict[Optional[int], List[Note]] = {}
+        for (
+            note_id,
+            title,
+            content,
+            created_at,
+            modified_at,
+            parent_id,
+            _,
+            hierarchy_type,
+        ) in connection.execute("SELECT * FROM notes ORDER BY parent_id, position"):
+            note = Note(
+                id=note_id,
+                title=title,
+                content=content,
+                created_at=datetime.fromisoformat(created_at),
+                modified_at=datetime.fromisoformat(modified_at),
+                parent_id=parent_id,
+                hierarchy_type=hierarchy_type,
+            )
+            data.notes[note_id] = note
+            children.setdefault(parent_id, []).append(note)
+
+        for parent_id, notes in children.items():
+            parent = data.notes.get(parent_id) if parent_id is not None else None
+            if parent is not None:
+                parent.children = notes
+            else:
+                # Roots, and orphans whose parent is missing from the snapshot
+                data.root_notes.extend(notes)
+
+        for note_id, tag_id in connection.execute("SELECT * FROM note_tags"):
+            data.note_tag_relations.append(
+                NoteTagRelation(note_id=note_id, tag_id=tag_id)
+            )
+            if note_id in data.notes:
+                data.notes[note_id].tags.add(tag_id)
+
+        data.tags = [
+            Tag(id=tag_id, name=name)
+            for tag_id, name in connection.execute(
+                "SELECT id, name FROM tags ORDER BY position"
+            )
+        ]
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        data.tags_loaded = meta.get("tags_loaded") == "1"
+        if meta.get("links_loaded") == "1":
+            data.link_edges = connection.execute("SELECT * FROM links").fetchall()
+        return data
+
+    def write(self, rows: SnapshotRows) -> None:
+        """Atomically replace the snapshot with these rows"""
+        with self._write_lock:
+            self._write(rows)
+
+    def update_notes(
+        self, notes: List[NoteRow], links: Optional[List[Tuple[int, int]]]
+    ) -> bool:
+        """Replace the rows of some notes in the existing snapshot
+
+        links are the current outgoing links of those notes, None if the
+        link graph isn't loaded. Returns False, without writing anything,
+        if there is no current snapshot to update.
+        """
+        with self._write_lock:
+            if not self.path.exists():
+                return False
+            connection = sqlite3.connect(self.path)
+            try:
+                (version,) = connection.execute("PRAGMA user_version").fetchone()
+                if version != SCHEMA_VERSION:
+                    return False
+                with connection:
+                    connection.executemany(
+                        """
+                        INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(id) DO UPDATE SET
+                            title = excluded.title,
+                            content = excluded.content,
+                            created_at = excluded.created_at,
+                            modified_at = excluded.modified_at,
+                            parent_id = excluded.parent_id,
+                            position = excluded.position,
+                            hierarchy_type = excluded.hierarchy_type
+                        """,
+                        notes,
+                    )
+                    if links is not None:
+                        connection.executemany(
+                            "DELETE FROM links WHERE source = ?",
+                            [(row[0],) for row in notes],
+                        )
+                        connection.executemany("INSERT INTO links VALUES (?, ?)", links)
+            finally:
+                connection.close()
+            return True
+
+    def _write(self, rows: SnapshotRows) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.unlink(missing_ok=True)
+
+        connection = sqlite3.connect(temp_path)
+        try:
+            # Nothing to recover from a half-written temporary file
+            connection.execute("PRAGMA journal_mode=OFF")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.executescript(SCHEMA)
+            with connection:
+                connection.executemany(
+                    "INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows.notes
+                )
+                connection.executemany(
+                    "INSERT INTO tags VALUES (?, ?, ?)", rows.tags or []
+                )
+                connection.executemany(
+                    "INSERT INTO note_tags VALUES (?, ?)", rows.note_tags
+                )
+                connection.executemany(
+                    "INSERT INTO links VALUES (?, ?)", rows.links or []
+                )
+                connection.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    [
+                        ("tags_loaded", "1" if rows.tags is not None else "0"),
+                        ("links_loaded", "1" if rows.links is not None else "0"),
+                    ],
+                )
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            connection.close()
+
+        # Make sure the data is on disk before it replaces the old snapshot
+        fd = os.open(temp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,310 @@
+from typing import Any, Dict, List, Optional
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QModelIndex,
+    QObject,
+    Qt,
+)
+from models.note import Note
+from models.notes_model import NotesModel
+
+# Number of child rows exposed per fetchMore call
+FETCH_BATCH_SIZE = 256
+
+
+class NotesTreeModel(QAbstractItemModel):
+    """Item model presenting a NotesModel hierarchy to tree views
+
+    Children are exposed lazily through canFetchMore/fetchMore, so only the
+    rows a view has actually expanded or scrolled to exist as Qt rows. The
+    rows handed out are mirrored in ``_child_ids``; fine-grained NotesModel
+    signals are turned into targeted row insertions, moves, removals and
+    dataChanged notifications against that mirror. Only a full refresh
+    resets the model.
+
+    Indexes carry the note ID as their internal ID, so they never point at
+    Note objects that a refresh has replaced.
+    """
+
+    def __init__(self, notes_model: NotesModel, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.notes_model = notes_model
+        # Rows exposed to views, parent ID (None for the root) -> child IDs
+        self._child_ids: Dict[Optional[int], List[int]] = {None: []}
+        # Exposed note ID -> parent ID
+        self._parent_of: Dict[int, Optional[int]] = {}
+        # Last known row of each exposed note, verified before use
+        self._row_hints: Dict[int, int] = {}
+
+        notes_model.notes_updated.connect(self._on_notes_updated)
+        notes_model.note_added.connect(self._on_note_added)
+        notes_model.note_changed.connect(self._on_note_changed)
+        notes_model.note_moved.connect(self._on_note_moved)
+        notes_model.note_removed.connect(self._on_note_removed)
+
+    # Qt model interface
+
+    def index(
+        self, row: int, column: int, parent: QModelIndex = QModelIndex()
+    ) -> QModelIndex:
+        if column != 0 or row < 0:
+            return QModelIndex()
+        child_ids = self._child_ids.get(self._id_of(parent))
+        if child_ids is None or row >= len(child_ids):
+            return QModelIndex()
+        return self.createIndex(row, 0, child_ids[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_of(self._parent_of.get(index.internalId()))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._child_ids.get(self._id_of(parent), ()))
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        # Report unfetched children too, so views draw an expand arrow
+        return bool(self._model_children(self._id_of(parent)))
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        parent_id = self._id_of(parent)
+        exposed = self._child_ids.get(parent_id, ())
+        return len(exposed) < len(self._model_children(parent_id))
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        parent_id = self._id_of(parent)
+        exposed = self._child_ids.setdefault(parent_id, [])
+        exposed_set = set(exposed)
+        batch = [
+            child.id
+            for child in self._model_children(parent_id)
+            if child.id not in exposed_set
+        ][:FETCH_BATCH_SIZE]
+        if not batch:
+            return
+
+        first = len(exposed)
+        self.beginInsertRows(parent, first, first + len(batch) - 1)
+        for row, note_id in enumerate(batch, start=first):
+            exposed.append(note_id)
+            self._parent_of[note_id] = parent_id
+            self._row_hints[note_id] = row
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        note = self.notes_model.notes.get(index.internalId())
+        if note is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return note.title
+        if role == Qt.ItemDataRole.UserRole:
+            return note
+        return None
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return "Notes"
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return (
+            Qt.ItemFlag.ItemIsEnabled
+            | Qt.ItemFlag.ItemIsSelectable
+            | Qt.ItemFlag.ItemIsDragEnabled
+            | Qt.ItemFlag.ItemIsDropEnabled
+        )
+
+    def supportedDropActions(self) -> Qt.DropAction:
+        return Qt.DropAction.MoveAction
+
+    # Lookups
+
+    def note_for_index(self, index: QModelIndex) -> Optional[Note]:
+        if not index.isValid():
+            return None
+        return self.notes_model.notes.get(index.internalId())
+
+    def index_for_note(self, note_id: int) -> QModelIndex:
+        """Get the index of a note, fetching the rows on its path if needed"""
+        path = []
+        note = self.notes_model.notes.get(note_id)
+        while note is not None and len(path) <= len(self.notes_model.notes):
+            path.append(note)
+            if note.parent_id is None:
+                break
+            note = self.notes_model.notes.get(note.parent_id)
+        else:
+            return QModelIndex()  # Unknown note, orphan or cycle
+
+        for note in reversed(path):
+            parent_index = self._index_of(note.parent_id)
+            while note.id not in self._parent_of and self.canFetchMore(parent_index):
+                self.fetchMore(parent_index)
+            if self._parent_of.get(note.id, -1) != note.parent_id:
+                return QModelIndex()
+        return self._index_of(note_id)
+
+    def loaded_index(self, note_id: int) -> QModelIndex:
+        """Get the index of a note without fetching, invalid if not loaded"""
+        return self._index_of(note_id)
+
+    def _id_of(self, index: QModelIndex) -> Optional[int]:
+        return index.internalId() if index.isValid() else None
+
+    def _index_of(self, note_id: Optional[int]) -> QModelIndex:
+        if note_id is None or note_id not in self._parent_of:
+            return QModelIndex()
+        return self.createIndex(self._row(note_id), 0, note_id)
+
+    def _row(self, note_id: int) -> int:
+        siblings = self._child_ids[self._parent_of[note_id]]
+        row = self._row_hints.get(note_id)
+        if row is None or row >= len(siblings) or siblings[row] != note_id:
+            # Rows shifted since the hint was taken, refresh the whole level
+            for i, sibling_id in enumerate(siblings):
+                self._row_hints[sibling_id] = i
+            row = self._row_hints[note_id]
+        return row
+
+    def _model_children(self, parent_id: Optional[int]) -> List[Note]:
+        if parent_id is None:
+            return self.notes_model.root_notes
+        parent = self.notes_model.notes.get(parent_id)
+        return parent.children if parent else []
+
+    def _is_fully_exposed(self, parent_id: Optional[int], extra: int = 0) -> bool:
+        """Whether every child (minus extra just added) has been fetched"""
+        if parent_id is not None and parent_id not in self._parent_of:
+            return False  # The parent row itself is not exposed
+        exposed = self._child_ids.get(parent_id)
+        if exposed is None:
+            # Never fetched, which is only equivalent to fetched if empty
+            return len(self._model_children(parent_id)) - extra == 0
+        return len(exposed) == len(self._model_children(parent_id)) - extra
+
+    def _forget(self, note_id: int) -> None:
+        """Drop an exposed note and its exposed descendants from the mirror"""
+        for child_id in self._child_ids.pop(note_id, []):
+            self._forget(child_id)
+        self._parent_of.pop(note_id, None)
+        self._row_hints.pop(note_id, None)
+
+    def _notify_has_children(self, parent_id: Optional[int]) -> None:
+        """Let views redraw the expand arrow of a parent"""
+        if parent_id is not None and parent_id in self._parent_of:
+            index = self._index_of(parent_id)
+            self.dataChanged.emit(index, index)
+
+    # NotesModel signal handlers
+
+    def _on_notes_updated(self) -> None:
+        self.beginResetModel()
+        self._child_ids = {None: []}
+        self._parent_of.clear()
+        self._row_hints.clear()
+        self.endResetModel()
+
+    def _on_note_changed(self, note_id: int) -> None:
+        if note_id in self._parent_of:
+            index = self._index_of(note_id)
+            self.dataChanged.emit(
+                index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.UserRole]
+            )
+
+    def _on_note_added(self, note_id: int) -> None:
+        note = self.notes_model.notes.get(note_id)
+        if note is None:
+            return
+        self._expose(note_id, note.parent_id)
+
+    def _expose(self, note_id: int, parent_id: Optional[int]) -> None:
+        """Insert a row for a note that was just added under parent_id
+
+        If the parent's rows have not all been fetched the note is left for
+        a later fetchMore, as that is where it would appear anyway.
+        """
+        if not self._is_fully_exposed(parent_id, extra=1):
+            self._notify_has_children(parent_id)
+            return
+
+        exposed = self._child_ids.setdefault(parent_id, [])
+        row = len(exposed)
+        self.beginInsertRows(self._index_of(parent_id), row, row)
+        exposed.append(note_id)
+        self._parent_of[note_id] = parent_id
+        self._row_hints[note_id] = row
+        self.endInsertRows()
+
+    def _on_note_removed(self, note_id: int) -> None:
+        if note_id not in self._parent_of:
+            return
+        parent_id = self._parent_of[note_id]
+        row = self._row(note_id)
+        self.beginRemoveRows(self._index_of(parent_id), row, row)
+        del self._child_ids[parent_id][row]
+        self._forget(note_id)
+        self.endRemoveRows()
+        self._notify_has_children(parent_id)
+
+    def _on_note_moved(
+        self, note_id: int, old_parent_id: Optional[int], new_parent_id: Optional[int]
+    ) -> None:
+        if note_id not in self._parent_of:
+            self._expose(note_id, new_parent_id)
+            return
+
+        if not self._is_fully_exposed(new_parent_id, extra=1):
+            # Destination not fetched yet, the row simply disappears here
+            self._on_note_removed(note_id)
+            self._notify_has_children(new_parent_id)
+            return
+
+        source_parent_id = self._parent_of[note_id]
+        source_row = self._row(note_id)
+        destination = self._child_ids.setdefault(new_parent_id, [])
+        destination_row = len(destination)
+        if not self.beginMoveRows(
+            self._index_of(source_parent_id),
+            source_row,
+            source_row,
+            self._index_of(new_parent_id),
+            destination_row,
+        ):
+            # Qt rejected the move, fall back to rebuilding the mirror
+            self._on_notes_updated()
+            return
+
+        del self._child_ids[source_parent_id][source_row]
+        destination.append(note_id)
+        self._parent_of[note_id] = new_parent_id
+        self._row_hints[note_id] = len(destination) - 1
+        self.endMoveRows()
+        self._notify_has_children(source_parent_id)
+        self._notify_has_children(new_parent_id)
+
+
+def shared_tree_model(notes_model: NotesModel) -> NotesTreeModel:
+    """Get the tree model for a NotesModel, shared by every tree view using it"""
+    tree_model = notes_model.findChild(NotesTreeModel)
+    if tree_model is None:
+        tree_model = NotesTreeModel(notes_model, parent=notes_model)
+    return tree_model
@@ -0,0 +1,56 @@
+from typing import Any, Callable, List, Optional, Sequence
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt
+
+
+class PaletteResultsModel(QAbstractListModel):
+    """List model over the items a palette can show
+
+    The model keeps a reference to the palette's full item list and, while
+    a search is active, only the indices of the matching items. Display
+    text is computed when a view asks for a row, so only the rows that are
+    actually painted ever produce any text.
+    """
+
+    def __init__(
+        self, text_for: Callable[[Any], str], parent: Optional[QObject] = None
+    ):
+        super().__init__(parent)
+        self._text_for = text_for
+        self._items: Sequence[Any] = []
+        # Indices into _items being shown, None while showing every item
+        self._rows: Optional[List[int]] = None
+
+    def set_items(self, items: Sequence[Any]) -> None:
+        """Replace the items and show all of them"""
+        self.beginResetModel()
+        self._items = items
+        self._rows = None
+        self.endResetModel()
+
+    def set_rows(self, rows: Optional[Sequence[int]]) -> None:
+        """Show only the items at these indices, in this order, or all if None"""
+        self.beginResetModel()
+        self._rows = list(rows) if rows is not None else None
+        self.endResetModel()
+
+    def item_at(self, row: int) -> Any:
+        if row < 0 or row >= self.rowCount():
+            return None
+        return self._items[self._rows[row] if self._rows is not None else row]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._rows is not None else len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        item = self.item_at(index.row())
+        if item is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._text_for(item)
+        if role == Qt.ItemDataRole.UserRole:
+            return item
+        return None
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from utils.content_hash import content_hash
+
+# (content hash, renderer, format)
+RenderKey = Tuple[str, str, str]
+
+
+def render_key(content: str, renderer: str, format: str = "html") -> RenderKey:
+    return (content_hash(content), renderer, format)
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered previews, shared by every tab
+
+    Entries are keyed by the hash of the markdown that was rendered, the
+    renderer that produced them and the output format, so the same text
+    is never rendered twice while its result is held. Evicts the least
+    recently used entries once either the number of entries or the total
+    number of characters held exceeds its limit. Safe to use from worker
+    threads.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_chars: int = 16_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[RenderKey, str]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: RenderKey) -> Optional[str]:
+        """Get a rendered result and mark it as recently used"""
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+            return rendered
+
+    def put(self, key: RenderKey, rendered: str) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = rendered
+            self._chars += len(rendered)
+            self._evict()
+
+    def invalidate(self, key: RenderKey) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def __contains__(self, key: RenderKey) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: RenderKey) -> None:
+        rendered = self._entries.pop(key, None)
+        if rendered is not None:
+            self._chars -= len(rendered)
+
+    def _evict(self) -> None:
+        # Always keep the newest entry, even if it alone exceeds max_chars
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._chars > self.max_chars
+        ):
+            _, rendered = self._entries.popitem(last=False)
+            self._chars -= len(rendered)
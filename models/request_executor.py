@@ -0,0 +1,218 @@
+import itertools
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class Lane(Enum):
+    """Independent worker pools, so slow background work never delays the UI"""
+
+    INTERACTIVE = "interactive"  # Selection, previews: the user is waiting
+    BACKGROUND = "background"  # Refreshes and other bulk fetches
+    WRITE = "write"  # Mutations
+
+
+LANE_THREADS = {
+    Lane.INTERACTIVE: 2,
+    Lane.BACKGROUND: 2,
+    # Single threaded so mutations reach the server in submission order
+    Lane.WRITE: 1,
+}
+
+
+class CancellationToken:
+    """Shared flag a worker can poll to stop early"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+@dataclass
+class _PendingRequest:
+    key: Optional[str]
+    token: CancellationToken
+    runnable: QRunnable
+    lane: Lane
+    on_result: Optional[Callable[[Any], None]]
+    on_error: Optional[Callable[[Exception], None]]
+
+
+class _ResultRelay(QObject):
+    """Lives in the GUI thread; signals emitted from workers are queued to it"""
+
+    finished = Signal(int, object)
+    failed = Signal(int, object)
+
+
+class _RequestRunnable(QRunnable):
+    def __init__(
+        self,
+        request_id: int,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        token: CancellationToken,
+        relay: _ResultRelay,
+    ):
+        super().__init__()
+        # Owned by the executor so cancel() can safely tryTake it later
+        self.setAutoDelete(False)
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = token
+        self.relay = relay
+
+    def run(self) -> None:
+        if self.token.cancelled:
+            # Still report back so the executor can release this runnable
+            self.relay.finished.emit(self.request_id, None)
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.relay.failed.emit(self.request_id, e)
+        else:
+            self.relay.finished.emit(self.request_id, result)
+
+
+class RequestExecutor(QObject):
+    """Runs blocking API calls on worker threads and reports back on the GUI thread
+
+    Requests submitted with a key supersede any earlier request with the same
+    key: a queued request is dropped before it starts and the result of a
+    running one is discarded. Workers that take a ``cancel_token`` keyword
+    argument (``pass_token=True``) can also stop early.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._pools: Dict[Lane, QThreadPool] = {}
+        for lane in Lane:
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(LANE_THREADS[lane])
+            self._pools[lane] = pool
+
+        self._relay = _ResultRelay(self)
+        self._relay.finished.connect(self._on_finished)
+        self._relay.failed.connect(self._on_failed)
+
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _PendingRequest] = {}
+        # Runnables are kept alive here until their worker has returned
+        self._runnables: Dict[int, QRunnable] = {}
+        self._latest_by_key: Dict[str, int] = {}
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        key: Optional[str] = None,
+        lane: Lane = Lane.BACKGROUND,
+        priority: int = 0,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        pass_token: bool = False,
+        **kwargs,
+    ) -> CancellationToken:
+        """
+        Run fn(*args, **kwargs) on a worker thread
+
+        Args:
+            fn: Blocking callable to run, e.g. a NoteAPI method
+            key: Requests sharing a key cancel each other, newest wins
+            lane: Worker pool to run in
+            priority: Ordering within the lane's queue, higher runs first
+            on_result: Called on the GUI thread with the return value
+            on_error: Called on the GUI thread with the raised exception
+            pass_token: Pass the CancellationToken to fn as ``cancel_token``
+
+        Returns:
+            CancellationToken: Can be used to cancel this request
+        """
+        if key is not None:
+            self.cancel(key)
+
+        request_id = next(self._ids)
+        token = CancellationToken()
+        if pass_token:
+            kwargs["cancel_token"] = token
+
+        runnable = _RequestRunnable(request_id, fn, args, kwargs, token, self._relay)
+        self._pending[request_id] = _PendingRequest(
+            key=key,
+            token=token,
+            runnable=runnable,
+            lane=lane,
+            on_result=on_result,
+            on_error=on_error,
+        )
+        self._runnables[request_id] = runnable
+        if key is not None:
+            self._latest_by_key[key] = request_id
+
+        self._pools[lane].start(runnable, priority)
+        return token
+
+    def cancel(self, key: str) -> None:
+        """Cancel the outstanding request with this key, if any"""
+        request_id = self._latest_by_key.pop(key, None)
+        if request_id is not None:
+            self._cancel_request(request_id)
+
+    def cancel_all(self) -> None:
+        for request_id in list(self._pending):
+            self._cancel_request(request_id)
+        self._latest_by_key.clear()
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._latest_by_key
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        """Cancel everything and wait for running workers to return"""
+        self.cancel_all()
+        for pool in self._pools.values():
+            pool.waitForDone(timeout_ms)
+
+    def _cancel_request(self, request_id: int) -> None:
+        pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return
+        pending.token.cancel()
+        # Removes the runnable if it has not started yet
+        if self._pools[pending.lane].tryTake(pending.runnable):
+            self._runnables.pop(request_id, None)
+
+    def _take(self, request_id: int) -> Optional[_PendingRequest]:
+        self._runnables.pop(request_id, None)
+        pending = self._pending.pop(request_id, None)
+        if pending is not None and pending.key is not None:
+            if self._latest_by_key.get(pending.key) == request_id:
+                del self._latest_by_key[pending.key]
+        return pending
+
+    def _on_finished(self, request_id: int, result: Any) -> None:
+        pending = self._take(request_id)
+        if pending is None or pending.token.cancelled:
+            return  # Superseded or cancelled, drop the stale result
+        if pending.on_result is not None:
+            pending.on_result(result)
+
+    def _on_failed(self, request_id: int, error: Exception) -> None:
+        pending = self._take(request_id)
+        if pending is None or pending.token.cancelled:
+            return
+        if pending.on_error is not None:
+            pending.on_error(error)
+        else:
+            print(f"Background request failed: {error}")
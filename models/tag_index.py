@@ -0,0 +1,67 @@
+from typing import Dict, Iterable, List, Optional, Set
+from api.client import NoteTagRelation, Tag
+
+
+class TagIndex:
+    """Tags and note-tag relations held in memory
+
+    Relations are indexed in both directions, so the tags of a note and
+    the notes of a tag are set lookups. The index is filled once from the
+    server and then patched as tags are attached and detached.
+    """
+
+    def __init__(self):
+        self.tags: Dict[int, Tag] = {}
+        self._note_tags: Dict[int, Set[int]] = {}
+        self._tag_notes: Dict[int, Set[int]] = {}
+        # Position of each tag in the server's listing
+        self._order: Dict[int, int] = {}
+        self.loaded = False
+
+    def rebuild(self, tags: Iterable[Tag], relations: Iterable[NoteTagRelation]):
+        """Replace the index with freshly fetched tags and relations"""
+        self.tags = {tag.id: tag for tag in tags}
+        self._order = {tag_id: i for i, tag_id in enumerate(self.tags)}
+        self._note_tags.clear()
+        self._tag_notes.clear()
+        for relation in relations:
+            self.attach(relation.note_id, relation.tag_id)
+        self.loaded = True
+
+    def attach(self, note_id: int, tag_id: int) -> None:
+        self._note_tags.setdefault(note_id, set()).add(tag_id)
+        self._tag_notes.setdefault(tag_id, set()).add(note_id)
+
+    def detach(self, note_id: int, tag_id: int) -> None:
+        self._discard(self._note_tags, note_id, tag_id)
+        self._discard(self._tag_notes, tag_id, note_id)
+
+    def remove_note(self, note_id: int) -> None:
+        """Forget every relation of a deleted note"""
+        for tag_id in self._note_tags.pop(note_id, set()):
+            self._discard(self._tag_notes, tag_id, note_id)
+
+    def get_tag(self, tag_id: int) -> Optional[Tag]:
+        return self.tags.get(tag_id)
+
+    def tag_ids_for_note(self, note_id: int) -> Set[int]:
+        return set(self._note_tags.get(note_id, ()))
+
+    def tags_for_note(self, note_id: int) -> List[Tag]:
+        """Tags attached to a note, in the server's tag order"""
+        tag_ids = [
+            tag_id for tag_id in self._note_tags.get(note_id, ()) if tag_id in self.tags
+        ]
+        tag_ids.sort(key=self._order.__getitem__)
+        return [self.tags[tag_id] for tag_id in tag_ids]
+
+    def notes_for_tag(self, tag_id: int) -> Set[int]:
+        return set(self._tag_notes.get(tag_id, ()))
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[int]], key: int, value: int) -> None:
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
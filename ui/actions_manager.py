@@ -51,6 +51,11 @@ def create_actions(parent: Optional[QWidget] = None) -> Dict[str, QAction]:
     actions["save"].setStatusTip("Save the current note")
     actions["save"].setToolTip("Save the current note")
 
+    actions["save_all"] = QAction("Save &All", parent)
+    actions["save_all"].setShortcut("Ctrl+Shift+S")
+    actions["save_all"].setStatusTip("Save the unsaved edits of every tab")
+    actions["save_all"].setToolTip("Save the unsaved edits of every tab")
+
     # Exit action
     actions["exit"] = QAction(
         style.standardIcon(QStyle.StandardPixmap.SP_DialogCloseButton), "E&xit", parent
@@ -51,6 +51,7 @@ class MenuHandler:
         self.actions["save"].triggered.connect(
             self.main_window._trigger_save_current_tab
         )
+        self.actions["save_all"].triggered.connect(self.main_window.save_all_notes)
 
         # Add connection for delete action
         self.actions["delete_note"].triggered.connect(
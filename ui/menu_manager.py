@@ -39,6 +39,7 @@ def create_file_menu(parent, actions: Dict[str, QAction]) -> QMenu:
     file_menu.addAction(actions["show_note_palette"])
     file_menu.addAction(actions["insert_note_link"])
     file_menu.addAction(actions["save"])
+    file_menu.addAction(actions["save_all"])
     file_menu.addAction(actions["delete_note"])
     file_menu.addAction(actions["exit"])
 
@@ -1,7 +1,7 @@
 from widgets.tab_widget import NotesTabWidget
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set
 
 
 from widgets.tab_content import TabContent
@@ -45,13 +45,17 @@ class TabHandler:
     def create_new_tab(self, title: str = "New Tab") -> TabContent:
         """Create a new tab with its own view implementation"""
         # Create new tab content
-        tab_content = TabContent(base_url=self.api_url)
+        tab_content = TabContent(
+            base_url=self.api_url,
+            render_cache=self.main_window.render_cache,
+            math_prerenderer=self.main_window.math_prerenderer,
+        )
 
         # Set up view actions
         tab_content.editor.set_view_actions(
             self.view_actions["maximize_editor"],
             self.view_actions["maximize_preview"],
-            self.view_actions["use_remote_rendering"]
+            self.view_actions["use_remote_rendering"],
         )
 
         # Connect to models
@@ -62,11 +66,19 @@ class TabHandler:
 
         # Set initial follow mode state
         tab_content.left_sidebar.tree.follow_mode = self.follow_mode_action.isChecked()
-        tab_content.left_sidebar.search_sidebar.follow_mode = self.follow_mode_action.isChecked()
-        tab_content.note_select_palette.follow_mode = self.follow_mode_action.isChecked()
+        tab_content.left_sidebar.search_sidebar.follow_mode = (
+            self.follow_mode_action.isChecked()
+        )
+        tab_content.note_select_palette.follow_mode = (
+            self.follow_mode_action.isChecked()
+        )
 
         # Connect save signal to status updates
         tab_content.note_saved.connect(self._handle_note_saved)
+        tab_content.dirty_changed.connect(self._update_window_modified)
+        tab_content.status_message.connect(
+            lambda message: self.main_window.status_bar.showMessage(message, 3000)
+        )
 
         # Add to tab widget
         index = self.tab_widget.addTab(tab_content, title)
@@ -96,6 +108,67 @@ class TabHandler:
             f"Note {note_id} saved successfully", 3000
         )
 
+    def _tab_contents(self) -> List[TabContent]:
+        tabs = (self.tab_widget.widget(i) for i in range(self.tab_widget.count()))
+        return [tab for tab in tabs if isinstance(tab, TabContent)]
+
+    def _update_window_modified(self):
+        """Mark the window title while any tab has unsaved edits"""
+        self.main_window.setWindowModified(
+            any(tab.is_dirty() for tab in self._tab_contents())
+        )
+
+    def save_all_tabs(self):
+        """Save the unsaved edits of every tab in a single batch request
+
+        If several tabs have different unsaved edits to the same note, only
+        the first is saved and the others stay unsaved, so nothing is
+        overwritten without the user seeing it.
+        """
+        contents: Dict[int, str] = {}
+        conflicts: Set[int] = set()
+        for tab in self._tab_contents():
+            if not tab.is_dirty():
+                continue
+            note_id = tab.get_current_note_id()
+            if note_id in contents and tab.editor.get_content() != contents[note_id]:
+                conflicts.add(note_id)
+                continue
+            contents[note_id] = tab.take_unsaved_content()
+
+        if not contents:
+            self.main_window.status_bar.showMessage("No unsaved changes", 3000)
+            return
+        self.main_window.notes_model.update_notes(
+            contents,
+            on_done=lambda saved, failed: self._handle_notes_saved(
+                saved, failed, conflicts
+            ),
+        )
+
+    def _handle_notes_saved(
+        self, saved: List[int], failed: List[int], conflicts: Set[int]
+    ):
+        """Report a save all, and flag tabs whose notes failed as unsaved"""
+        for tab in self._tab_contents():
+            for note_id in failed:
+                tab.mark_unsaved(note_id)
+        message = f"Saved {len(saved)} notes"
+        if failed:
+            message += ", failed to save notes " + ", ".join(
+                str(note_id) for note_id in sorted(failed)
+            )
+        if conflicts:
+            message += (
+                ", other tabs have different edits to notes "
+                + ", ".join(str(note_id) for note_id in sorted(conflicts))
+                + " and were left unsaved"
+            )
+        if failed or conflicts:
+            self.main_window.status_bar.showMessage(message, 5000)
+        else:
+            self.main_window.status_bar.showMessage(message + " successfully", 3000)
+
     def close_current_tab(self):
         current_index = self.tab_widget.currentIndex()
         # Remove the note ID mapping when closing the tab
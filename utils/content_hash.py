@@ -0,0 +1,6 @@
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """Short digest of a text, equal for equal texts"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,277 @@
+import bisect
+import re
+from typing import Callable, Dict, Generic, List, Optional, Sequence, Set, TypeVar
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+T = TypeVar("T")
+
+# Bits for the characters default_process can leave in a string, anything
+# else shares the last bit
+_CHAR_BITS = {c: i for i, c in enumerate("abcdefghijklmnopqrstuvwxyz0123456789")}
+_OTHER_BIT = len(_CHAR_BITS)
+# A second set of bits, above the first, for characters appearing twice
+_REPEAT_SHIFT = _OTHER_BIT + 1
+
+# Candidates scored per result slot, the shortest matching texts are kept
+PRESELECT_FACTOR = 3
+
+# Candidates checked at a time while looking for enough matches
+SCAN_CHUNK = 4096
+
+# Candidates checked by a quick match, the rest wait for a complete one
+QUICK_SCAN_LIMIT = SCAN_CHUNK
+
+# Minimum similarity between a query token and a word for misspelt queries
+FALLBACK_CUTOFF = 75
+
+
+def _char_mask(text: str) -> int:
+    mask = repeated = 0
+    for c in set(text):
+        bit = 1 << _CHAR_BITS.get(c, _OTHER_BIT)
+        if mask & bit or text.count(c) > 1:
+            repeated |= bit
+        mask |= bit
+    return mask | repeated << _REPEAT_SHIFT
+
+
+def _subsequence_search(token: str) -> Callable[[str], Optional[re.Match]]:
+    """Finds whether a text contains token as a subsequence
+
+    Each character skips ahead to the next occurrence without
+    backtracking, so texts that don't match fail in linear time.
+    """
+    return re.compile(
+        "".join(f"[^{re.escape(c)}]*+{re.escape(c)}" for c in token)
+    ).match
+
+
+class _Candidates:
+    """Items matching a query, found lazily in order of text length"""
+
+    def __init__(self, query: str, source: List[int]):
+        self.query = query
+        self.found: List[int] = []
+        # Not yet checked, in order of text length
+        self.source = source
+        self.position = 0
+
+    def remaining(self) -> List[int]:
+        """Everything that may still match, for a query extending this one"""
+        return self.found + self.source[self.position :]
+
+
+class FuzzyMatcher(Generic[T]):
+    """Incremental fuzzy matcher over a list of items
+
+    Item texts are normalised and indexed once, by character and by word.
+    A query matches items containing every query token as a subsequence.
+    Candidates start from the posting list of the query's rarest character,
+    are filtered by which characters they hold once or more than once, and
+    are kept in order of text length, so they are only scanned until
+    enough are found: among subsequence matches, shorter texts are the
+    closest. The shortest ``limit * PRESELECT_FACTOR`` matches are scored
+    with token_set_ratio in a single rapidfuzz batch call. When a query
+    extends the previous one, only the previous candidates and the part
+    not scanned yet are rechecked.
+
+    If fewer than ``limit`` items match, misspelt queries are handled by
+    matching each token against the indexed words with a ratio scorer, and
+    those results follow the exact ones.
+
+    Matching as the user types can ask for a quick match, which checks a
+    bounded number of candidates and skips misspelt queries, and then for
+    a complete match of the same query once typing pauses. The complete
+    match carries on from where the quick one stopped.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[T],
+        key: Callable[[T], str],
+        limit: int = 200,
+        score_cutoff: float = 0,
+    ):
+        self.limit = limit
+        self.score_cutoff = score_cutoff
+        self._key = key
+        self._items = list(items)
+        self._texts = [default_process(key(item)) for item in self._items]
+        self._masks = [_char_mask(text) for text in self._texts]
+        # Character -> indices of the items containing it, shortest text first
+        self._postings: Dict[str, List[int]] = {}
+        # Word -> indices of the items containing it
+        self._words: Dict[str, Set[int]] = {}
+        for i in sorted(range(len(self._texts)), key=self._length_key):
+            self._index(i)
+        # Indexed words and their prefixes by length, built on first use
+        self._vocabulary: Optional[List[str]] = None
+        self._prefixes: Dict[int, List[str]] = {}
+        self._last: Optional[_Candidates] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def update(self, index: int, item: T) -> None:
+        """Replace the item at an index and reindex its text"""
+        self._items[index] = item
+        text = default_process(self._key(item))
+        if text == self._texts[index]:
+            return
+        self._unindex(index)
+        self._texts[index] = text
+        self._masks[index] = _char_mask(text)
+        self._index(index, keep_order=True)
+        self._last = None
+
+    def match(self, query: str, complete: bool = True) -> List[T]:
+        """Best matching items for a query, best first"""
+        return [self._items[i] for i in self.match_indices(query, complete)]
+
+    def match_indices(self, query: str, complete: bool = True) -> List[int]:
+        """Indices of the best matching items for a query, best first
+
+        Unless complete, only the shortest QUICK_SCAN_LIMIT candidates are
+        checked and misspelt queries aren't looked for.
+        """
+        query = default_process(query)
+        tokens = query.split()
+        if not tokens:
+            return list(range(min(self.limit, len(self._items))))
+
+        last = self._last
+        if last is not None and query.startswith(last.query):
+            # A longer query can only rule items out
+            source = last.remaining()
+        else:
+            chars = set(query) - {" "}
+            source = min(
+                (self._postings.get(c, []) for c in chars), key=len, default=[]
+            )
+        candidates = _Candidates(query, source)
+        self._last = candidates
+        self._scan(
+            candidates,
+            tokens,
+            self.limit * PRESELECT_FACTOR,
+            None if complete else QUICK_SCAN_LIMIT,
+        )
+
+        preselected = candidates.found[: self.limit * PRESELECT_FACTOR]
+        results = process.extract(
+            query,
+            [self._texts[i] for i in preselected],
+            scorer=fuzz.token_set_ratio,
+            processor=None,
+            limit=self.limit,
+            score_cutoff=self.score_cutoff,
+        )
+        indices = [preselected[position] for _, _, position in results]
+        if complete and len(indices) < self.limit:
+            exact = set(indices)
+            for i in self._match_misspelt(tokens):
+                if len(indices) >= self.limit:
+                    break
+                if i not in exact:
+                    indices.append(i)
+        return indices
+
+    def _scan(
+        self,
+        candidates: _Candidates,
+        tokens: List[str],
+        needed: int,
+        budget: Optional[int] = None,
+    ) -> None:
+        """Check candidates until enough match or none are left
+
+        Stops early once budget candidates have been checked, if given.
+        """
+        query_mask = 0
+        for token in tokens:
+            query_mask |= _char_mask(token)
+        masks = self._masks
+        texts = self._texts
+        # Single characters are fully checked by the mask, longer tokens
+        # also have to appear in order
+        searches = [_subsequence_search(token) for token in tokens if len(token) > 1]
+        source = candidates.source
+        stop = len(source) if budget is None else candidates.position + budget
+        while len(candidates.found) < needed and candidates.position < stop:
+            end = candidates.position + SCAN_CHUNK
+            chunk = [
+                i
+                for i in source[candidates.position : end]
+                if masks[i] & query_mask == query_mask
+            ]
+            for search in searches:
+                chunk = [i for i in chunk if search(texts[i])]
+            candidates.found.extend(chunk)
+            candidates.position = end
+
+    def _match_misspelt(self, tokens: List[str]) -> List[int]:
+        """Items with a word close to every query token, closest first"""
+        if self._vocabulary is None:
+            self._vocabulary = list(self._words)
+            self._prefixes = {}
+        vocabulary = self._vocabulary
+
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            # The last token may still be being typed, so words are
+            # compared by their start
+            prefixes = self._prefixes.get(len(token))
+            if prefixes is None:
+                prefixes = [word[: len(token)] for word in vocabulary]
+                self._prefixes[len(token)] = prefixes
+            token_scores: Dict[int, float] = {}
+            for _, score, position in process.extract_iter(
+                token,
+                prefixes,
+                scorer=fuzz.ratio,
+                processor=None,
+                score_cutoff=FALLBACK_CUTOFF,
+            ):
+                for i in self._words[vocabulary[position]]:
+                    if score > token_scores.get(i, 0):
+                        token_scores[i] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    i: scores[i] + score
+                    for i, score in token_scores.items()
+                    if i in scores
+                }
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda i: (-scores[i], len(self._texts[i]), i))
+
+    def _length_key(self, index: int):
+        return (len(self._texts[index]), index)
+
+    def _index(self, index: int, keep_order: bool = False) -> None:
+        text = self._texts[index]
+        for c in set(text):
+            posting = self._postings.setdefault(c, [])
+            if keep_order:
+                bisect.insort(posting, index, key=self._length_key)
+            else:
+                posting.append(index)
+        for word in text.split():
+            if word not in self._words:
+                self._vocabulary = None
+            self._words.setdefault(word, set()).add(index)
+
+    def _unindex(self, index: int) -> None:
+        text = self._texts[index]
+        for c in set(text):
+            self._postings[c].remove(index)
+        for word in set(text.split()):
+            indices = self._words[word]
+            indices.discard(index)
+            if not indices:
+                del self._words[word]
+                self._vocabulary = None
@@ -0,0 +1,93 @@
+import re
+from typing import List, Optional
+from markdown.util import BLOCK_LEVEL_ELEMENTS
+
+FENCE_PATTERN = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+LIST_ITEM_PATTERN = re.compile(r"^ {0,3}(?:[-*+]|\d+[.)])\s")
+BLOCKQUOTE_PATTERN = re.compile(r"^ {0,3}>")
+
+# Raw HTML blocks run until their element is closed, blank lines included
+HTML_BLOCK_PATTERN = re.compile(r"^ {0,3}<([A-Za-z][A-Za-z0-9-]*)(?=[\s/>]|$)")
+HTML_COMMENT_START = "<!--"
+HTML_COMMENT_END = "-->"
+# Block-level elements without a closing tag
+HTML_VOID_ELEMENTS = {"hr"}
+
+# Markdown whose meaning depends on text elsewhere in the document, a
+# document using it can't be rendered block by block
+FOOTNOTE_PATTERN = re.compile(r"\[\^[^\]]+\]")
+REFERENCE_DEFINITION_PATTERN = re.compile(r"^ {0,3}\[[^\]]+\]:", re.MULTILINE)
+
+
+def _html_balance(name: str, line: str) -> int:
+    """Opening minus closing tags of an element on a line"""
+    opened = len(re.findall(rf"<{name}(?=[\s/>]|$)", line, re.IGNORECASE))
+    closed = len(re.findall(rf"</{name}\s*>|<{name}\b[^>]*/>", line, re.IGNORECASE))
+    return opened - closed
+
+
+def split_blocks(text: str) -> Optional[List[str]]:
+    """Split markdown into top-level blocks that render independently
+
+    Blocks are separated by blank lines, except inside fenced code, $$
+    display math and raw HTML elements or comments that haven't been
+    closed yet. Indented continuations, consecutive list items and
+    consecutive blockquotes stay with the block before them, so lists and
+    quotes aren't split. Returns None if the document uses footnotes or
+    reference links, which need the whole document to render.
+    """
+    if FOOTNOTE_PATTERN.search(text) or REFERENCE_DEFINITION_PATTERN.search(text):
+        return None
+
+    blocks: List[str] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    in_math = False
+    # Open raw HTML element and how deeply it is nested in itself
+    html_tag = ""
+    html_depth = 0
+    in_comment = False
+
+    def close_block() -> None:
+        if not current:
+            return
+        block = "\n".join(current)
+        first = current[0]
+        if blocks and (
+            first[:1].isspace()
+            or (LIST_ITEM_PATTERN.match(first) and LIST_ITEM_PATTERN.match(blocks[-1]))
+            or (
+                BLOCKQUOTE_PATTERN.match(first) and BLOCKQUOTE_PATTERN.match(blocks[-1])
+            )
+        ):
+            blocks[-1] += "\n\n" + block
+        else:
+            blocks.append(block)
+        current.clear()
+
+    for line in text.split("\n"):
+        in_html = html_depth > 0 or in_comment
+        if fence is None and not in_math and not in_html and not line.strip():
+            close_block()
+            continue
+        starts_block = not current
+        current.append(line)
+        if in_comment:
+            in_comment = HTML_COMMENT_END not in line
+        elif html_depth > 0:
+            html_depth += _html_balance(html_tag, line)
+        elif fence is not None:
+            if line.strip().startswith(fence):
+                fence = None
+        elif match := FENCE_PATTERN.match(line):
+            fence = match.group(1)
+        elif starts_block and line.lstrip().startswith(HTML_COMMENT_START):
+            in_comment = HTML_COMMENT_END not in line[line.index(HTML_COMMENT_START) :]
+        elif starts_block and (match := HTML_BLOCK_PATTERN.match(line)):
+            html_tag = match.group(1).lower()
+            if html_tag in BLOCK_LEVEL_ELEMENTS and html_tag not in HTML_VOID_ELEMENTS:
+                html_depth = _html_balance(html_tag, line)
+        elif line.count("$$") % 2:
+            in_math = not in_math
+    close_block()
+    return blocks
@@ -0,0 +1,29 @@
+import threading
+import markdown
+from markdown.extensions.wikilinks import WikiLinkExtension
+
+# Markdown instances are expensive to build and not thread safe, so each
+# thread keeps its own and resets it between documents
+_local = threading.local()
+
+
+def _markdown() -> markdown.Markdown:
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = markdown.Markdown(
+            extensions=[
+                "fenced_code",
+                "tables",
+                "footnotes",
+                WikiLinkExtension(
+                    base_url=""
+                ),  # TODO this is inconsistent, consider using scheme handler and prefixing with a url
+            ]
+        )
+        _local.md = md
+    return md.reset()
+
+
+def render_markdown(text: str) -> str:
+    """Convert markdown to HTML, safe to call from any thread"""
+    return _markdown().convert(text)
@@ -0,0 +1,169 @@
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from PySide6.QtCore import QObject, QUrl
+from PySide6.QtWebEngineCore import QWebEnginePage
+from widgets.text_edit.neovim_integration_and_highlighting import (
+    BLOCK_MATH_PATTERN,
+    INLINE_MATH_PATTERN,
+)
+
+KATEX_CACHE_DIR = Path.home() / ".config" / "draftsmith_qt" / "katex"
+
+# $$display$$ or $inline$, exactly one group matches
+MATH_PATTERN = re.compile(
+    f"{BLOCK_MATH_PATTERN.pattern}|{INLINE_MATH_PATTERN.pattern}", re.DOTALL
+)
+
+# Code is shown as written, math in it is left alone
+CODE_PATTERN = re.compile(r"(<pre[\s>].*?</pre>|<code[\s>].*?</code>)", re.DOTALL)
+
+# (TeX, display mode)
+MathExpression = Tuple[str, bool]
+
+SHELL_HTML = """<!DOCTYPE html>
+<html><head><script src="qrc:/katex/katex.min.js"></script></head><body></body></html>
+"""
+
+RENDER_JS = """
+(function (items) {
+    return items.map(([tex, display]) =>
+        katex.renderToString(tex, {displayMode: display, throwOnError: false})
+    );
+})(%s);
+"""
+
+
+def _expression_hash(expression: MathExpression) -> str:
+    tex, display = expression
+    prefix = "display" if display else "inline"
+    return hashlib.sha1(f"{prefix}:{tex}".encode()).hexdigest()
+
+
+class KatexPrerenderer(QObject):
+    """Renders math to HTML ahead of time with the bundled KaTeX
+
+    Each distinct expression is rendered once in a hidden web page and the
+    HTML is kept in memory and on disk, keyed by a hash of the expression.
+    Previews inline the HTML of expressions already rendered, so the
+    preview's KaTeX only has to typeset math it has never seen. Lookups
+    are safe from worker threads, rendering happens on the GUI thread.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = KATEX_CACHE_DIR,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self._rendered: Dict[str, str] = {}
+        # Keys known not to be on disk, so misses don't hit it on every preview
+        self._missing: Set[str] = set()
+        self._lock = threading.Lock()
+        # Expressions sent to the page or waiting for it to load
+        self._pending: Set[MathExpression] = set()
+        self._queue: List[MathExpression] = []
+
+        self._page = QWebEnginePage(self)
+        self._page_loaded = False
+        self._page.loadFinished.connect(self._on_load_finished)
+        self._page.setHtml(SHELL_HTML, QUrl("note:/"))
+
+    def inline(self, html: str) -> Tuple[str, List[MathExpression]]:
+        """Replace math in rendered markdown with its prerendered HTML
+
+        Returns:
+            The HTML with every known expression inlined, and the
+            expressions that have not been rendered yet
+        """
+        missing: List[MathExpression] = []
+
+        def replace(match: re.Match) -> str:
+            block, inline = match.groups()
+            tex = block if block is not None else inline
+            if "<" in tex:
+                # Markup inside, leave it to the preview
+                return match.group(0)
+            expression = (html_lib.unescape(tex), block is not None)
+            rendered = self._lookup(expression)
+            if rendered is None:
+                missing.append(expression)
+                return match.group(0)
+            return rendered
+
+        parts = CODE_PATTERN.split(html)
+        for i in range(0, len(parts), 2):
+            parts[i] = MATH_PATTERN.sub(replace, parts[i])
+        return "".join(parts), missing
+
+    def prerender(self, expressions: Iterable[MathExpression]) -> None:
+        """Render expressions that aren't cached yet, in the background"""
+        for expression in expressions:
+            if expression not in self._pending and self._lookup(expression) is None:
+                self._pending.add(expression)
+                self._queue.append(expression)
+        self._send()
+
+    def _lookup(self, expression: MathExpression) -> Optional[str]:
+        key = _expression_hash(expression)
+        with self._lock:
+            rendered = self._rendered.get(key)
+            known_missing = key in self._missing
+        if rendered is not None or known_missing or self.cache_dir is None:
+            return rendered
+        try:
+            rendered = (self.cache_dir / f"{key}.html").read_text(encoding="utf-8")
+        except OSError:
+            with self._lock:
+                # Unless it was stored while the file was being read
+                rendered = self._rendered.get(key)
+                if rendered is None:
+                    self._missing.add(key)
+            return rendered
+        with self._lock:
+            self._rendered[key] = rendered
+        return rendered
+
+    def _on_load_finished(self, ok: bool) -> None:
+        self._page_loaded = ok
+        if ok:
+            self._send()
+
+    def _send(self) -> None:
+        if not self._page_loaded or not self._queue:
+            return
+        batch, self._queue = self._queue, []
+        self._page.runJavaScript(
+            RENDER_JS % json.dumps(batch),
+            lambda results: self._on_rendered(batch, results),
+        )
+
+    def _on_rendered(self, batch: List[MathExpression], results) -> None:
+        self._pending.difference_update(batch)
+        if not isinstance(results, list) or len(results) != len(batch):
+            print("Error prerendering math: KaTeX returned no result")
+            return
+        for expression, rendered in zip(batch, results):
+            if isinstance(rendered, str):
+                self._store(_expression_hash(expression), rendered)
+
+    def _store(self, key: str, rendered: str) -> None:
+        with self._lock:
+            self._rendered[key] = rendered
+            self._missing.discard(key)
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.html"
+            temp_path = path.with_name(path.name + ".tmp")
+            temp_path.write_text(rendered, encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing KaTeX cache: {e}")
@@ -1,5 +1,6 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QComboBox
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QStandardItemModel
 from .notes_tree import NotesTreeWidget
 from .search_sidebar import SearchSidebar
 
@@ -16,10 +17,14 @@ class LeftSidebar(QWidget):
         self._connect_signals()
 
     def _setup_ui(self):
-        self.tree.setHeaderLabel("Notes")
+        # The notes tree's header label comes from its model
         self.tree.setMinimumWidth(100)
 
-        self.tags_tree.setHeaderLabel("Tags")
+        # The tags view has no model of its own yet, an empty one carries
+        # its header label
+        tags_model = QStandardItemModel(0, 1, self.tags_tree)
+        tags_model.setHorizontalHeaderLabels(["Tags"])
+        self.tags_tree.setModel(tags_model)
         self.tags_tree.setMinimumWidth(100)
         self.tags_tree.hide()  # Initially hidden
 
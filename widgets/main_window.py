@@ -5,11 +5,14 @@ from PySide6.QtWidgets import QMainWindow, QStatusBar, QApplication
 from PySide6.QtGui import QAction
 from api.client import Tag
 from PySide6.QtGui import QKeySequence, QShortcut
-from PySide6.QtCore import Qt
 from models.note import Note
 from ui.menu_handler import MenuHandler
 from ui.tab_handler import TabHandler
 from models.notes_model import NotesModel
+from models.notes_snapshot import NotesSnapshot
+from models.mutation_journal import MutationJournal
+from models.render_cache import RenderCache
+from widgets.katex_prerender import KatexPrerenderer
 from models.navigation_model import NavigationModel
 from widgets.tab_content import TabContent
 from widgets.note_id_link_insert import NoteLinkInsertPalette
@@ -18,7 +21,13 @@ from app_types import HierarchyLevel
 
 
 class NoteApp(QMainWindow):
-    def __init__(self, actions: Dict[str, QAction], api_url: str = "http://eir:37242"):
+    def __init__(
+        self,
+        actions: Dict[str, QAction],
+        api_url: str = "http://eir:37242",
+        lazy_content: bool = False,
+        use_snapshot: bool = True,
+    ):
         super().__init__()
         self._actions = actions
         self._zoom_level = 0  # Track zoom level
@@ -26,7 +35,16 @@ class NoteApp(QMainWindow):
         self.api_url = api_url
 
         # Add notes model and load data
-        self.notes_model = NotesModel(api_url)
+        self.notes_model = NotesModel(
+            api_url,
+            lazy_content=lazy_content,
+            snapshot=NotesSnapshot.for_server(api_url) if use_snapshot else None,
+            journal_path=MutationJournal.path_for_server(api_url),
+        )
+
+        # Rendered previews and typeset math, shared by every tab
+        self.render_cache = RenderCache()
+        self.math_prerenderer = KatexPrerenderer(parent=self)
 
         # Initialize navigation model
         self.navigation_model = NavigationModel()
@@ -45,7 +63,7 @@ class NoteApp(QMainWindow):
         self.menu_handler.view_actions["toggle_right_sidebar"] = self._actions[
             "toggle_right_sidebar"
         ]
-        
+
         # Create dict of view actions for tabs
         self.tab_view_actions = {
             "maximize_editor": self._actions["maximize_editor"],
@@ -61,13 +79,12 @@ class NoteApp(QMainWindow):
         # Connect the model to the tree - do this before loading notes
         self.main_content.left_sidebar.tree.set_model(self.notes_model)
 
-        # Now load the notes
+        # Now load the notes, from the local snapshot first if there is one
         self.notes_model.load_notes()  # Load notes at startup
 
         # Connect note selection to right sidebar updates
         self.notes_model.note_selected.connect(self.update_right_sidebar)
 
-
         self.setup_command_palette()
 
     def setup_window(self):
@@ -76,7 +93,8 @@ class NoteApp(QMainWindow):
         self.status_bar.showMessage("Ready")
 
         self.handle_size = 20
-        self.setWindowTitle("Note Taking App")
+        # [*] shows while any tab has unsaved edits
+        self.setWindowTitle("Note Taking App[*]")
         self.setGeometry(100, 100, 1000, 600)
 
     def setup_command_palette(self) -> None:
@@ -148,6 +166,9 @@ class NoteApp(QMainWindow):
     def new_tab(self) -> None:
         self.tab_handler.new_tab()
 
+    def save_all_notes(self) -> None:
+        self.tab_handler.save_all_tabs()
+
     def close_current_tab(self) -> None:
         self.tab_handler.close_current_tab()
 
@@ -161,26 +182,26 @@ class NoteApp(QMainWindow):
         """Create a new note and select it in the tree"""
         current_tab = self.tab_handler.tab_widget.currentWidget()
         if isinstance(current_tab, TabContent):
-            if note := current_tab.handle_new_note_request(level):
-                id = note.id
-                self.status_bar.showMessage(f"Created new note: #{id}", 3000)
-            else:
-                self.status_bar.showMessage("Failed to create note", 3000)
+            current_tab.handle_new_note_request(level, self._handle_note_created)
+
+    def _handle_note_created(self, note: Optional[Note]) -> None:
+        if note:
+            self.status_bar.showMessage(f"Created new note: #{note.id}", 3000)
+        else:
+            self.status_bar.showMessage("Failed to create note", 3000)
 
     def save_current_note(self) -> None:
         """Save the current note's content"""
-        current_note = self.main_content.left_sidebar.tree.currentItem()
-        if current_note:
-            note_data = current_note.data(0, Qt.ItemDataRole.UserRole)
-            if note_data:
-                content = self.main_content.editor.get_content()
-                success = self.notes_model.update_note(note_data.id, content=content)
-
-                if success:
-                    self._reload_with_preserved_state()
-                    self.status_bar.showMessage("Note saved successfully", 3000)
-                else:
-                    self.status_bar.showMessage("Failed to save note", 3000)
+        note_data = self.main_content.left_sidebar.tree.current_note()
+        if note_data:
+            content = self.main_content.editor.get_content()
+            success = self.notes_model.update_note(note_data.id, content=content)
+
+            if success:
+                self._reload_with_preserved_state()
+                self.status_bar.showMessage("Note saved successfully", 3000)
+            else:
+                self.status_bar.showMessage("Failed to save note", 3000)
 
     def _reload_with_preserved_state(self) -> None:
         """Helper method to reload notes while preserving UI state"""
@@ -188,12 +209,8 @@ class NoteApp(QMainWindow):
         cursor_pos = self.main_content.editor.get_cursor_position()
 
         # Store current note ID and tree state
-        current_item = self.main_content.left_sidebar.tree.currentItem()
-        current_note_id = None
-        if current_item:
-            note_data = current_item.data(0, Qt.ItemDataRole.UserRole)
-            if note_data:
-                current_note_id = note_data.id
+        current_note = self.main_content.left_sidebar.tree.current_note()
+        current_note_id = current_note.id if current_note else None
 
         # Save the tree state
         tree_state = self.main_content.left_sidebar.tree.save_state()
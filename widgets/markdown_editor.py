@@ -11,6 +11,7 @@ from PySide6.QtWebEngineCore import (
     QWebEngineProfile,
 )
 
+from PySide6.QtGui import QDesktopServices
 from PySide6.QtWidgets import QApplication, QWidget, QSplitter, QVBoxLayout
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtCore import (
@@ -22,8 +23,15 @@ from PySide6.QtCore import (
     QDirIterator,
     QDir,
 )
-import markdown
-from markdown.extensions.wikilinks import WikiLinkExtension
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from models.render_cache import RenderCache, render_key
+from models.request_executor import Lane, RequestExecutor
+from utils.content_hash import content_hash
+from utils.markdown_blocks import split_blocks
+from utils.markdown_render import render_markdown
+from widgets.katex_prerender import KatexPrerenderer, MathExpression
 from widgets.text_edit.neovim_integration_and_highlighting import MDEditor
 
 
@@ -44,6 +52,45 @@ def register_scheme(
 register_scheme("note")
 register_scheme("qrc")
 
+# Same as static/katex/dist/config.js, for math in blocks patched in later
+KATEX_OPTIONS = {
+    "delimiters": [
+        {"left": "$$", "right": "$$", "display": True},
+        {"left": "$", "right": "$", "display": False},
+        {"left": "\\(", "right": "\\)", "display": False},
+        {"left": "\\[", "right": "\\]", "display": True},
+    ],
+    "throwOnError": False,
+}
+
+# Replaces the preview's body, the page with its scripts and stylesheets
+# stays loaded and keeps its scroll position
+SET_BODY_JS = """
+(function (html, options) {
+    const root = document.querySelector(".markdown");
+    root.innerHTML = html;
+    renderMathInElement(root, options);
+})(%s, %s);
+"""
+
+# Replaces `count` blocks of the preview from `start` on with new ones and
+# typesets the math in just those
+PATCH_BLOCKS_JS = """
+(function (start, count, html, options) {
+    const root = document.querySelector(".markdown");
+    for (let i = 0; i < count; i++) {
+        root.removeChild(root.children[start]);
+    }
+    const template = document.createElement("template");
+    template.innerHTML = html;
+    const added = Array.from(template.content.children);
+    root.insertBefore(template.content, root.children[start] || null);
+    for (const node of added) {
+        renderMathInElement(node, options);
+    }
+})(%s, %s, %s, %s);
+"""
+
 
 class AssetUrlInterceptor(QWebEngineUrlRequestInterceptor):
     def __init__(self, parent=None, base_api_url=None, access_token=None):
@@ -96,22 +143,59 @@ class NoteLinkPage(QWebEnginePage):
             except ValueError:
                 print(f"Failed to parse note ID from: {path}")
                 return False
+        if type == QWebEnginePage.NavigationType.NavigationTypeLinkClicked:
+            # The preview only shows notes, other links open outside the app
+            QDesktopServices.openUrl(url)
+            return False
         return True
 
 
+@dataclass
+class PreviewUpdate:
+    """A local render, ready to go into the preview"""
+
+    version: int
+    # Hashes of the document's blocks, None if it was rendered as a whole
+    keys: Optional[List[str]]
+    html: str
+    # Blocks of the page replaced by html, the whole body if start is None
+    start: Optional[int] = None
+    count: int = 0
+    # Math in html that has no prerendered HTML yet
+    missing_math: List[MathExpression] = field(default_factory=list)
+
+
 class MarkdownEditor(QWidget):
     preview_requested = Signal()  # Pull the initial preview
     render_requested = Signal(str)  # Send up the content and get back the rendered HTML
     note_selected = Signal(int)  # Emitted when a note link is clicked
-
-    def __init__(self, api_url: str, dark_mode=False, parent=None):
+    modification_changed = Signal(bool)  # Unsaved edits appeared or went away
+
+    def __init__(
+        self,
+        api_url: str,
+        dark_mode=False,
+        parent=None,
+        render_cache: Optional[RenderCache] = None,
+        math_prerenderer: Optional[KatexPrerenderer] = None,
+    ):
         super().__init__(parent)
+        # Rendered HTML by content, usually shared with the other tabs
+        self.render_cache = render_cache if render_cache is not None else RenderCache()
+        # Typesets math ahead of the preview, shared with the other tabs
+        self.math_prerenderer = math_prerenderer
         self._remote_rendering_action = None
-        self._current_scroll_handler = None  # Track current scroll handler
+        # Runs local renders off the GUI thread once set, see set_executor
+        self.executor: Optional[RequestExecutor] = None
+        self._render_version = 0
+        # Content hashes of the blocks shown in the preview, in order, None
+        # when the preview wasn't rendered block by block
+        self._preview_blocks: Optional[List[str]] = None
+        # The page shell is loaded once, bodies arriving before it has
+        # finished loading wait here
+        self._preview_loaded = False
+        self._pending_body: Optional[str] = None
         # The delay stops flickering images when typing, but still updates quickly
-        # Also the scroll doesn't bounce around, it's managed by JS not Py
-        # so if updates are too quick the scroll position is lost and resets
-        # to the top. Overall this buffer is a lot smoother.
         self.update_delay = 200
 
         # Create horizontal splitter for side-by-side view
@@ -120,6 +204,7 @@ class MarkdownEditor(QWidget):
         # Create editor
         self.editor = MDEditor()
         self.editor.textChanged.connect(self.on_text_changed)
+        self.editor.document().modificationChanged.connect(self.modification_changed)
 
         # Set up WebEngine profile and handlers
         self.profile = QWebEngineProfile.defaultProfile()
@@ -139,6 +224,8 @@ class MarkdownEditor(QWidget):
             NoteLinkPage(self, self.profile)
         )  # Pass self (MarkdownEditor) instead of preview
 
+        self.preview.loadFinished.connect(self._on_preview_load_finished)
+
         self.preview.settings().setAttribute(
             self.preview.settings().WebAttribute.JavascriptEnabled, True
         )
@@ -165,23 +252,14 @@ class MarkdownEditor(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
 
+        # Load the page shell, every preview after this only swaps its body
+        self._load_preview_shell()
+
     def apply_dark_theme(self, dark_mode: bool):
         self.preview.settings().setAttribute(
             self.preview.settings().WebAttribute.ForceDarkMode, dark_mode
         )
 
-    def _get_scroll_position(self):
-        self.preview.page().runJavaScript(
-            "window.scrollY", self._update_preview_with_scroll
-        )
-
-    def _update_preview_with_scroll(self, scroll_pos):
-        self._last_scroll = scroll_pos
-        if self._remote_rendering_action and self._remote_rendering_action.isChecked():
-            self.render_requested.emit(self.editor.toPlainText())
-        else:
-            self.update_preview_local()
-
     def on_text_changed(self):
         """
         Sync the Preview with the Editor
@@ -193,26 +271,77 @@ class MarkdownEditor(QWidget):
         """
         Update the preview with a new note
         """
-        self._get_scroll_position()  # This will trigger the update chain through _update_preview_with_scroll
+        if self._remote_rendering_action and self._remote_rendering_action.isChecked():
+            self.render_requested.emit(self.editor.toPlainText())
+        else:
+            self.update_preview_local()
 
-    def set_preview_content(self, html: str):
-        styled_html = self._apply_html_template(html)
+    def set_executor(self, executor: RequestExecutor):
+        self.executor = executor
 
-        # Safely disconnect previous handler if it exists
-        if self._current_scroll_handler is not None:
-            try:
-                self.preview.loadFinished.disconnect(self._current_scroll_handler)
-            except TypeError:
-                pass  # Handler was already disconnected
+    def set_preview_content(
+        self, html: str, missing_math: Optional[List[MathExpression]] = None
+    ):
+        """Show HTML rendered elsewhere in the preview
 
-        # Create and store new handler
-        self._current_scroll_handler = lambda: self.preview.page().runJavaScript(
-            f"window.scrollTo(0, {getattr(self, '_last_scroll', 0)});"
+        Math is inlined on a worker thread first, unless missing_math is
+        given because html already went through inline_math.
+        """
+        # Local renders still on their way are outdated now
+        self._render_version += 1
+        if missing_math is not None:
+            self._apply_preview_update(
+                PreviewUpdate(
+                    self._render_version, None, html, missing_math=missing_math
+                )
+            )
+            return
+        args = (self._render_version, html)
+        if self.executor is None:
+            self._apply_preview_update(self._inline_preview(*args))
+            return
+        self.executor.submit(
+            self._inline_preview,
+            *args,
+            key=f"markdown:{id(self)}",
+            lane=Lane.INTERACTIVE,
+            on_result=self._apply_preview_update,
+            on_error=lambda e: print(f"Error inlining math: {e}"),
         )
 
-        # Connect new handler
-        self.preview.loadFinished.connect(self._current_scroll_handler)
-        self.preview.setHtml(styled_html, QUrl("note:/"))
+    def _inline_preview(self, version: int, html: str) -> PreviewUpdate:
+        """Inline math into rendered HTML, runs on a worker thread"""
+        html, missing_math = self.inline_math(html)
+        return PreviewUpdate(version, None, html, missing_math=missing_math)
+
+    def _load_preview_shell(self):
+        self._preview_loaded = False
+        self.preview.setHtml(self._apply_html_template(""), QUrl("note:/"))
+
+    def _on_preview_load_finished(self, ok: bool):
+        if self.preview.url().scheme() != "note":
+            # Something navigated the preview away from the shell, load it
+            # again and render the whole note into it. Renders still on their
+            # way were made for the old page's blocks.
+            self._render_version += 1
+            self._preview_blocks = None
+            self._pending_body = None
+            self._load_preview_shell()
+            self.update_timer.start(0)
+            return
+        self._preview_loaded = ok
+        if ok and self._pending_body is not None:
+            self._set_preview_body(self._pending_body)
+
+    def _set_preview_body(self, html: str):
+        """Replace the preview's body, or queue it until the shell has loaded"""
+        if not self._preview_loaded:
+            self._pending_body = html
+            return
+        self._pending_body = None
+        self.preview.page().runJavaScript(
+            SET_BODY_JS % (json.dumps(html), json.dumps(KATEX_OPTIONS))
+        )
 
     def _get_css_resources(self) -> str:
         """Generate CSS link tags for all CSS files in resources
@@ -259,39 +388,114 @@ class MarkdownEditor(QWidget):
         """
 
     def update_preview_local(self):
-        # Convert markdown to HTML
-        md = markdown.Markdown(
-            extensions=[
-                "fenced_code",
-                "tables",
-                "footnotes",
-                WikiLinkExtension(
-                    base_url=""
-                ),  # TODO this is inconsistent, consider using scheme handler and prefixing with a url
-            ]
-        )
+        """Render the editor's markdown into the preview
 
-        html = md.convert(self.editor.toPlainText())
-        styled_html = self._apply_html_template(html)
-
-        # Safely disconnect previous handler if it exists
-        if self._current_scroll_handler is not None:
-            try:
-                self.preview.loadFinished.disconnect(self._current_scroll_handler)
-            except TypeError:
-                pass  # Handler was already disconnected
+        The document is rendered block by block on a worker thread. Once
+        the preview shows blocks only those that changed are rendered and
+        patched into it, so KaTeX only typesets the new blocks. Documents
+        that need rendering as a whole are rendered in full. Renders are
+        numbered and only the newest one is applied.
+        """
+        self._render_version += 1
+        old_keys = self._preview_blocks if self._preview_loaded else None
+        args = (self._render_version, self.editor.toPlainText(), old_keys)
+        if self.executor is None:
+            self._apply_preview_update(self._render_preview(*args))
+            return
+        # A newer edit supersedes any render still queued for this editor
+        self.executor.submit(
+            self._render_preview,
+            *args,
+            key=f"markdown:{id(self)}",
+            lane=Lane.INTERACTIVE,
+            on_result=self._apply_preview_update,
+            on_error=lambda e: print(f"Error rendering markdown: {e}"),
+        )
 
-        # Create and store new handler
-        self._current_scroll_handler = lambda: self.preview.page().runJavaScript(
-            f"window.scrollTo(0, {getattr(self, '_last_scroll', 0)});"
+    def _render_preview(
+        self, version: int, content: str, old_keys: Optional[List[str]]
+    ) -> PreviewUpdate:
+        """Render what changed since old_keys, runs on a worker thread"""
+        blocks = split_blocks(content)
+        if blocks is None:
+            html, missing_math = self.inline_math(
+                self._render_markdown(content, "local")
+            )
+            return PreviewUpdate(version, None, html, missing_math=missing_math)
+
+        keys = [content_hash(block) for block in blocks]
+        if old_keys is None:
+            html, missing_math = self.inline_math(
+                "".join(self._render_block(block) for block in blocks)
+            )
+            return PreviewUpdate(version, keys, html, missing_math=missing_math)
+
+        # Only the run of blocks between the unchanged head and tail differs
+        start = 0
+        while start < min(len(keys), len(old_keys)) and keys[start] == old_keys[start]:
+            start += 1
+        end, old_end = len(keys), len(old_keys)
+        while (
+            end > start and old_end > start and keys[end - 1] == old_keys[old_end - 1]
+        ):
+            end -= 1
+            old_end -= 1
+        html, missing_math = self.inline_math(
+            "".join(self._render_block(block) for block in blocks[start:end])
         )
+        return PreviewUpdate(version, keys, html, start, old_end - start, missing_math)
+
+    def inline_math(self, html: str) -> Tuple[str, List[MathExpression]]:
+        """Inline prerendered math, safe to call from worker threads"""
+        if self.math_prerenderer is None:
+            return html, []
+        return self.math_prerenderer.inline(html)
+
+    def _prerender_math(self, expressions: List[MathExpression]):
+        # Not in time for this preview, but for every later one
+        if self.math_prerenderer is not None and expressions:
+            self.math_prerenderer.prerender(expressions)
+
+    def _apply_preview_update(self, update: PreviewUpdate):
+        self._prerender_math(update.missing_math)
+        if update.version != self._render_version:
+            return  # Newer text has been sent for rendering
+        self._preview_blocks = update.keys
+        if update.start is None:
+            self._set_preview_body(update.html)
+        elif update.html or update.count:
+            self.preview.page().runJavaScript(
+                PATCH_BLOCKS_JS
+                % (
+                    update.start,
+                    update.count,
+                    json.dumps(update.html),
+                    json.dumps(KATEX_OPTIONS),
+                )
+            )
+
+    def _render_block(self, block: str) -> str:
+        html = self._render_markdown(block, "local-block")
+        return f'<div class="md-block">{html}</div>'
 
-        # Connect new handler
-        self.preview.loadFinished.connect(self._current_scroll_handler)
-        self.preview.setHtml(styled_html, QUrl("note:/"))
+    def _render_markdown(self, content: str, renderer: str) -> str:
+        key = render_key(content, renderer)
+        html = self.render_cache.get(key)
+        if html is None:
+            html = render_markdown(content)
+            self.render_cache.put(key, html)
+        return html
 
     def set_content(self, content: str):
         self.editor.setPlainText(content)
+        self.set_modified(False)
+
+    def is_modified(self) -> bool:
+        """Whether the text has changed since it was loaded or saved"""
+        return self.editor.document().isModified()
+
+    def set_modified(self, modified: bool):
+        self.editor.document().setModified(modified)
 
     def maximize_editor(self, checked: bool):
         if checked:
@@ -1,11 +1,11 @@
-from typing import Optional
-from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem, QMenu
-from PySide6.QtCore import Qt, Signal, QEvent
+from typing import List
+from PySide6.QtWidgets import QTreeView, QMenu
+from PySide6.QtCore import Qt, Signal, QEvent, QModelIndex
 from PySide6.QtGui import QKeyEvent
 from utils.key_constants import Key
 
 
-class NavigableTree(QTreeWidget):
+class NavigableTree(QTreeView):
     """Base class for tree widgets with keyboard navigation"""
 
     note_selected = Signal(int)  # Emitted when a note is selected
@@ -17,39 +17,46 @@ class NavigableTree(QTreeWidget):
         super().__init__(parent)
         self.current_fold_level: int = -1  # -1 means all collapsed
 
+    def child_indexes(self, parent: QModelIndex = QModelIndex()) -> List[QModelIndex]:
+        """All child indexes of parent, fetching any rows not loaded yet"""
+        model = self.model()
+        if model is None:
+            return []
+        while model.canFetchMore(parent):
+            model.fetchMore(parent)
+        return [model.index(row, 0, parent) for row in range(model.rowCount(parent))]
+
     def set_fold_level_recursive(
-        self, item: QTreeWidgetItem, current_depth: int, max_depth: int
+        self, index: QModelIndex, current_depth: int, max_depth: int
     ):
         """Recursively set fold level of items."""
         if current_depth <= max_depth:
-            item.setExpanded(True)
-            for i in range(item.childCount()):
-                self.set_fold_level_recursive(
-                    item.child(i), current_depth + 1, max_depth
-                )
+            self.setExpanded(index, True)
+            for child in self.child_indexes(index):
+                self.set_fold_level_recursive(child, current_depth + 1, max_depth)
         else:
-            item.setExpanded(False)
+            self.setExpanded(index, False)
 
     def get_max_depth(
-        self, item: Optional[QTreeWidgetItem] = None, current_depth: int = 0
+        self, index: QModelIndex = QModelIndex(), current_depth: int = 0
     ) -> int:
         """Get the maximum depth of the tree."""
-        if item is None:
+        if not index.isValid():
             max_depth = 0
-            for i in range(self.topLevelItemCount()):
-                depth = self.get_max_depth(self.topLevelItem(i))
+            for child in self.child_indexes():
+                depth = self.get_max_depth(child)
                 max_depth = max(max_depth, depth)
             return max_depth
 
         max_child_depth = current_depth
-        for i in range(item.childCount()):
-            depth = self.get_max_depth(item.child(i), current_depth + 1)
+        for child in self.child_indexes(index):
+            depth = self.get_max_depth(child, current_depth + 1)
             max_child_depth = max(max_child_depth, depth)
         return max_child_depth
 
     def cycle_fold_level_of_all_items(self):
         """Cycle the fold level of all items in the tree."""
-        if self.topLevelItemCount() == 0:
+        if self.model() is None or not self.model().hasChildren():
             return
 
         max_depth = self.get_max_depth()
@@ -61,32 +68,17 @@ class NavigableTree(QTreeWidget):
         if self.current_fold_level == max_depth:
             self.current_fold_level = -1
 
-            # Explicitly collapse all items at every level
-            def collapse_all(item: Optional[QTreeWidgetItem] = None):
-                items = []
-                if item is None:
-                    for i in range(self.topLevelItemCount()):
-                        items.append(self.topLevelItem(i))
-                else:
-                    items = [item]
-
-                for current in items:
-                    current.setExpanded(False)
-                    for i in range(current.childCount()):
-                        collapse_all(current.child(i))
-
-            collapse_all()
+            # Collapse every item at every level
+            self.collapseAll()
         else:
-            for i in range(self.topLevelItemCount()):
-                self.set_fold_level_recursive(
-                    self.topLevelItem(i), 0, self.current_fold_level
-                )
+            for index in self.child_indexes():
+                self.set_fold_level_recursive(index, 0, self.current_fold_level)
 
     def _handle_return(self, event: QKeyEvent) -> bool:
         """Handle Return/Enter key press"""
-        current = self.currentItem()
-        if current:
-            note_data = current.data(0, Qt.ItemDataRole.UserRole)
+        current = self.currentIndex()
+        if current.isValid():
+            note_data = current.data(Qt.ItemDataRole.UserRole)
             if note_data:
                 if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
                     self.note_selected_with_focus.emit(note_data.id)
@@ -125,16 +117,15 @@ class NavigableTree(QTreeWidget):
 
         # Add basic menu items - subclasses can override this method to add more items
         expand_action = menu.addAction("Expand")
-        expand_action.triggered.connect(lambda: self.currentItem().setExpanded(True))
+        expand_action.triggered.connect(lambda: self.expand(self.currentIndex()))
 
         collapse_action = menu.addAction("Collapse")
-        collapse_action.triggered.connect(lambda: self.currentItem().setExpanded(False))
+        collapse_action.triggered.connect(lambda: self.collapse(self.currentIndex()))
 
         return menu
 
     def contextMenuEvent(self, event):
         """Handle right click events"""
-        current_item = self.currentItem()
-        if current_item:
+        if self.currentIndex().isValid():
             menu = self._create_context_menu()
             menu.exec(event.globalPos())
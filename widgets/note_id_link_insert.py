@@ -1,6 +1,6 @@
 from typing import Optional
-from PySide6.QtWidgets import QListWidgetItem, QTextEdit
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QTextEdit
+from models.note import Note
 from .palette_populated_with_notes import PalettePopulatedWithNotes
 
 
@@ -15,9 +15,8 @@ class NoteLinkInsertPalette(PalettePopulatedWithNotes):
         self.search_input.setPlaceholderText("Select note to link to...")
         self.original_cursor_position = None
 
-    def on_item_activated(self, item: QListWidgetItem) -> None:
+    def on_item_activated(self, note: Note) -> None:
         """Handle note link insertion"""
-        note = item.data(Qt.ItemDataRole.UserRole)
         if note and self.parent():
             # The parent is TabContent, which has direct access to the editor
             if hasattr(self.parent(), "editor") and hasattr(
@@ -56,10 +55,7 @@ class NoteLinkInsertPalette(PalettePopulatedWithNotes):
 
     def hide(self) -> None:
         """Restore cursor position if no selection was made"""
-        if (
-            not self.results_list.currentItem()
-            and self.original_cursor_position is not None
-        ):
+        if self.current_item() is None and self.original_cursor_position is not None:
             if self.parent():
                 # The parent is TabContent, which has direct access to the editor
                 if hasattr(self.parent(), "editor") and hasattr(
@@ -1,6 +1,5 @@
 from typing import Optional
-from PySide6.QtWidgets import QListWidgetItem
-from PySide6.QtCore import Qt
+from models.note import Note
 from .palette_populated_with_notes import PalettePopulatedWithNotes
 
 
@@ -12,9 +11,8 @@ class NoteSelectPalette(PalettePopulatedWithNotes):
         self.search_input.setPlaceholderText("Type note title...")
         self.original_note_id = None
 
-    def on_item_activated(self, item: QListWidgetItem) -> None:
+    def on_item_activated(self, note: Note) -> None:
         """Handle note selection"""
-        note = item.data(Qt.ItemDataRole.UserRole)
         if note and self.parent():
             # Update the view and focus the tree item
             self.parent()._handle_view_request_with_focus(note.id)
@@ -35,11 +33,7 @@ class NoteSelectPalette(PalettePopulatedWithNotes):
 
     def hide(self) -> None:
         """Restore original note when hiding if no selection was made"""
-        if (
-            not self.results_list.currentItem()
-            and self.original_note_id
-            and self.parent()
-        ):
+        if self.current_item() is None and self.original_note_id and self.parent():
             # Restore original note
             self.parent()._handle_view_request(self.original_note_id)
         super().hide()
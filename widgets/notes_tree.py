@@ -1,9 +1,10 @@
-from typing import Optional, Dict, Any, Set, List, Union
-from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem, QMenu
+from typing import Optional, Dict, Any, Set
+from PySide6.QtWidgets import QAbstractItemView, QMenu
 from PySide6.QtCore import (
     Qt,
     Signal,
-    QMimeData,
+    QModelIndex,
+    QPersistentModelIndex,
     QPropertyAnimation,
     QEasingCurve,
     Property,
@@ -12,6 +13,7 @@ from PySide6.QtCore import (
 from PySide6.QtGui import QPainter
 from models.note import Note
 from models.notes_model import NotesModel
+from models.notes_tree_model import NotesTreeModel, shared_tree_model
 from PySide6.QtGui import QKeyEvent, QPalette
 from utils.key_constants import Key
 from widgets.navigable_tree import NavigableTree
@@ -43,89 +45,107 @@ class NotesTreeWidget(NavigableTree):
         # Enable drag and drop
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
-        self.setDragDropMode(QTreeWidget.DragDropMode.InternalMove)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         self.notes_model: Optional[NotesModel] = None
+        self.tree_model: Optional[NotesTreeModel] = None
         self.follow_mode: bool = True  # Default to true for backward compatibility
-        self.itemSelectionChanged.connect(self._on_selection_changed)
+        # Set while selecting programmatically without notifying the model
+        self._suppress_selection_signal = False
+        # IDs of expanded notes, kept up to date so saving state is cheap
+        self._expanded_ids: Set[int] = set()
+        # Tree state saved while the model resets, restored once it has
+        self._reset_state: Optional[Dict[str, Any]] = None
+        self.expanded.connect(self._on_expanded)
+        self.collapsed.connect(self._on_collapsed)
 
         # Track hover item during drag
-        self.hover_item = None
+        self.hover_item = QPersistentModelIndex()
         self.hover_animation = None
         self.hover_opacity = HoverOpacity()
 
         # Cut/paste tracking
-        self.cut_item = None  # Store reference to cut item
+        self.cut_item = QPersistentModelIndex()  # Index of the cut item
 
     def set_model(self, model: "NotesModel"):
         """Set the notes model for this tree widget"""
         # First disconnect from old model if it exists
-        if self.notes_model is not None:
+        if self.tree_model is not None:
             try:
-                self.notes_model.notes_updated.disconnect(self.update_tree_from_model)
-            except TypeError:  # Signal wasn't connected
+                self.tree_model.modelAboutToBeReset.disconnect(self._save_reset_state)
+                self.tree_model.modelReset.disconnect(self._restore_reset_state)
+            except (TypeError, RuntimeError):  # Signal wasn't connected
                 pass
 
         # Set new model
         self.notes_model = model
+        self.tree_model = shared_tree_model(model) if model is not None else None
+        self.setModel(self.tree_model)
 
         # Connect to new model if it exists
-        if self.notes_model is not None:
-            self.notes_model.notes_updated.connect(self.update_tree_from_model)
-            # Initial update
-            self.update_tree(self.notes_model.root_notes)
-
-    def update_tree_from_model(self):
-        """Callback for model updates to refresh the tree"""
-        if self.notes_model is not None:
-            # Save state before update
-            state = self.save_state()
-
-            # Update tree
-            self.update_tree(self.notes_model.root_notes)
+        if self.tree_model is not None:
+            # Only full refreshes reset the model, everything else arrives as
+            # targeted row changes that keep expansion and selection intact
+            self.tree_model.modelAboutToBeReset.connect(self._save_reset_state)
+            self.tree_model.modelReset.connect(self._restore_reset_state)
+            self.selectionModel().currentChanged.connect(self._on_selection_changed)
+
+    def _save_reset_state(self) -> None:
+        self._reset_state = self.save_state()
+        self.cut_item = QPersistentModelIndex()
+        # The view forgets every expanded row on reset
+        self._expanded_ids.clear()
+
+    def _on_expanded(self, index: QModelIndex) -> None:
+        self._expanded_ids.add(index.internalId())
+
+    def _on_collapsed(self, index: QModelIndex) -> None:
+        self._expanded_ids.discard(index.internalId())
+
+    def _restore_reset_state(self) -> None:
+        if self._reset_state:
+            self.restore_state(self._reset_state)
+        self._reset_state = None
+
+    def note_at(self, index: QModelIndex) -> Optional[Note]:
+        """Get the note shown at an index"""
+        if not index.isValid():
+            return None
+        return index.data(Qt.ItemDataRole.UserRole)
 
-            # Restore state after update
-            self.restore_state(state)
+    def current_note(self) -> Optional[Note]:
+        """Get the note of the current item"""
+        return self.note_at(self.currentIndex())
 
-    def _on_selection_changed(self):
+    def _on_selection_changed(self, *args):
         """Handle selection changes and notify model"""
-        if not self.follow_mode:
+        if not self.follow_mode or self._suppress_selection_signal:
             return
 
-        current = self.currentItem()
-        if current and self.notes_model:
-            note_data = current.data(0, Qt.ItemDataRole.UserRole)
-            if note_data:
-                self.notes_model.select_note(note_data.id)
+        note_data = self.current_note()
+        if note_data and self.notes_model:
+            self.notes_model.select_note(note_data.id)
 
     def select_note_by_id(self, note_id: int, emit_signal: bool = True) -> None:
         """Select the tree item corresponding to the given note ID"""
+        if self.tree_model is None:
+            return
 
-        def find_and_select_item(item):
-            # Check current item
-            note_data = item.data(0, Qt.ItemDataRole.UserRole)
-            if note_data and note_data.id == note_id:
-                self.blockSignals(not emit_signal)
-                self.setCurrentItem(item)
-                self.scrollToItem(item)
-                self.blockSignals(False)
-                return True
-
-            # Check children
-            for i in range(item.childCount()):
-                if find_and_select_item(item.child(i)):
-                    return True
-            return False
+        index = self.tree_model.index_for_note(note_id)
+        if not index.isValid():
+            return
 
-        # Search through top-level items
-        for i in range(self.topLevelItemCount()):
-            if find_and_select_item(self.topLevelItem(i)):
-                break
+        self._suppress_selection_signal = not emit_signal
+        try:
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
+        finally:
+            self._suppress_selection_signal = False
 
     def _handle_return(self, event: QKeyEvent) -> bool:
         """Handle return key press"""
-        current = self.currentItem()
-        if current:
-            note_data = current.data(0, Qt.ItemDataRole.UserRole)
+        current = self.currentIndex()
+        if current.isValid():
+            note_data = self.note_at(current)
             if note_data:
                 if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
                     self.note_selected_with_focus.emit(note_data.id)
@@ -148,23 +168,24 @@ class NotesTreeWidget(NavigableTree):
 
         # Handle tree-specific keys
         elif event.key() in (Key.Key_Space, Key.Key_Right, Key.Key_Left):
-            current = self.currentItem()
-            if current:
+            current = self.currentIndex()
+            if current.isValid():
+                has_children = self.model().hasChildren(current)
                 if event.key() == Key.Key_Left:
-                    if current.isExpanded():
-                        current.setExpanded(False)
-                    elif current.parent():
-                        self.setCurrentItem(current.parent())
+                    if self.isExpanded(current):
+                        self.setExpanded(current, False)
+                    elif current.parent().isValid():
+                        self.setCurrentIndex(current.parent())
                 elif event.key() == Key.Key_Right:
-                    if not current.isExpanded() and current.childCount() > 0:
-                        current.setExpanded(True)
-                    elif current.childCount() > 0:
-                        self.setCurrentItem(current.child(0))
+                    if not self.isExpanded(current) and has_children:
+                        self.setExpanded(current, True)
+                    elif has_children:
+                        self.setCurrentIndex(self.child_indexes(current)[0])
                 elif (
                     event.key() == Key.Key_Space
                     and not event.modifiers() & Qt.KeyboardModifier.ShiftModifier
                 ):
-                    current.setExpanded(not current.isExpanded())
+                    self.setExpanded(current, not self.isExpanded(current))
                 elif (
                     event.key() == Key.Key_Space
                     and event.modifiers() & Qt.KeyboardModifier.ShiftModifier
@@ -196,109 +217,86 @@ class NotesTreeWidget(NavigableTree):
             self.select_note_by_id(state["selected_item_id"])
 
     def _get_expanded_item_ids(self) -> Set[int]:
-        expanded_ids = set()
-
-        def recurse(item):
-            if item.isExpanded():
-                note_data = item.data(0, Qt.ItemDataRole.UserRole)
-                if note_data:
-                    expanded_ids.add(note_data.id)
-            for i in range(item.childCount()):
-                recurse(item.child(i))
-
-        for i in range(self.topLevelItemCount()):
-            recurse(self.topLevelItem(i))
-
-        return expanded_ids
+        if self.tree_model is None:
+            return set()
+
+        # Rows removed from the model drop out of the view's expanded set
+        # without a collapsed signal, so prune those here
+        stale = {
+            note_id
+            for note_id in self._expanded_ids
+            if not self.isExpanded(self.tree_model.loaded_index(note_id))
+        }
+        self._expanded_ids -= stale
+        return set(self._expanded_ids)
 
     def _set_expanded_items_by_id(self, expanded_ids: Set[int]) -> None:
         """Set expansion state only for items that exist in the tree"""
+        if self.tree_model is None:
+            return
 
-        def recurse(item):
-            note_data = item.data(0, Qt.ItemDataRole.UserRole)
-            if note_data and note_data.id in expanded_ids:
-                # Expand parents first to ensure proper expansion
-                parent = item.parent()
-                while parent:
-                    parent.setExpanded(True)
-                    parent = parent.parent()
-                item.setExpanded(True)
-            for i in range(item.childCount()):
-                recurse(item.child(i))
-
-        for i in range(self.topLevelItemCount()):
-            recurse(self.topLevelItem(i))
+        # Ancestors that were expanded are in the set themselves
+        for note_id in expanded_ids:
+            index = self.tree_model.index_for_note(note_id)
+            if index.isValid():
+                self.setExpanded(index, True)
 
     def _get_selected_item_id(self) -> Optional[int]:
-        current_item = self.currentItem()
-        if current_item:
-            note_data = current_item.data(0, Qt.ItemDataRole.UserRole)
-            if note_data:
-                return note_data.id
+        note_data = self.current_note()
+        if note_data:
+            return note_data.id
         return None
 
-    def get_item_above(self, item: QTreeWidgetItem) -> Optional[QTreeWidgetItem]:
+    def get_item_above(self, index: QModelIndex) -> QModelIndex:
         """
-        Get the item that appears directly above the given item in the visual tree.
-        Returns None if there is no item above.
+        Get the index that appears directly above the given index in the visual tree.
+        Returns an invalid index if there is no item above.
         """
-        if not item:
-            return None
+        if not index.isValid():
+            return QModelIndex()
 
-        # Get the current visual index
-        current_index = self.indexFromItem(item)
-        if not current_index.isValid():
-            return None
-
-        # Get the index of item above
-        above_index = self.indexAbove(current_index)
-        if not above_index.isValid():
-            return None
-
-        # Return the item at that index
-        return self.itemFromIndex(above_index)
+        return self.indexAbove(index)
 
     def select_item_above(self) -> bool:
         """
         Select the item that appears directly above the current item in the visual tree.
         Returns True if selection was successful, False otherwise.
         """
-        current_item = self.currentItem()
-        if not current_item:
+        item_above = self.get_item_above(self.currentIndex())
+        if not item_above.isValid():
             return False
 
-        item_above = self.get_item_above(current_item)
-        if not item_above:
-            return False
-
-        self.setCurrentItem(item_above)
-        self.scrollToItem(item_above)
+        self.setCurrentIndex(item_above)
+        self.scrollTo(item_above)
         return True
 
-    def _handle_cut(self, item):
+    def _handle_cut(self, index: QModelIndex):
         """Handle cutting a tree item"""
         # Store new cut item and trigger repaint
-        self.cut_item = item
+        self.cut_item = QPersistentModelIndex(index)
         self.viewport().update()
 
-    def _handle_paste(self, target_item):
+    def _handle_paste(self, target_index: QModelIndex):
         """Handle pasting a cut item as child of target"""
-        if not self.cut_item or not target_item or self.cut_item == target_item:
+        if (
+            not self.cut_item.isValid()
+            or not target_index.isValid()
+            or self.cut_item == target_index
+        ):
             return
 
         # Get note data
-        cut_note = self.cut_item.data(0, Qt.ItemDataRole.UserRole)
-        target_note = target_item.data(0, Qt.ItemDataRole.UserRole)
+        cut_note = self.note_at(QModelIndex(self.cut_item))
+        target_note = self.note_at(target_index)
 
         if not cut_note or not target_note:
             return
 
         # Don't allow pasting to own child
-        parent = target_item
-        while parent:
-            if parent == self.cut_item:
-                return
-            parent = parent.parent()
+        if self.notes_model and self.notes_model.is_descendant(
+            target_note.id, cut_note.id
+        ):
+            return
 
         # Use the model to update the relationship
         if self.notes_model:
@@ -308,28 +306,9 @@ class NotesTreeWidget(NavigableTree):
 
             if success:
                 # Clear cut state and trigger repaint
-                self.cut_item = None
+                self.cut_item = QPersistentModelIndex()
                 self.viewport().update()
 
-    def update_tree(self, root_notes: List[Note]) -> None:
-        """Update the tree widget to reflect the model's state"""
-        # Clear cut state
-        self.cut_item = None
-        self.original_background = None
-
-        # Save current state before update
-        state = self.save_state()
-
-        # Clear and rebuild tree
-        self.clear()
-
-        # Add all root notes
-        for note in root_notes:
-            self._add_note_to_tree(note, self)
-
-        # Restore state after update
-        self.restore_state(state)
-
     def _create_context_menu(self) -> QMenu:
         """Create and return the context menu with note-specific actions"""
         menu = super()._create_context_menu()
@@ -337,34 +316,42 @@ class NotesTreeWidget(NavigableTree):
         # Add a separator before note-specific actions
         menu.addSeparator()
 
-        current_item = self.currentItem()
-        if current_item:
-            note_data = current_item.data(0, Qt.ItemDataRole.UserRole)
+        current_item = QPersistentModelIndex(self.currentIndex())
+        if current_item.isValid():
+            note_data = self.note_at(QModelIndex(current_item))
             if note_data:
                 # Add promote/demote actions
                 promote_action = menu.addAction("Promote")
                 promote_action.triggered.connect(
-                    lambda: self.promote_note(current_item)
+                    lambda: self.promote_note(QModelIndex(current_item))
                 )
                 # Only enable promote if item has a parent
-                promote_action.setEnabled(current_item.parent() is not None)
+                promote_action.setEnabled(current_item.parent().isValid())
 
                 demote_action = menu.addAction("Demote")
-                demote_action.triggered.connect(lambda: self.demote_note(current_item))
+                demote_action.triggered.connect(
+                    lambda: self.demote_note(QModelIndex(current_item))
+                )
                 # Only enable demote if there's an item above
-                demote_action.setEnabled(self.get_item_above(current_item) is not None)
+                demote_action.setEnabled(
+                    self.get_item_above(QModelIndex(current_item)).isValid()
+                )
 
                 # Add separator before cut/paste
                 menu.addSeparator()
 
                 # Add cut action
                 cut_action = menu.addAction("Cut")
-                cut_action.triggered.connect(lambda: self._handle_cut(current_item))
+                cut_action.triggered.connect(
+                    lambda: self._handle_cut(QModelIndex(current_item))
+                )
 
                 # Add paste action (only enabled if there's a cut item)
                 paste_action = menu.addAction("Paste")
-                paste_action.setEnabled(self.cut_item is not None)
-                paste_action.triggered.connect(lambda: self._handle_paste(current_item))
+                paste_action.setEnabled(self.cut_item.isValid())
+                paste_action.triggered.connect(
+                    lambda: self._handle_paste(QModelIndex(current_item))
+                )
 
                 # Add separator before delete
                 menu.addSeparator()
@@ -382,25 +369,6 @@ class NotesTreeWidget(NavigableTree):
 
         return menu
 
-    def _add_note_to_tree(
-        self, note: Note, parent: Union[QTreeWidget, QTreeWidgetItem]
-    ) -> None:
-        """Add a note and its children to the tree, reflecting model structure"""
-        # Create item for current note
-        item = QTreeWidgetItem()
-        item.setText(0, note.title)
-        item.setData(0, Qt.ItemDataRole.UserRole, note)
-
-        # Add to parent
-        if isinstance(parent, QTreeWidget):
-            parent.addTopLevelItem(item)
-        else:
-            parent.addChild(item)
-
-        # Add children, following model's structure
-        for child in note.children:
-            self._add_note_to_tree(child, item)
-
     def paintEvent(self, event):
         """Draw hover highlight during drag and cut item highlight"""
         super().paintEvent(event)
@@ -408,15 +376,15 @@ class NotesTreeWidget(NavigableTree):
         painter = QPainter(self.viewport())
 
         # Draw hover highlight
-        if self.hover_item:
-            rect = self.visualItemRect(self.hover_item)
+        if self.hover_item.isValid():
+            rect = self.visualRect(QModelIndex(self.hover_item))
             color = self.palette().color(QPalette.ColorRole.Highlight)
             color.setAlpha(int(self.hover_opacity.opacity * 255))
             painter.fillRect(rect, color)
 
         # Draw cut item highlight
-        if self.cut_item:
-            rect = self.visualItemRect(self.cut_item)
+        if self.cut_item.isValid():
+            rect = self.visualRect(QModelIndex(self.cut_item))
             color = self.palette().color(QPalette.ColorRole.Highlight)
             # Make it more vibrant - increase saturation and brightness
             color = color.lighter(130)
@@ -425,41 +393,39 @@ class NotesTreeWidget(NavigableTree):
 
     def mouseDoubleClickEvent(self, event):
         """Handle double click events to focus the selected note"""
-        current = self.currentItem()
-        if current:
-            note_data = current.data(0, Qt.ItemDataRole.UserRole)
-            if note_data:
-                self.note_selected_with_focus.emit(note_data.id)
-                event.accept()
-                return
+        note_data = self.current_note()
+        if note_data:
+            self.note_selected_with_focus.emit(note_data.id)
+            event.accept()
+            return
         super().mouseDoubleClickEvent(event)
 
     def dragLeaveEvent(self, event):
         """Clear hover state when drag leaves"""
-        if self.hover_item:
-            self.hover_item = None
+        if self.hover_item.isValid():
+            self.hover_item = QPersistentModelIndex()
             self.viewport().update()
         super().dragLeaveEvent(event)
 
     def dropEvent(self, event):
         """Handle drop events for note reordering and detaching"""
         # Get the target item (where we're dropping)
-        target = self.itemAt(event.pos())
+        target = self.indexAt(event.pos())
 
         # Get the dragged item
-        dragged = self.currentItem()
-        if not dragged or dragged == target:
+        dragged = self.currentIndex()
+        if not dragged.isValid() or dragged == target:
             event.ignore()
             return
 
         # Get dragged note data
-        dragged_note = dragged.data(0, Qt.ItemDataRole.UserRole)
+        dragged_note = self.note_at(dragged)
         if not dragged_note:
             event.ignore()
             return
 
         # Clear hover state
-        self.hover_item = None
+        self.hover_item = QPersistentModelIndex()
         self.viewport().update()
 
         # Prevent default drop handling
@@ -467,24 +433,23 @@ class NotesTreeWidget(NavigableTree):
         event.accept()
 
         # If target is None, we're dropping to root level (detach)
-        if not target:
+        if not target.isValid():
             if self.notes_model:
                 self.notes_model.detach_note_from_parent(dragged_note.id)
             return
 
         # Handle normal attachment to another note
-        target_note = target.data(0, Qt.ItemDataRole.UserRole)
+        target_note = self.note_at(target)
         if not target_note:
             event.ignore()
             return
 
         # Don't allow dropping on own child
-        parent = target
-        while parent:
-            if parent == dragged:
-                event.ignore()
-                return
-            parent = parent.parent()
+        if self.notes_model and self.notes_model.is_descendant(
+            target_note.id, dragged_note.id
+        ):
+            event.ignore()
+            return
 
         # Use the model to update the relationship
         if self.notes_model:
@@ -507,7 +472,7 @@ class NotesTreeWidget(NavigableTree):
         """Handle drag move events to control where drops are allowed"""
         if event.source() == self:
             # Update hover item
-            new_hover = self.itemAt(event.pos())
+            new_hover = QPersistentModelIndex(self.indexAt(event.pos()))
             if new_hover != self.hover_item:
                 self.hover_item = new_hover
 
@@ -516,7 +481,7 @@ class NotesTreeWidget(NavigableTree):
                     self.hover_animation.stop()
                     self.hover_animation.deleteLater()
 
-                if new_hover:
+                if new_hover.isValid():
                     self.hover_animation = QPropertyAnimation(
                         self.hover_opacity, b"opacity"
                     )
@@ -534,31 +499,31 @@ class NotesTreeWidget(NavigableTree):
         else:
             event.ignore()
 
-    def promote_note(self, item: QTreeWidgetItem) -> bool:
+    def promote_note(self, item: QModelIndex) -> bool:
         """
         Promote a note by attaching it to its grandparent.
         Returns True if promotion was successful, False otherwise.
         """
-        if not item or not self.notes_model:
+        if not item.isValid() or not self.notes_model:
             return False
 
         # Get note data
-        note_data = item.data(0, Qt.ItemDataRole.UserRole)
+        note_data = self.note_at(item)
         if not note_data:
             return False
 
         # Get parent item
         parent_item = item.parent()
-        if not parent_item:
+        if not parent_item.isValid():
             # Already at root level, can't promote
             return False
 
         # Get grandparent item
         grandparent_item = parent_item.parent()
 
-        if grandparent_item:
+        if grandparent_item.isValid():
             # If there's a grandparent, attach to it
-            grandparent_note = grandparent_item.data(0, Qt.ItemDataRole.UserRole)
+            grandparent_note = self.note_at(grandparent_item)
             return self.notes_model.attach_note_to_parent(
                 note_data.id, grandparent_note.id
             )
@@ -566,36 +531,33 @@ class NotesTreeWidget(NavigableTree):
             # If no grandparent, detach from parent (move to root)
             return self.notes_model.detach_note_from_parent(note_data.id)
 
-    def demote_note(self, item: QTreeWidgetItem) -> bool:
+    def demote_note(self, item: QModelIndex) -> bool:
         """
         Demote a note by attaching it to the item visually above it.
         Returns True if demotion was successful, False otherwise.
         """
-        if not item or not self.notes_model:
+        if not item.isValid() or not self.notes_model:
             return False
 
         # Get note data
-        note_data = item.data(0, Qt.ItemDataRole.UserRole)
+        note_data = self.note_at(item)
         if not note_data:
             return False
 
         # Get item above
         item_above = self.get_item_above(item)
-        if not item_above:
+        if not item_above.isValid():
             # No item above, can't demote
             return False
 
         # Get note data for item above
-        above_note = item_above.data(0, Qt.ItemDataRole.UserRole)
+        above_note = self.note_at(item_above)
         if not above_note:
             return False
 
         # Don't allow attaching to own descendant
-        parent = item_above
-        while parent:
-            if parent == item:
-                return False
-            parent = parent.parent()
+        if self.notes_model.is_descendant(above_note.id, note_data.id):
+            return False
 
         # Attach to the item above
         return self.notes_model.attach_note_to_parent(note_data.id, above_note.id)
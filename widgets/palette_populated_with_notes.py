@@ -1,11 +1,13 @@
 from typing import List, Optional, Any
-from PySide6.QtWidgets import QListWidgetItem, QMainWindow
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont
-from thefuzz import fuzz
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QMainWindow
 from .popup_palette import PopupPalette
 from models.note import Note
 from models.notes_model import NotesModel
+from utils.fuzzy_matcher import FuzzyMatcher
+
+# Pause in typing after which the quick results are replaced by complete ones
+COMPLETE_MATCH_DELAY_MS = 150
 
 
 class PalettePopulatedWithNotes(PopupPalette):
@@ -21,11 +23,27 @@ class PalettePopulatedWithNotes(PopupPalette):
         self.notes_model = notes_model
         self._notes: List[Note] = []
         self._note_paths: dict[int, str] = {}
-
-        # Before this can be used, the api needs an endpoint to fetch
-        # all the breadcrumbs for all notes, otherwise it will be too slow
-        # Manually walking the tree will be less slow, but will add code complexity
-        # that should be offloaded to the API
+        # Position of each note in _notes and the matcher
+        self._positions: dict[int, int] = {}
+        # Search index over the notes, rebuilt when notes are added or
+        # removed and patched in place when one is renamed or moved
+        self._matcher: Optional[FuzzyMatcher[Note]] = None
+        for signal in (
+            notes_model.notes_updated,
+            notes_model.note_added,
+            notes_model.note_removed,
+        ):
+            signal.connect(self._invalidate_matcher)
+        notes_model.note_changed.connect(self._on_note_changed)
+        notes_model.note_moved.connect(self._on_note_moved)
+        # Each keystroke gets a quick match, the complete one, which also
+        # looks for misspellings, waits until typing pauses
+        self._complete_match_timer = QTimer(self)
+        self._complete_match_timer.setSingleShot(True)
+        self._complete_match_timer.setInterval(COMPLETE_MATCH_DELAY_MS)
+        self._complete_match_timer.timeout.connect(self._complete_match)
+
+        # Paths are built from the model's in-memory hierarchy
         self.use_full_path = use_full_path
 
         # Follow mode triggers a signal that is connected in main_window.py
@@ -36,124 +54,120 @@ class PalettePopulatedWithNotes(PopupPalette):
         # To change the default just trigger the signal in main_window.py at startup
         self.follow_mode = True
 
-        # Connect selection change signal
-        self.results_list.currentItemChanged.connect(self.on_selection_changed)
+    def _invalidate_matcher(self, *args) -> None:
+        self._matcher = None
+
+    def _on_note_changed(self, note_id: int) -> None:
+        """Reindex a note whose title may have changed"""
+        if self._matcher is not None:
+            self._update_entries(note_id)
+
+    def _on_note_moved(self, note_id: int, *args) -> None:
+        """Reindex the paths of a moved note and everything below it"""
+        if self._matcher is not None and self.use_full_path:
+            self._update_entries(note_id)
+
+    def _update_entries(self, note_id: int) -> None:
+        note = self.notes_model.notes.get(note_id)
+        position = self._positions.get(note_id)
+        if note is None or position is None or not note.title:
+            # Listed or unlisted now, the note set itself changed
+            self._invalidate_matcher()
+            return
+
+        if self.use_full_path:
+            path = self.notes_model.get_note_path(note_id)
+            if path == self._note_paths.get(note_id):
+                return
+            # The paths of everything below change with it
+            for updated_id in [note_id] + note.get_all_descendants():
+                self._note_paths[updated_id] = self.notes_model.get_note_path(
+                    updated_id
+                )
+                updated_position = self._positions.get(updated_id)
+                if updated_position is not None:
+                    self._update_entry(updated_position, updated_id)
+        else:
+            self._update_entry(position, note_id)
+
+    def _update_entry(self, position: int, note_id: int) -> None:
+        note = self.notes_model.notes[note_id]
+        self._notes[position] = note
+        self._matcher.update(position, note)
 
     def populate_notes(self) -> None:
         """Collect all notes from the model and cache their paths if needed"""
-        self._notes = self.notes_model.get_all_notes()
-
-        # Pre-fetch all note paths if using full paths
-        if self.use_full_path and self.parent():
-            try:
-                note_api = self.parent().notes_model.note_api
-                self._note_paths = {}
-                for note in self._notes:
-                    try:
-                        breadcrumbs = note_api.get_note_breadcrumbs(note.id)
-                        self._note_paths[note.id] = "/".join(
-                            note.title for note in breadcrumbs
-                        )
-                    except Exception as e:
-                        print(f"Failed to fetch breadcrumbs for note {note.id}: {e}")
-                        self._note_paths[note.id] = note.title
-            except Exception as e:
-                print(f"Failed to fetch note paths: {e}")
-                self._note_paths = {}
-
-        # Clear and repopulate the results list
-        self.results_list.clear()
-        for note in self._notes:
-            item = self.create_list_item(note)
-            if item:
-                self.results_list.addItem(item)
+        if self._matcher is None:
+            # Untitled notes are not listed
+            self._notes = [
+                note for note in self.notes_model.get_all_notes() if note.title
+            ]
+            self._positions = {note.id: i for i, note in enumerate(self._notes)}
+
+            # Paths are cached by the model, so this is cheap after the first time
+            if self.use_full_path:
+                self._note_paths = self.notes_model.get_all_note_paths()
+
+            self._matcher = FuzzyMatcher(self._notes, key=self.item_text)
+
+        self.results_model.set_items(self._notes)
 
     def get_all_items(self) -> List[Note]:
         """Get all notes"""
         return self._notes
 
-    def create_list_item(self, data: Any) -> Optional[QListWidgetItem]:
-        """Create a list item from a note"""
-        if not isinstance(data, Note) or not data.title:
-            return None
-
-        # Get display text - either full path or just title
+    def item_text(self, data: Any) -> str:
+        """Display text for a note - either full path or just title"""
         if self.use_full_path:
-            display_text = self._note_paths.get(data.id, data.title)
-        else:
-            display_text = data.title
-
-        item = QListWidgetItem(display_text)
-        item.setData(Qt.ItemDataRole.UserRole, data)
-
-        # Style the item
-        font = QFont()
-        font.setPointSize(11)
-        item.setFont(font)
-
-        # Store the original title for filtering
-        item.setData(Qt.ItemDataRole.UserRole + 1, data.title)
-
-        return item
+            return self._note_paths.get(data.id, data.title)
+        return data.title
 
     def simple_filter_items(self, text: str) -> None:
         """Filter notes based on search text"""
         search_terms = text.lower().split()
-        for note in self._notes:
+        rows = []
+        for i, note in enumerate(self._notes):
             note_text = note.title.lower()
             note_path = (
                 self._note_paths.get(note.id, "").lower() if self.use_full_path else ""
             )
 
             if all(term in note_text or term in note_path for term in search_terms):
-                item = self.create_list_item(note)
-                if item:
-                    self.results_list.addItem(item)
+                rows.append(i)
+        self.results_model.set_rows(rows)
 
     def filter_items(self, text: str) -> None:
         """Filter notes based on fuzzy search text"""
-        self.results_list.clear()
         if not text:  # Show all items if search is empty
-            for note in self._notes:
-                item = self.create_list_item(note)
-                if item:
-                    self.results_list.addItem(item)
+            self.results_model.set_rows(None)
             return
 
-        # Store matches with their scores for sorting
-        matches = []
-        for note in self._notes:
-            note_text = note.title
-            if self.use_full_path:
-                note_text = self._note_paths.get(note.id, note.title)
+        if self._matcher is None:
+            self.populate_notes()
 
-            # Get the best match ratio using token_set_ratio (best for partial matches)
-            ratio = fuzz.token_set_ratio(text.lower(), note_text.lower())
+        # Best matches first, capped at the matcher's limit
+        self.results_model.set_rows(self._matcher.match_indices(text, complete=False))
+        self._complete_match_timer.start()
 
-            # Only include matches above a certain threshold (adjust as needed)
-            if ratio > 50:  # threshold of 50%
-                matches.append((ratio, note))
-
-        # Sort by score descending
-        matches.sort(reverse=True, key=lambda x: x[0])
-
-        # Add items in sorted order
-        for _, note in matches:
-            item = self.create_list_item(note)
-            if item:
-                self.results_list.addItem(item)
-
-    def on_selection_changed(
-        self, current: Optional[QListWidgetItem], previous: Optional[QListWidgetItem]
-    ) -> None:
+    def _complete_match(self) -> None:
+        """Replace the quick results once typing has paused"""
+        text = self.search_input.text()
+        if self._matcher is None or not text.strip():
+            return
+        current = self.current_item()
+        rows = self._matcher.match_indices(text)
+        self.results_model.set_rows(rows)
+        # Keep the highlighted note if it is still listed
+        position = self._positions.get(current.id) if current is not None else None
+        self.set_current_row(rows.index(position) if position in rows else 0)
+
+    def on_current_item_changed(self, item: Any) -> None:
         """Preview the selected note if follow mode is enabled"""
-        if not current or not self.parent():
+        if not isinstance(item, Note) or not self.parent():
             return
 
         if self.follow_mode:
-            note = current.data(Qt.ItemDataRole.UserRole)
-            if note:
-                self.preview_note(note.id)
+            self.preview_note(item.id)
 
     def preview_note(self, note_id: int) -> None:
         """Preview the note - to be implemented by subclasses"""
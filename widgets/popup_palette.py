@@ -3,13 +3,34 @@ from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QLineEdit,
-    QListWidget,
+    QListView,
     QGraphicsDropShadowEffect,
-    QListWidgetItem,
     QMainWindow,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
 )
-from PySide6.QtCore import Qt, QRect
+from PySide6.QtCore import Qt, QRect, QModelIndex
 from PySide6.QtGui import QKeyEvent, QColor, QPalette, QFont
+from models.palette_results_model import PaletteResultsModel
+
+_item_font: Optional[QFont] = None
+
+
+def palette_item_font() -> QFont:
+    """Font shared by the rows of every palette"""
+    global _item_font
+    if _item_font is None:
+        _item_font = QFont()
+        _item_font.setPointSize(11)
+    return _item_font
+
+
+class PaletteItemDelegate(QStyledItemDelegate):
+    """Paints palette rows with the shared item font"""
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex):
+        super().initStyleOption(option, index)
+        option.font = palette_item_font()
 
 
 class PopupPalette(QWidget):
@@ -47,9 +68,17 @@ class PopupPalette(QWidget):
         self.search_input.setFont(search_font)
         layout.addWidget(self.search_input)
 
-        # Results list styling
-        self.results_list = QListWidget()
-        self.results_list.itemActivated.connect(self.on_item_activated)
+        # Results list, rows are only created for what is on screen
+        self.results_model = PaletteResultsModel(self.item_text, self)
+        self.results_list = QListView()
+        self.results_list.setModel(self.results_model)
+        self.results_list.setItemDelegate(PaletteItemDelegate(self.results_list))
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.results_list.activated.connect(self._on_index_activated)
+        self.results_list.selectionModel().currentChanged.connect(
+            self._on_current_changed
+        )
         layout.addWidget(self.results_list)
 
         self.setLayout(layout)
@@ -74,76 +103,88 @@ class PopupPalette(QWidget):
         self.show()
         self.search_input.setFocus()
         self.search_input.clear()
-        self.results_list.clear()
 
         # Show all items initially
-        for item_data in self.get_all_items():
-            list_item = self.create_list_item(item_data)
-            if list_item:
-                self.results_list.addItem(list_item)
+        self.results_model.set_items(self.get_all_items())
 
         # Select first item by default
-        if self.results_list.count() > 0:
-            self.results_list.setCurrentRow(0)
+        self.set_current_row(0)
 
     def get_all_items(self) -> List[Any]:
         """Get all items to be shown in the palette.
         To be implemented by subclasses."""
         return []
 
-    def create_list_item(self, data: Any) -> Optional[QListWidgetItem]:
-        """Create a list widget item from the data.
+    def item_text(self, data: Any) -> str:
+        """Get the text displayed for an item.
         To be implemented by subclasses."""
-        pass
+        return str(data)
 
     def on_search(self, text: str) -> None:
         """Handle search text changes"""
-        self.results_list.clear()
-
         if not text.strip():  # Show all items when search is empty
-            for item_data in self.get_all_items():
-                list_item = self.create_list_item(item_data)
-                if list_item:
-                    self.results_list.addItem(list_item)
+            self.results_model.set_rows(None)
         else:
             self.filter_items(text)
 
         # Select first item if any exist
-        if self.results_list.count() > 0:
-            self.results_list.setCurrentRow(0)
+        self.set_current_row(0)
 
     def filter_items(self, text: str) -> None:
-        """Filter items based on search text.
+        """Filter items based on search text by passing the indices of the
+        matching items from get_all_items to results_model.set_rows.
         To be implemented by subclasses."""
         pass
 
+    def current_item(self) -> Any:
+        """Get the data of the highlighted row, if any"""
+        index = self.results_list.currentIndex()
+        return self.results_model.item_at(index.row()) if index.isValid() else None
+
+    def set_current_row(self, row: int) -> None:
+        if 0 <= row < self.results_model.rowCount():
+            self.results_list.setCurrentIndex(self.results_model.index(row))
+
+    def _on_index_activated(self, index: QModelIndex) -> None:
+        item = self.results_model.item_at(index.row())
+        if item is not None:
+            self.on_item_activated(item)
+
+    def _on_current_changed(self, current: QModelIndex, previous: QModelIndex) -> None:
+        if current.isValid():
+            self.on_current_item_changed(self.results_model.item_at(current.row()))
+
+    def on_current_item_changed(self, item: Any) -> None:
+        """Handle the highlighted row changing"""
+        # To be implemented by subclasses
+        pass
+
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """Handle keyboard navigation"""
         if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
-            current_item = self.results_list.currentItem()
-            if current_item:
+            current_item = self.current_item()
+            if current_item is not None:
                 self.on_item_activated(current_item)
             event.accept()
             return
 
         if event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            current_row = self.results_list.currentRow()
+            current_row = self.results_list.currentIndex().row()
 
             if event.key() == Qt.Key.Key_N:  # Next item
-                if current_row < self.results_list.count() - 1:
-                    self.results_list.setCurrentRow(current_row + 1)
+                self.set_current_row(current_row + 1)
                 event.accept()
                 return
 
             elif event.key() == Qt.Key.Key_P:  # Previous item
                 if current_row > 0:
-                    self.results_list.setCurrentRow(current_row - 1)
+                    self.set_current_row(current_row - 1)
                 event.accept()
                 return
 
         super().keyPressEvent(event)
 
-    def on_item_activated(self, item: QListWidgetItem) -> None:
+    def on_item_activated(self, item: Any) -> None:
         """Handle item selection"""
         # To be implemented by subclasses
         pass
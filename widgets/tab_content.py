@@ -1,30 +1,43 @@
 from PySide6.QtWidgets import QApplication, QWidget, QSplitter
-from pydantic import BaseModel, Field
-from PySide6.QtCore import Signal, Qt, QBuffer, QByteArray, QIODevice
+from PySide6.QtCore import Signal, Qt, QIODevice, QTimer
 from PySide6.QtNetwork import QNetworkRequest
 from PySide6.QtGui import QAction
 from PySide6.QtWebEngineCore import QWebEngineUrlRequestJob
-from typing import Literal, Optional, Dict
-from pydantic import BaseModel
+from typing import Callable, List, Optional, Dict, Tuple
 
-import requests
 from models.note import Note
 from widgets.left_sidebar import LeftSidebar
+from widgets.katex_prerender import KatexPrerenderer, MathExpression
 from widgets.markdown_editor import MarkdownEditor
 from widgets.right_sidebar import RightSidebar
 from models.notes_model import NotesModel
 from models.navigation_model import NavigationModel
+from models.render_cache import RenderCache, RenderKey, render_key
+from models.request_executor import CancellationToken, Lane
+from utils.content_hash import content_hash
 from widgets.note_select_palette import NoteSelectPalette
 import api
+from api.async_client import fetch_rendered_html
 from app_types import HierarchyLevel
 
+# Quiet period after the last keystroke before unsaved edits are saved
+AUTOSAVE_DELAY_MS = 2000
+
 
 class TabContent(QWidget):
     """A complete view implementation for a note"""
 
     note_saved = Signal(int)  # Emits note_id when saved
-
-    def __init__(self, base_url: str, parent=None):
+    dirty_changed = Signal(bool)  # Emits when the editor gains or loses unsaved edits
+    status_message = Signal(str)  # Short status for the status bar
+
+    def __init__(
+        self,
+        base_url: str,
+        parent=None,
+        render_cache: Optional[RenderCache] = None,
+        math_prerenderer: Optional[KatexPrerenderer] = None,
+    ):
         super().__init__(parent)
         self.current_note_id: Optional[int] = None
         self.notes_model: Optional[NotesModel] = None
@@ -33,16 +46,28 @@ class TabContent(QWidget):
         self.base_url = base_url
         self.note_select_palette = None  # Will be initialized when model is set
         self.note_link_palette = None  # Will be initialized when needed
+        # Hash of the content last loaded or saved, None if unknown
+        self._saved_hash: Optional[str] = None
 
         # Create components
         self.left_sidebar = LeftSidebar()
         self.right_sidebar = RightSidebar()
         # Create the MarkdownEditor Region
-        self.editor = MarkdownEditor(self.base_url)
+        self.editor = MarkdownEditor(
+            self.base_url,
+            render_cache=render_cache,
+            math_prerenderer=math_prerenderer,
+        )
         # NOTE this has:
         # .editor: QTextEdit
         # .preview: QWebEngineView
 
+        # Saves unsaved edits once typing pauses
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(AUTOSAVE_DELAY_MS)
+        self.autosave_timer.timeout.connect(self._autosave)
+
         self._setup_ui()
         self._connect_signals()
 
@@ -107,13 +132,20 @@ class TabContent(QWidget):
         self.editor.render_requested.connect(self._handle_preview_request)
         # When user follows a link, it will change the view
         self.editor.note_selected.connect(self._handle_view_request)
+        self.editor.modification_changed.connect(self.dirty_changed)
+        self.editor.editor.textChanged.connect(self.autosave_timer.start)
 
     def set_model(self, notes_model: NotesModel):
         """Connect this view to the model"""
         self.notes_model = notes_model
         self.left_sidebar.tree.set_model(notes_model)
+        # Local previews render on the model's worker threads
+        self.editor.set_executor(notes_model.executor)
         # Connect note selection to view updates, but only when this tab is active
         self.notes_model.note_selected.connect(self._filtered_update_view)
+        # Keep the link sidebars current as notes are saved
+        self.notes_model.note_links_changed.connect(self._handle_note_links_changed)
+        self.notes_model.links_updated.connect(self._handle_links_updated)
         # Initialize palettes with view actions
         self.note_select_palette = NoteSelectPalette(notes_model, self)
         # Initialize note link palette
@@ -179,34 +211,77 @@ class TabContent(QWidget):
     def _update_view(self, selection_data):
         """Update entire view when note selection changes"""
         if selection_data.note:
+            if self.is_dirty():
+                if self.current_note_id == selection_data.note.id:
+                    # Reselected, the editor already holds its newest text
+                    self._update_right_sidebar(selection_data)
+                    return
+                # Don't lose unsaved edits to the note being left
+                self._handle_save_request(self.current_note_id)
             self.current_note_id = selection_data.note.id
             # Update editor content
-            self.editor.set_content(selection_data.note.content)
+            content = self.notes_model.get_note_content(selection_data.note.id)
+            self.editor.set_content(content or "")
+            self._saved_hash = content_hash(content or "")
             # Update right sidebar
             self._update_right_sidebar(selection_data)
 
-    def _handle_save_request(self, note_id: int):
-        """Internal handler for save requests"""
-        # Store current cursor position and tree state before save
-        cursor = self.editor.editor.textCursor()
-        cursor_position = cursor.position()
-        tree_state = self.left_sidebar.tree.save_state()
-        
+    def _handle_save_request(self, note_id: int, autosave: bool = False):
+        """Internal handler for save requests
+
+        The save runs in the background; the editor keeps its text and cursor,
+        and the tree restores its own state when the model refreshes.
+        """
         content = self.editor.get_content()
         if self.notes_model:
-            # Store current note ID before save
-            current_note_id = self.get_current_note_id()
-            if self.notes_model.update_note(note_id, content=content):
-                # After model refresh, restore UI state
-                if current_note_id is not None:
-                    # Restore tree state first
-                    self.left_sidebar.tree.restore_state(tree_state)
-                    # Then restore note selection and cursor
-                    self.set_current_note(current_note_id)
-                    cursor = self.editor.editor.textCursor()
-                    cursor.setPosition(cursor_position)
-                    self.editor.editor.setTextCursor(cursor)
-                self.note_saved.emit(note_id)
+            self.autosave_timer.stop()
+            self._saved_hash = content_hash(content)
+            self.editor.set_modified(False)
+            self.notes_model.update_note(
+                note_id,
+                content=content,
+                on_done=lambda ok: self._handle_save_done(note_id, ok, autosave),
+            )
+
+    def _handle_save_done(self, note_id: int, ok: bool, autosave: bool) -> None:
+        if not ok:
+            self.mark_unsaved(note_id)
+            self.status_message.emit(f"Failed to save note {note_id}")
+        elif autosave:
+            self.status_message.emit(f"Note {note_id} autosaved")
+        else:
+            self.note_saved.emit(note_id)
+
+    def _autosave(self) -> None:
+        """Save unsaved edits, unless the text is back to what was saved"""
+        if not self.is_dirty():
+            return
+        if content_hash(self.editor.get_content()) == self._saved_hash:
+            # Edited and changed back
+            self.editor.set_modified(False)
+            return
+        self.status_message.emit(f"Autosaving note {self.current_note_id}...")
+        self._handle_save_request(self.current_note_id, autosave=True)
+
+    def is_dirty(self) -> bool:
+        """Whether the editor holds edits that have not been saved"""
+        return self.current_note_id is not None and self.editor.is_modified()
+
+    def take_unsaved_content(self) -> Optional[str]:
+        """The editor's content if it has unsaved edits, which now count as saved"""
+        if not self.is_dirty():
+            return None
+        content = self.editor.get_content()
+        self.autosave_timer.stop()
+        self._saved_hash = content_hash(content)
+        self.editor.set_modified(False)
+        return content
+
+    def mark_unsaved(self, note_id: int) -> None:
+        """Flag the editor dirty again after a save of this note failed"""
+        if note_id == self.current_note_id:
+            self._saved_hash = None
+            self.editor.set_modified(True)
 
     def _update_right_sidebar(self, selection_data):
         """Update right sidebar content when a note is selected"""
@@ -216,51 +291,82 @@ class TabContent(QWidget):
             self.right_sidebar.update_backlinks(selection_data.backlinks)
             self.right_sidebar.update_tags(selection_data.tags)
 
+    def _handle_note_links_changed(self, note_id: int) -> None:
+        """Refresh the link sidebars from the model if they show this note"""
+        if self.notes_model and note_id == self.current_note_id:
+            self.right_sidebar.update_forward_links(
+                self.notes_model.get_forward_links(note_id)
+            )
+            self.right_sidebar.update_backlinks(self.notes_model.get_backlinks(note_id))
+
+    def _handle_links_updated(self) -> None:
+        """Refresh the link sidebars once the link graph has (re)loaded"""
+        if self.current_note_id is not None:
+            self._handle_note_links_changed(self.current_note_id)
+
     def _handle_preview_request(self, content: Optional[str] = None):
-        """Handle request to update preview using streaming response"""
+        """Handle request to update preview, rendered remotely off the GUI thread"""
+        if self.notes_model and (note_id := self.current_note_id) is not None:
+            # Without content the server renders its copy of the note, which
+            # is what the model holds if it is loaded
+            source = (
+                content
+                if content is not None
+                else self.notes_model.get_note_content(note_id)
+            )
+            key = render_key(source, "remote") if source is not None else None
+            if key is not None and (html := self.editor.render_cache.get(key)):
+                self.notes_model.executor.cancel(f"preview:{id(self)}")
+                self.editor.set_preview_content(html)
+                return
 
-        class RenderMarkdownRequest(BaseModel):
-            """Request to render markdown content"""
+            # A newer edit supersedes any render queued or in flight for this tab
+            self.notes_model.executor.submit(
+                self._fetch_rendered_html,
+                note_id,
+                content,
+                key=f"preview:{id(self)}",
+                lane=Lane.INTERACTIVE,
+                pass_token=True,
+                on_result=lambda html: self._handle_rendered_html(key, html),
+                on_error=self._handle_preview_error,
+            )
 
-            content: str
-            format: Optional[Literal["text", "html", "pdf"]] = None
+    def _handle_rendered_html(
+        self,
+        key: Optional[RenderKey],
+        rendered: Optional[Tuple[str, str, List[MathExpression]]],
+    ) -> None:
+        if rendered is None:
+            return  # Aborted
+        html, inlined, missing_math = rendered
+        if key is not None:
+            self.editor.render_cache.put(key, html)
+        self.editor.set_preview_content(inlined, missing_math)
+
+    def _fetch_rendered_html(
+        self, note_id: int, content: Optional[str], cancel_token: CancellationToken
+    ) -> Optional[Tuple[str, str, List[MathExpression]]]:
+        """Fetch rendered HTML from the API, runs on a worker thread
+
+        The request is aborted as soon as a newer render supersedes it.
+
+        Returns:
+            The HTML as rendered, the HTML with prerendered math inlined and
+            the math still missing, or None if the request was aborted
+        """
+        html = fetch_rendered_html(
+            self.base_url, note_id, content, lambda: cancel_token.cancelled
+        )
+        if html is None:
+            return None
+        inlined, missing_math = self.editor.inline_math(html)
+        return html, inlined, missing_math
 
-        if self.notes_model and (note_id := self.current_note_id) is not None:
-            format = "html"
-            try:
-                if content is not None:
-                    # Render the provided content
-                    request = RenderMarkdownRequest(content=content, format=format)
-                    response = requests.post(
-                        f"{self.base_url}/render/markdown",
-                        headers={"Content-Type": "application/json"},
-                        data=request.model_dump_json(exclude_none=True),
-                        stream=True,  # Enable streaming
-                    )
-                else:
-                    response = requests.get(
-                        f"{self.base_url}/notes/flat/{note_id}/render/{format}",
-                        headers={"Content-Type": "application/json"},
-                        stream=True,  # Enable streaming
-                    )
-
-                response.raise_for_status()
-
-                # Create a QBuffer to accumulate streamed content
-                buffer = QByteArray()
-
-                # Stream and accumulate the response content
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        buffer.append(chunk)
-                        # Update preview with accumulated content so far
-                        html = buffer.data().decode("utf-8")
-                        self.editor.set_preview_content(html)
-
-            except Exception as e:
-                print(f"Error getting rendered note: {e}")
-                # Fall back to local preview
-                self.editor.update_preview_local()
+    def _handle_preview_error(self, e: Exception) -> None:
+        print(f"Error getting rendered note: {e}")
+        # Fall back to local preview
+        self.editor.update_preview_local()
 
     def get_current_note_id(self) -> Optional[int]:
         """Get the currently displayed note ID"""
@@ -289,22 +395,18 @@ class TabContent(QWidget):
 
         Deletes the item in the tree unless an int is passed, then it deletes the note with that id
         """
+        current_note = self.left_sidebar.tree.current_note()
         if maybe_note_id is None:
-            current_item = self.left_sidebar.tree.currentItem()
-            if not current_item:
+            if not current_note:
                 return
-            note_id = current_item.data(0, Qt.ItemDataRole.UserRole).id
+            note_id = current_note.id
         else:
             note_id = maybe_note_id
-            current_item = None
 
         try:
             if self.notes_model:
                 # If we're deleting the currently selected item, select the one above first
-                if (
-                    current_item
-                    and current_item.data(0, Qt.ItemDataRole.UserRole).id == note_id
-                ):
+                if current_note and current_note.id == note_id:
                     self.left_sidebar.tree.select_item_above()
                 # Delete the note through the model
                 self.notes_model.delete_note(note_id)
@@ -320,11 +422,8 @@ class TabContent(QWidget):
             # (though the note_deleted signal handler should handle this)
             if self.current_note_id == deleted_note_id:
                 # Get the previous item in the tree
-                if (
-                    item := self.left_sidebar.tree.currentItem()
-                    .parent()
-                    .data(0, Qt.ItemDataRole.UserRole)
-                ):
+                tree = self.left_sidebar.tree
+                if item := tree.note_at(tree.currentIndex().parent()):
                     self.current_note_id = item.id
                 else:
                     self.current_note_id = None
@@ -342,14 +441,14 @@ class TabContent(QWidget):
 
     def cut_selected_tree_item(self) -> None:
         """Cut the currently selected item in the tree"""
-        current_item = self.left_sidebar.tree.currentItem()
-        if current_item:
+        current_item = self.left_sidebar.tree.currentIndex()
+        if current_item.isValid():
             self.left_sidebar.tree._handle_cut(current_item)
 
     def paste_onto_selected_tree_item(self) -> None:
         """Paste the previously cut item onto the currently selected tree item"""
-        current_item = self.left_sidebar.tree.currentItem()
-        if current_item:
+        current_item = self.left_sidebar.tree.currentIndex()
+        if current_item.isValid():
             self.left_sidebar.tree._handle_paste(current_item)
 
     def promote_selected_tree_item(self) -> bool:
@@ -357,8 +456,8 @@ class TabContent(QWidget):
         Promote the currently selected item in the tree.
         Returns True if promotion was successful, False otherwise.
         """
-        current_item = self.left_sidebar.tree.currentItem()
-        if current_item:
+        current_item = self.left_sidebar.tree.currentIndex()
+        if current_item.isValid():
             return self.left_sidebar.tree.promote_note(current_item)
         return False
 
@@ -367,12 +466,16 @@ class TabContent(QWidget):
         Demote the currently selected item in the tree.
         Returns True if demotion was successful, False otherwise.
         """
-        current_item = self.left_sidebar.tree.currentItem()
-        if current_item:
+        current_item = self.left_sidebar.tree.currentIndex()
+        if current_item.isValid():
             return self.left_sidebar.tree.demote_note(current_item)
         return False
 
-    def handle_new_note_request(self, level: HierarchyLevel) -> Note | None:
+    def handle_new_note_request(
+        self,
+        level: HierarchyLevel,
+        on_done: Optional[Callable[[Optional[Note]], None]] = None,
+    ) -> None:
         # Typically, we would act on the id of the view, however
         # the user will want to rapidly create notes based on the tree but have the keybindings described in the menu
         # rather than the complexity of keybindings for the tree and the view when rarely will a user want to create a child
@@ -387,27 +490,26 @@ class TabContent(QWidget):
             case level.CHILD:
                 # This is the view of the UI, use the tree
                 # parent_id = self.get_current_note_id()
-                parent_id = (
-                    self.left_sidebar.tree.currentItem()
-                    .data(0, Qt.ItemDataRole.UserRole)
-                    .id
-                )
+                parent_id = self.left_sidebar.tree.current_note().id
             case level.SIBLING:
                 # Get from the tree
-                parent_id = (
-                    self.left_sidebar.tree.currentItem()
-                    .parent()
-                    .data(0, Qt.ItemDataRole.UserRole)
-                    .id
-                )
-
-        # Create new note
-        if self.notes_model:
-            new_note = self.notes_model.create_note(
-                title="New Note", content="", parent_id=parent_id
-            )
+                tree = self.left_sidebar.tree
+                parent_id = tree.note_at(tree.currentIndex().parent()).id
 
-            if new_note:
+        def note_created(new_note: Optional[Note]) -> None:
+            if new_note and new_note.id in self.notes_model.notes:
                 # Select the new note in tree
                 self.left_sidebar.tree.select_note_by_id(new_note.id)
-            return new_note
+            if on_done:
+                on_done(new_note)
+
+        # Create new note, it is selected once the server has assigned its ID
+        if self.notes_model:
+            self.notes_model.create_note(
+                title="New Note",
+                content="",
+                parent_id=parent_id,
+                on_done=note_created,
+            )
+        elif on_done:
+            on_done(None)